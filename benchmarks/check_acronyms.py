@@ -0,0 +1,142 @@
+# benchmarks/check_acronyms.py
+# Checks that the streaming find_acronyms gives exactly the result of the
+# whole-text reference scan (benchmarks/reference_acronyms.py): same
+# acronyms, same categories, same contexts, same order. Runs on generated
+# documents for several seeds and sizes, with and without custom include
+# phrases, and with paragraphs built to put postal codes, "A1 1B" pairs and
+# include phrases across paragraph joins.
+#
+#   python -m benchmarks.check_acronyms                  # exit code 1 on any difference
+#   python -m benchmarks.check_acronyms --sizes 1M --seeds 3
+import argparse
+import itertools
+import os
+import random
+import shutil
+import sys
+import tempfile
+
+from benchmarks.corpus import ACRONYM_LIST_PATH, generate_paragraphs, load_acronym_list
+from benchmarks.reference_acronyms import reference_find_acronyms
+from benchmarks.run_benchmarks import format_size, parse_size
+from macros.Acronyms import find_acronyms
+from macros.DocumentSource import TextDocumentSource
+
+DEFAULT_SIZES = "1k,10k,100k"
+DEFAULT_SEEDS = 5
+
+# Awkward paragraphs mixed into the generated text, mostly in pairs that
+# only mean something once the paragraphs are joined
+EDGE_PARAGRAPHS = (
+    ("Samples were shipped to M5V", "3L8 for analysis."),
+    ("Samples were shipped to M5V 3L8", "and K9K 9K9."),
+    ("The A1", "1B pair and the B12 12C pair."),
+    ("Each dose was 5 fl", "oz of study drug."),
+    ("Dose of 5 FL OZ", "Study Drug"),
+    ("", "HDL"),
+    ("Results for AE", "SAE and TEAE."),
+    ("Visit 12345 in NY", "ON and BC."),
+    ("The X Y Z", "Q"),
+    ("CamelCase jsHTML HbA1c",),
+    ("αβ ΑΒΓ Δ-Ε ΑΕs",),
+    ("AE-", "-AE --- e.g. i.e. a.b.c"),
+)
+
+# Multi-word and mixed-case phrases for the custom include list
+INCLUDE_PHRASES = ("fl oz", "Study Drug", "adverse events were", "TEAE", "M5V", "AE", "oz of")
+
+
+def make_paragraphs(n_tokens, seed, acronyms, terminator="\r"):
+    """
+    Generated paragraphs with EDGE_PARAGRAPHS mixed in, each ending in
+    terminator ('\\r' as Word gives them, or '' as plain strings come).
+    """
+    rng = random.Random(seed)
+    paragraphs = generate_paragraphs(n_tokens, seed=seed, acronyms=acronyms)
+    for group in EDGE_PARAGRAPHS:
+        position = rng.randint(0, len(paragraphs))
+        paragraphs[position:position] = group
+    if rng.random() < 0.5:
+        paragraphs.extend(rng.choice(EDGE_PARAGRAPHS))
+    return [paragraph + terminator for paragraph in paragraphs]
+
+
+def first_difference(expected, actual):
+    """A description of the first difference between two results, or None."""
+    for category in ('likely', 'possible', 'unlikely'):
+        expected_items = list(expected.get(category, {}).items())
+        actual_items = list(actual.get(category, {}).items())
+        for (expected_key, expected_context), (key, context) in zip(expected_items, actual_items):
+            if (expected_key, expected_context) != (key, context):
+                return (f"{category}: expected {expected_key!r}: {expected_context!r}, "
+                        f"got {key!r}: {context!r}")
+        if len(expected_items) != len(actual_items):
+            return f"{category}: expected {len(expected_items)} entries, got {len(actual_items)}"
+    return None
+
+
+def check(sizes, seeds, log=print):
+    """Runs every combination; returns the number of mismatches."""
+    acronyms = load_acronym_list()
+    work_dir = tempfile.mkdtemp(prefix="doc_companion_check_")
+    failures = 0
+    try:
+        for include_phrases in ((), INCLUDE_PHRASES):
+            # One folder per include list: the scan reads the lists next to
+            # the user definitions
+            config_dir = os.path.join(work_dir, "include" if include_phrases else "default")
+            os.makedirs(config_dir)
+            base_definition_path = os.path.join(config_dir, "base_acronym_list.txt")
+            user_definition_path = os.path.join(config_dir, "user_acronyms.txt")
+            exclude_path = os.path.join(config_dir, "user_exclude.txt")
+            include_path = os.path.join(config_dir, "user_include.txt")
+            shutil.copyfile(ACRONYM_LIST_PATH, base_definition_path)
+            open(user_definition_path, "w", encoding="utf-8").close()
+            if include_phrases:
+                with open(include_path, "w", encoding="utf-8") as f:
+                    f.write("# Test phrases\n" + "\n".join(include_phrases) + "\n")
+
+            for n_tokens, seed, terminator in itertools.product(sizes, range(seeds), ("\r", "")):
+                paragraphs = make_paragraphs(n_tokens, seed, acronyms, terminator)
+                expected = reference_find_acronyms(
+                    TextDocumentSource(paragraphs), base_definition_path,
+                    user_definition_path, exclude_path, include_path)
+                actual = find_acronyms(None, base_definition_path, user_definition_path,
+                                       document_source=TextDocumentSource(paragraphs))
+                difference = first_difference(expected, actual)
+                label = (f"{format_size(n_tokens)} seed {seed}"
+                         f"{'' if terminator else ' unterminated'}"
+                         f"{' with include list' if include_phrases else ''}")
+                if difference:
+                    failures += 1
+                    log(f"  MISMATCH {label}: {difference}")
+                else:
+                    counts = ", ".join(f"{len(entries)} {category}"
+                                       for category, entries in actual.items())
+                    log(f"  ok       {label} ({counts})")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.check_acronyms",
+        description="Check the streaming acronym scan against the whole-text reference scan.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help=f"comma-separated token counts (default: {DEFAULT_SIZES})")
+    parser.add_argument("--seeds", type=int, default=DEFAULT_SEEDS,
+                        help=f"documents per size (default: {DEFAULT_SEEDS})")
+    args = parser.parse_args(argv)
+
+    sizes = [parse_size(size) for size in args.sizes.split(",") if size.strip()]
+    failures = check(sizes, args.seeds)
+    if failures:
+        print(f"{failures} result(s) differ from the reference scan.")
+        return 1
+    print("The streaming scan matches the reference scan.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+# benchmarks/corpus.py
+# Synthetic clinical-study-report text for the benchmarks. Acronyms and
+# their definitions come from the bundled acronym list, so the scans see
+# the same mix of defined acronyms, undefined capitals and plain English
+# words they meet in real documents.
+import os
+import random
+import zipfile
+from xml.sax.saxutils import escape
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ACRONYM_LIST_PATH = os.path.join(REPO_DIR, "acronyms", "acronym list.txt")
+
+FILLER_WORDS = (
+    "the patient was randomized to receive study drug or placebo once daily for weeks "
+    "and all subjects who completed the treatment period were included in the analysis "
+    "of safety efficacy population baseline visit dose group mean change from screening "
+    "with no clinically significant findings reported by investigator at each site "
+    "blood samples were collected before and after dosing for assessment of plasma "
+    "concentrations adverse events were coded and summarized by system organ class "
+    "in this study results are presented as median range standard deviation where "
+    "appropriate unless otherwise specified table listing figure appendix section"
+).split()
+
+HEADINGS = (
+    "STUDY DESIGN", "INTRODUCTION", "STUDY OBJECTIVES", "SAFETY EVALUATION",
+    "EFFICACY RESULTS", "DISCUSSION AND CONCLUSIONS", "LIST OF TABLES",
+    "INVESTIGATIONAL PLAN", "STATISTICAL METHODS", "PHARMACOKINETIC RESULTS",
+)
+
+# Words that look like acronyms but aren't in the list
+UNDEFINED_CAPS = ("TEAE", "jsHTML", "QTcF", "HbA1c", "CRF", "eCRF", "SOP", "GCP", "IRB", "PK")
+UNITS = ("mg", "mL", "kg", "fl oz", "mmol/L", "IU", "µg")
+
+
+def load_acronym_list(path=ACRONYM_LIST_PATH):
+    """Returns [(acronym, definition)] from a tab-separated acronym list."""
+    pairs = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if "\t" in line:
+                acronym, definition = line.split("\t", 1)
+                pairs.append((acronym, definition))
+    return pairs
+
+
+def _sentence(rng, acronyms, introduced):
+    words = []
+    for _ in range(rng.randint(8, 25)):
+        roll = rng.random()
+        if roll < 0.06:
+            # A few acronyms are used far more than the rest
+            acronym, definition = acronyms[min(int(rng.paretovariate(1.2)) - 1, len(acronyms) - 1)]
+            if acronym not in introduced:
+                introduced.add(acronym)
+                words.append(f"{definition} ({acronym})")
+            else:
+                words.append(acronym + ("s" if rng.random() < 0.05 else ""))
+        elif roll < 0.075:
+            words.append(rng.choice(UNDEFINED_CAPS))
+        elif roll < 0.10:
+            words.append(f"{rng.randint(1, 500)} {rng.choice(UNITS)}")
+        elif roll < 0.102:
+            # Postal codes and "A1 1B"-style pairs the scan must skip
+            words.append(rng.choice(("M5V 3L8", "A1 1B", "K9K 9K9", "Visit 12345")))
+        else:
+            words.append(rng.choice(FILLER_WORDS))
+    words[0] = words[0][:1].upper() + words[0][1:]
+    return " ".join(words) + "."
+
+
+def generate_paragraphs(n_tokens, seed=0, acronyms=None):
+    """
+    Generates paragraphs totalling about n_tokens whitespace-separated
+    tokens. The same seed always gives the same text.
+    """
+    rng = random.Random(seed)
+    acronyms = list(acronyms or load_acronym_list())
+    rng.shuffle(acronyms)
+    introduced = set()
+    paragraphs = []
+    tokens = 0
+    while tokens < n_tokens:
+        if rng.random() < 0.05:
+            paragraph = rng.choice(HEADINGS)
+        else:
+            paragraph = " ".join(_sentence(rng, acronyms, introduced)
+                                 for _ in range(rng.randint(3, 6)))
+        paragraphs.append(paragraph)
+        tokens += paragraph.count(" ") + 1
+    return paragraphs
+
+
+def generate_replacement_pairs(n_pairs, seed=0, acronyms=None):
+    """
+    Find/replace pairs like the ones kept in the Replace Values Excel files:
+    expand acronyms, fix spellings and swap placeholder tokens.
+    """
+    rng = random.Random(seed)
+    acronyms = list(acronyms or load_acronym_list())
+    pairs = [(acronym, definition) for acronym, definition in acronyms]
+    pairs += [(word, word.upper()) for word in dict.fromkeys(FILLER_WORDS)]
+    pairs += [(f"[[FIELD{i}]]", f"value {i}") for i in range(n_pairs)]
+    rng.shuffle(pairs)
+    return pairs[:n_pairs]
+
+
+_W_NAMESPACE = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+
+
+def write_docx(path, paragraphs, seed=0, comments=0, revisions=0):
+    """
+    Writes paragraphs as a minimal .docx, with comments and tracked
+    insertions/deletions attached to randomly chosen paragraphs.
+    """
+    rng = random.Random(seed)
+    commented = set(rng.sample(range(len(paragraphs)), min(comments, len(paragraphs))))
+    revised = set(rng.sample(range(len(paragraphs)), min(revisions, len(paragraphs))))
+    body = []
+    for i, paragraph in enumerate(paragraphs):
+        run = f'<w:r><w:t xml:space="preserve">{escape(paragraph)}</w:t></w:r>'
+        if i in revised:
+            run = (f'<w:ins w:id="{i}" w:author="Reviewer">{run}</w:ins>'
+                   f'<w:del w:id="{i}" w:author="Reviewer"><w:r><w:delText>old text</w:delText></w:r></w:del>')
+        if i in commented:
+            run = (f'<w:commentRangeStart w:id="{i}"/>{run}<w:commentRangeEnd w:id="{i}"/>'
+                   f'<w:r><w:commentReference w:id="{i}"/></w:r>')
+        body.append(f'<w:p>{run}</w:p>')
+    comment_xml = ''.join(f'<w:comment w:id="{i}" w:author="Reviewer"><w:p><w:r><w:t>Check this.</w:t></w:r></w:p></w:comment>'
+                          for i in sorted(commented))
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as package:
+        package.writestr('[Content_Types].xml', '<Types/>')
+        package.writestr('word/document.xml',
+                         f'<w:document {_W_NAMESPACE}><w:body>{"".join(body)}<w:sectPr/></w:body></w:document>')
+        package.writestr('word/comments.xml', f'<w:comments {_W_NAMESPACE}>{comment_xml}</w:comments>')
+        package.writestr('word/settings.xml', f'<w:settings {_W_NAMESPACE}><w:defaultTabStop w:val="720"/></w:settings>')
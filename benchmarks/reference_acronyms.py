@@ -0,0 +1,109 @@
+# benchmarks/reference_acronyms.py
+# The acronym scan as it was before find_acronyms streamed paragraphs: the
+# whole document is joined into one string, split into one word list and
+# classified word by word. Kept only as the reference check_acronyms
+# compares the streaming scan with; it isn't used by the app. The one
+# intended change since is kept here too: an include phrase's context is
+# centred on the word the phrase starts in (it used to count r'\b\w+\b'
+# words before the phrase, which drifted after hyphenated words).
+import re
+
+from macros.Acronyms import (DEFAULT_EXCLUDE, DEFAULT_INCLUDE, get_context, is_english_word,
+                             load_custom_list)
+from macros.DefinitionStore import get_definition_store
+
+multiple_periods_pattern = re.compile(r'.*\..*\..*')
+postal_code_pattern = re.compile(r'\b[A-Z]\d[A-Z] \d[A-Z]\d\b')
+likely_pattern = re.compile(
+    r'^(?:[A-Z\u0391-\u03A90-9][A-Z\u0391-\u03A90-9-]*[A-Z\u0391-\u03A90-9]|[A-Z\u0391-\u03A90-9]{2,})$')
+possible_pattern = re.compile(
+    r'^(?:[A-Za-z0-9\u03B1-\u03C9]*[A-Z\u0391-\u03A9]{2,}[A-Za-z0-9\u03B1-\u03C9]*)+$')
+consecutive_numbers_pattern = re.compile(r'\d{3,}')
+all_digits_or_hyphens_pattern = re.compile(r'^[\d-]+$')
+
+
+def reference_find_acronyms(document_source, base_definition_path, user_definition_path,
+                            exclude_filepath, include_filepath, context_range=5):
+    """Same result as macros.Acronyms.find_acronyms, computed on the whole text at once."""
+    definition_store = get_definition_store(base_definition_path, user_definition_path)
+    defined_acronyms = definition_store.defined_acronyms()
+    exclude = load_custom_list(exclude_filepath, DEFAULT_EXCLUDE)
+    include = load_custom_list(include_filepath, DEFAULT_INCLUDE)
+
+    text = document_source.get_text()
+    text = postal_code_pattern.sub('', text)
+    word_matches = list(re.finditer(r'\b[\w-]+\b', text))
+    word_list = [m.group() for m in word_matches]
+
+    acronyms = {'likely': {}, 'possible': {}, 'unlikely': {}}
+    prev_word_acronym_index = None
+
+    for i, word in enumerate(word_list):
+        if prev_word_acronym_index is not None and i == prev_word_acronym_index + 1:
+            prev_word_acronym_index = None
+            continue
+        elif i < len(word_list) - 1 and re.match(r'^[A-Z]+\d+$', word) and \
+                re.match(r'^\d+[A-Z]+$', word_list[i + 1]):
+            prev_word_acronym_index = i
+            continue
+
+        if (word in exclude or
+                consecutive_numbers_pattern.search(word) or
+                all_digits_or_hyphens_pattern.match(word) or
+                multiple_periods_pattern.match(word)):
+            continue
+
+        if word[-1].isdigit() and word[:-1] in defined_acronyms:
+            acronyms['likely'][word[:-1]] = get_context(i, word_list, context_range)
+        elif word[-1].lower() == "s" and word[:-1] in defined_acronyms:
+            acronyms['likely'][word[:-1]] = get_context(i, word_list, context_range)
+        elif word in defined_acronyms:
+            acronyms['likely'][word] = get_context(i, word_list, context_range)
+        elif likely_pattern.match(word):
+            if len(word) <= 3 or not is_english_word(word.lower()):
+                acronyms['likely'][word] = get_context(i, word_list, context_range)
+            else:
+                acronyms['unlikely'][word] = get_context(i, word_list, context_range)
+        elif possible_pattern.match(word) and not is_english_word(word.lower()):
+            acronyms['possible'][word] = get_context(i, word_list, context_range)
+
+        if len(word) in {1, 2} and word.isupper() and 0 < i < len(word_list) - 1:
+            if word_list[i - 1][0].isupper() and word_list[i + 1][0].isupper():
+                for category in acronyms:
+                    acronyms[category].pop(word, None)
+
+    likely_definitions = definition_store.get_many(acronyms['likely'])
+    for acronym in list(acronyms['likely']):
+        if likely_definitions[acronym] == "":
+            acronyms['possible'][acronym] = acronyms['likely'].pop(acronym)
+
+    lowered = text.lower()
+    for phrase_to_include in include:
+        if phrase_to_include.lower() not in lowered:
+            continue
+        char_index = _original_offset(text, lowered, lowered.index(phrase_to_include.lower()))
+        # The first word ending after the phrase starts
+        word_index = sum(1 for m in word_matches if m.end() <= char_index)
+        context_value = get_context(word_index, word_list, context_range)
+        if phrase_to_include in defined_acronyms:
+            acronyms['possible'].pop(phrase_to_include, None)
+            acronyms['unlikely'].pop(phrase_to_include, None)
+            acronyms['likely'][phrase_to_include] = context_value
+        elif phrase_to_include not in acronyms['likely']:
+            acronyms['unlikely'].pop(phrase_to_include, None)
+            acronyms['possible'][phrase_to_include] = context_value
+
+    return {category: {key: entries[key] for key in sorted(entries)}
+            for category, entries in acronyms.items()}
+
+
+def _original_offset(text, lowered, lowered_index):
+    # Lowercasing can change the length (e.g. 'İ'); map the offset back
+    if len(lowered) == len(text):
+        return lowered_index
+    length = 0
+    for index, ch in enumerate(text):
+        length += len(ch.lower())
+        if length > lowered_index:
+            return index
+    return len(text)
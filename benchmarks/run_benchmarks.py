@@ -0,0 +1,305 @@
+# benchmarks/run_benchmarks.py
+# Times the acronym, replace and clean engines on synthetic documents,
+# driven through the fake Word objects in macros/FakeWord.py or, for the
+# .docx Clean & Protect, on generated .docx files (no Word or Windows
+# needed). Results are written as JSON and can be compared with a stored
+# baseline:
+#
+#   python -m benchmarks.run_benchmarks                    # 10k, 100k, 1M tokens
+#   python -m benchmarks.run_benchmarks --sizes 10k,5M     # any sizes
+#   python -m benchmarks.run_benchmarks --save-baseline    # store as the baseline
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.corpus import (ACRONYM_LIST_PATH, generate_paragraphs,
+                               generate_replacement_pairs, load_acronym_list, write_docx)
+from macros.Acronyms import DEFAULT_INCLUDE, find_acronyms
+from macros.CleanDocument import process_word_document
+from macros.CleanDocx import clean_docx
+from macros.DefinitionStore import DefinitionStore
+from macros.FakeWord import FakeDocument, FakeWordApplication
+from macros.PhraseMatcher import PhraseMatcher
+from macros.ReplaceValues_Selection import Macro_ReplaceValues_Selection
+from macros.ReplacementTable import ReplacementTable
+from macros.ScanProfile import ScanProfile
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE_PATH = os.path.join(BENCHMARKS_DIR, "baseline.json")
+DEFAULT_SIZES = "10k,100k,1M"
+RESULTS_VERSION = 1
+
+
+def parse_size(text):
+    """'10k' -> 10000, '5M' -> 5000000."""
+    text = text.strip().lower()
+    multiplier = 1
+    if text.endswith("k"):
+        multiplier, text = 1000, text[:-1]
+    elif text.endswith("m"):
+        multiplier, text = 1000000, text[:-1]
+    return int(float(text) * multiplier)
+
+
+def format_size(n_tokens):
+    if n_tokens >= 1000000 and n_tokens % 1000000 == 0:
+        return f"{n_tokens // 1000000}M"
+    if n_tokens >= 1000 and n_tokens % 1000 == 0:
+        return f"{n_tokens // 1000}k"
+    return str(n_tokens)
+
+
+def measure(setup, run, repeat):
+    """
+    Calls setup() then times run(state), repeat times. run may return a
+    dict of extra numbers (counts, COM calls) to keep with the timing.
+    """
+    times = []
+    info = {}
+    for _ in range(repeat):
+        state = setup()
+        start = time.perf_counter()
+        info = run(state) or {}
+        times.append(time.perf_counter() - start)
+    return {
+        "seconds": min(times),
+        "median_seconds": statistics.median(times),
+        "first_seconds": times[0],
+        "repeat": repeat,
+        **info,
+    }
+
+
+class BenchmarkContext:
+    """Definition files in a scratch folder, shared by every benchmark."""
+
+    def __init__(self, trace_dir=None):
+        self.trace_dir = trace_dir  # Where to write per-stage Chrome traces, if anywhere
+        self.size_label = ""        # Size of the corpus being benchmarked, e.g. '100k'
+        self.work_dir = tempfile.mkdtemp(prefix="doc_companion_bench_")
+        self.base_definition_path = os.path.join(self.work_dir, "base_acronym_list.txt")
+        self.user_definition_path = os.path.join(self.work_dir, "user_acronyms.txt")
+        shutil.copyfile(ACRONYM_LIST_PATH, self.base_definition_path)
+        open(self.user_definition_path, "w", encoding="utf-8").close()
+        self.acronyms = load_acronym_list()
+
+    def close(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+
+def bench_find_acronyms(ctx, paragraphs, repeat):
+    def setup():
+        return FakeWordApplication([FakeDocument.from_paragraphs(paragraphs)])
+
+    def run(word_app):
+        result = find_acronyms(word_app, ctx.base_definition_path, ctx.user_definition_path)
+        info = {category: len(entries) for category, entries in result.items()}
+        info["com_calls"] = word_app.com_calls
+        return info
+    result = measure(setup, run, repeat)
+
+    if ctx.trace_dir:
+        # One more, untimed run with per-stage timing and memory
+        profile = ScanProfile(trace_memory=True)
+        find_acronyms(setup(), ctx.base_definition_path, ctx.user_definition_path, profile=profile)
+        os.makedirs(ctx.trace_dir, exist_ok=True)
+        profile.export_chrome_trace(os.path.join(
+            ctx.trace_dir, f"find_acronyms_{ctx.size_label}.trace.json"))
+        result["stages"] = profile.as_dict()["stages"]
+    return result
+
+
+def bench_include_scan(ctx, paragraphs, repeat):
+    # Definitions as include phrases: a long phrase list, as some users keep
+    phrases = sorted({definition.lower() for _, definition in ctx.acronyms} | set(DEFAULT_INCLUDE))
+    text = " ".join(paragraphs).lower()
+
+    def run(_):
+        matches = PhraseMatcher(phrases).find_all(text)
+        return {"phrases": len(phrases), "matches": len(matches)}
+    return measure(lambda: None, run, repeat)
+
+
+def bench_definition_lookup(ctx, paragraphs, repeat):
+    # A cold load of both files, then one lookup per word of the document
+    words = " ".join(paragraphs).split()
+
+    def run(_):
+        store = DefinitionStore(ctx.base_definition_path, ctx.user_definition_path)
+        definitions = store.get_many(words)
+        found = sum(1 for word in words if store.get(word))
+        return {"lookups": len(words) + len(definitions), "defined": found}
+    return measure(lambda: None, run, repeat)
+
+
+def bench_replace_values(ctx, paragraphs, repeat, n_pairs=200):
+    pairs = generate_replacement_pairs(n_pairs, acronyms=ctx.acronyms)
+    text = "\r".join(paragraphs)
+    table = ReplacementTable(pairs)
+
+    def setup():
+        macro = Macro_ReplaceValues_Selection(word_app=FakeWordApplication(selection=text))
+        macro.table = table
+        return macro
+
+    def run(macro):
+        error = macro.replace_values(use_wildcards=False)
+        if error is not None:
+            raise RuntimeError(error)
+        return {"pairs": len(pairs), "replacements": macro.replacement_count,
+                "com_calls": macro.word_app.com_calls}
+    return measure(setup, run, repeat)
+
+
+def bench_clean_document(ctx, paragraphs, repeat):
+    path = os.path.join(ctx.work_dir, "Report 2024.01.31.docx")
+    open(path, "wb").close()  # process_word_document checks that the file exists
+
+    def setup():
+        doc = FakeDocument.from_paragraphs(paragraphs, name=os.path.basename(path),
+                                           path=ctx.work_dir, comments=50, revisions=200, fields=20)
+        return FakeWordApplication(files={path: doc})
+
+    def run(word_app):
+        success, messages = process_word_document(path, word_app=word_app)
+        if not success:
+            raise RuntimeError("\n".join(messages))
+        return {"com_calls": word_app.com_calls}
+    return measure(setup, run, repeat)
+
+
+def bench_clean_docx(ctx, paragraphs, repeat):
+    path = os.path.join(ctx.work_dir, "Report 2024.01.31.docx")
+    write_docx(path, paragraphs, comments=50, revisions=200)
+
+    def run(_):
+        success, messages = clean_docx(path)
+        if not success:
+            raise RuntimeError("\n".join(messages))
+        return {"bytes": os.path.getsize(path)}
+    return measure(lambda: None, run, repeat)
+
+
+# name -> function(ctx, paragraphs, repeat)
+BENCHMARKS = {
+    "find_acronyms": bench_find_acronyms,
+    "include_scan": bench_include_scan,
+    "definition_lookup": bench_definition_lookup,
+    "replace_values": bench_replace_values,
+    "clean_document": bench_clean_document,
+    "clean_docx": bench_clean_docx,
+}
+
+
+def default_repeat(name, n_tokens):
+    return 3 if n_tokens <= 1000000 else 1
+
+
+def run_benchmarks(sizes, names=None, repeat=None, seed=0, trace_dir=None, log=print):
+    """Runs the benchmarks for every size. Returns {"name/size": result}."""
+    ctx = BenchmarkContext(trace_dir)
+    results = {}
+    try:
+        for n_tokens in sizes:
+            ctx.size_label = format_size(n_tokens)
+            start = time.perf_counter()
+            paragraphs = generate_paragraphs(n_tokens, seed=seed, acronyms=ctx.acronyms)
+            log(f"Generated {format_size(n_tokens)} tokens ({len(paragraphs)} paragraphs) "
+                f"in {time.perf_counter() - start:.2f} s")
+            for name, bench in BENCHMARKS.items():
+                if names and name not in names:
+                    continue
+                key = f"{name}/{format_size(n_tokens)}"
+                result = bench(ctx, paragraphs, repeat or default_repeat(name, n_tokens))
+                result["tokens"] = n_tokens
+                result["tokens_per_second"] = round(n_tokens / result["seconds"]) if result["seconds"] else None
+                results[key] = result
+                log(f"  {key:<32} {result['seconds']:9.4f} s")
+    finally:
+        ctx.close()
+    return results
+
+
+def make_report(results):
+    return {
+        "version": RESULTS_VERSION,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+
+
+def compare_with_baseline(results, baseline, threshold=0.2):
+    """
+    Returns [(name, baseline seconds, seconds, ratio, status)] for every
+    benchmark in both runs; status is 'slower', 'faster' or 'same' using
+    threshold as the allowed relative change.
+    """
+    rows = []
+    for name, result in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base or not base.get("seconds"):
+            continue
+        ratio = result["seconds"] / base["seconds"]
+        if ratio > 1 + threshold:
+            status = "slower"
+        elif ratio < 1 / (1 + threshold):
+            status = "faster"
+        else:
+            status = "same"
+        rows.append((name, base["seconds"], result["seconds"], ratio, status))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run_benchmarks",
+                                     description="Benchmark the Doc_Companion engines.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help=f"comma-separated document sizes in tokens (default: {DEFAULT_SIZES})")
+    parser.add_argument("--only", help="comma-separated benchmark names: " + ", ".join(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, help="runs per benchmark (best time is kept)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--trace-dir", help="also write a per-stage Chrome trace of each acronym scan here")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON results file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH, help="baseline JSON to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="relative slowdown reported as a regression (default: 0.2)")
+    args = parser.parse_args(argv)
+
+    sizes = [parse_size(size) for size in args.sizes.split(",") if size.strip()]
+    names = set(args.only.split(",")) if args.only else None
+    report = make_report(run_benchmarks(sizes, names, args.repeat, args.seed, args.trace_dir))
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to: {args.output}")
+
+    exit_code = 0
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to: {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"\nCompared with baseline from {baseline.get('timestamp', '?')}:")
+        for name, base_seconds, seconds, ratio, status in compare_with_baseline(
+                report["results"], baseline, args.threshold):
+            print(f"  {name:<32} {base_seconds:9.4f} s -> {seconds:9.4f} s  x{ratio:5.2f}  {status}")
+            if status == "slower":
+                exit_code = 1
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
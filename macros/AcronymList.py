@@ -0,0 +1,160 @@
+# macros/AcronymList.py
+# Lightweight helpers for the online base acronym list.
+# Kept free of heavy imports so the main window can use them at startup;
+# 'requests' is only imported when a download actually happens.
+import json
+import os
+import threading
+import time
+
+ACRONYM_LIST_URL = (
+    "https://raw.githubusercontent.com/IIDelta/Doc_Companion/"
+    "main/acronyms/acronym%20list.txt"
+)
+
+# How long a downloaded list is used without asking the server again, in
+# seconds. Can be overridden with the DOC_COMPANION_ACRONYM_LIST_TTL
+# environment variable (0 checks on every use).
+ACRONYM_LIST_TTL = 24 * 60 * 60
+
+# Only one refresh talks to the server at a time; a scan that starts while
+# the startup prefetch is running waits for it and then uses its result
+_refresh_lock = threading.Lock()
+
+
+def get_doc_companion_dir():
+    return os.path.join(os.path.expanduser("~"), ".doc_companion")
+
+
+def get_base_acronym_cache_path():
+    return os.path.join(get_doc_companion_dir(), "base_acronym_list.txt")
+
+
+def get_acronym_list_ttl():
+    value = os.environ.get("DOC_COMPANION_ACRONYM_LIST_TTL")
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            print(f"Warning: Ignoring invalid DOC_COMPANION_ACRONYM_LIST_TTL: {value!r}")
+    return ACRONYM_LIST_TTL
+
+
+def _metadata_path(base_cache_path):
+    return base_cache_path + ".meta.json"
+
+
+def _load_metadata(base_cache_path):
+    """ETag, Last-Modified and time of the last check of the cached list."""
+    try:
+        with open(_metadata_path(base_cache_path), "r", encoding="utf-8") as f:
+            metadata = json.load(f)
+        return metadata if isinstance(metadata, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_atomic(path, data):
+    # Written next to the target and renamed over it, so a reader (or a
+    # crash) never sees a half-written file
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _save_metadata(base_cache_path, metadata):
+    _write_atomic(_metadata_path(base_cache_path), json.dumps(metadata).encode("utf-8"))
+
+
+def is_acronym_list_fresh(base_cache_path, ttl=None):
+    """True if the cached list was checked against the server within ttl seconds."""
+    if ttl is None:
+        ttl = get_acronym_list_ttl()
+    if not os.path.exists(base_cache_path):
+        return False
+    checked_at = _load_metadata(base_cache_path).get("checked_at")
+    if not isinstance(checked_at, (int, float)):
+        return False
+    return 0 <= time.time() - checked_at < ttl
+
+
+def fetch_acronym_list_online(url, base_cache_path, ttl=None, force=False, timeout=10):
+    """
+    Returns the path of an up-to-date copy of the acronym list.
+
+    A cached copy checked within ttl seconds is used as is, without any
+    network access. Otherwise the server is asked for the list with the
+    cached ETag/Last-Modified, so an unchanged list isn't downloaded again,
+    and a new list is written to base_cache_path atomically. force skips
+    the ttl check. On failure, if a cached base file exists, return that;
+    otherwise, raise an exception.
+    """
+    if not force and is_acronym_list_fresh(base_cache_path, ttl):
+        return base_cache_path
+    with _refresh_lock:
+        # Another thread may have refreshed it while this one waited
+        if not force and is_acronym_list_fresh(base_cache_path, ttl):
+            return base_cache_path
+        try:
+            return _refresh_acronym_list(url, base_cache_path, timeout)
+        except Exception as e:
+            print(f"Failed to fetch base acronym list online: {e}")
+            if os.path.exists(base_cache_path):
+                print(f"Using cached base acronym list: {base_cache_path}")
+                return base_cache_path
+            else:
+                raise Exception(f"Failed to fetch base acronym list and no cache available: {e}")
+
+
+def _refresh_acronym_list(url, base_cache_path, timeout):
+    import requests
+
+    metadata = _load_metadata(base_cache_path) if os.path.exists(base_cache_path) else {}
+    headers = {"Accept-Encoding": "gzip, deflate"}
+    if metadata.get("url") == url:
+        if metadata.get("etag"):
+            headers["If-None-Match"] = metadata["etag"]
+        if metadata.get("last_modified"):
+            headers["If-Modified-Since"] = metadata["last_modified"]
+
+    response = requests.get(url, headers=headers, timeout=timeout)
+    if response.status_code == 304:
+        metadata["checked_at"] = time.time()
+        _save_metadata(base_cache_path, metadata)
+        print(f"Base acronym list is up to date: {base_cache_path}")
+        return base_cache_path
+    response.raise_for_status()
+
+    os.makedirs(os.path.dirname(base_cache_path), exist_ok=True)
+    # response.content is already decompressed if the server sent gzip
+    _write_atomic(base_cache_path, response.content)
+    _save_metadata(base_cache_path, {
+        "url": url,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "checked_at": time.time(),
+    })
+    print(f"Fetched base acronym list to: {base_cache_path}")
+    return base_cache_path
+
+
+def refresh_acronym_list_in_background(url, base_cache_path, ttl=None):
+    """
+    Runs fetch_acronym_list_online on a daemon thread (e.g. at startup, so
+    the window doesn't wait on the network). Returns the thread.
+    """
+    def refresh():
+        try:
+            fetch_acronym_list_online(url, base_cache_path, ttl)
+        except Exception as e:
+            print(f"Background refresh of the acronym list failed: {e}")
+
+    thread = threading.Thread(target=refresh, name="acronym-list-refresh", daemon=True)
+    thread.start()
+    return thread
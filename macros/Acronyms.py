@@ -1,180 +1,760 @@
 import os
-from nltk.corpus import wordnet
 import re
+import bisect
+import time
+from array import array
+from collections import deque, namedtuple
+from .DefinitionStore import get_definition_store
+from .EnglishLexicon import get_english_lexicon
+from .DocumentSource import get_document_source
+from .PhraseMatcher import get_phrase_matcher
+from .ScanCache import get_scan_cache, scan_fingerprint, segment_key
+from .ScanProfile import NULL_PROFILE, current_profile
 
+# Default exclusion list
+DEFAULT_EXCLUDE = {
+    'ON', 'BC', 'MB', 'NB', 'NL', 'NS', 'NT', 'NU',
+    'PE', 'QC', 'SK', 'YT', 'AL', 'AK', 'AZ', 'AR', 'CA',
+    'CO', 'CT', 'DE', 'FL', 'GA', 'HI', 'ID', 'IL', 'IN',
+    'IA', 'KS', 'KY', 'LA', 'ME', 'MD', 'MA', 'MI',
+    'MN', 'MS', 'MO', 'MT', 'NE', 'NV', 'NH', 'NJ', 'NM',
+    'NY', 'NC', 'ND', 'OH', 'OK', 'OR', 'PA', 'RI',
+    'SC', 'SD', 'TN', 'TX', 'UT', 'VT', 'VA', 'WA', 'WV',
+    'WI', 'WY', 'Jan', 'Feb', 'Mar', 'Apr', 'May',
+    'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec', 'MM',
+    'DD', 'YYYY', "MMM"
+}
 
-def find_acronyms(word_app, base_definition_path, user_definition_path, context_range=5):
+# Default inclusion list
+DEFAULT_INCLUDE = {'fl oz'}
+
+# Seconds between progress_callback calls during a scan
+PROGRESS_INTERVAL = 0.1
+
+# Predefined patterns
+multiple_periods_pattern = re.compile(r'.*\..*\..*')
+postal_code_pattern = re.compile(r'\b[A-Z]\d[A-Z] \d[A-Z]\d\b')
+word_pattern = re.compile(r'\b[\w-]+\b')
+
+# Pattern for likely acronyms:
+# - At least two characters.
+# - Primarily uppercase Latin or Greek letters, and numbers.
+# - Can contain hyphens but not start or end with them.
+# - Not solely numbers or hyphens
+# (partially covered by all_digits_or_hyphens_pattern but reinforced).
+likely_pattern = re.compile(
+    r'^(?:[A-Z\u0391-\u03A90-9][A-Z\u0391-\u03A90-9-]*[A-Z\u0391-\u03A90-9]|[A-Z\u0391-\u03A90-9]{2,})$')
+
+# Pattern for possible acronyms:
+# - Words containing at least one sequence of two or more uppercase Latin or Greek letters.
+# - Can be mixed case (e.g., jsHTML, ReqEx).
+possible_pattern = re.compile(
+    r'^(?:[A-Za-z0-9\u03B1-\u03C9]*[A-Z\u0391-\u03A9]{2,}[A-Za-z0-9\u03B1-\u03C9]*)+$')
+
+# Pattern for unlikely acronyms:
+# - Words that start with a capital letter followed by lowercase/numbers,
+#   and may have subsequent capitals followed by lowercase/numbers (e.g., "CamelCase", "Titlecase").
+# - These are often regular capitalized words; is_english_word check is important.
+unlikely_pattern = re.compile(
+    r'^[A-Z\u0391-\u03A9][a-z\u03B1-\u03C90-9]+(?:[A-Z\u0391-\u03A9][a-z\u03B1-\u03C90-9]+)*$')
+
+consecutive_numbers_pattern = re.compile(r'\d{3,}')
+all_digits_or_hyphens_pattern = re.compile(r'^[\d-]+$')
+
+# "A1 1B"-style pairs: the first half is skipped together with the next word
+letters_then_digits_pattern = re.compile(r'^[A-Z]+\d+$')
+digits_then_letters_pattern = re.compile(r'^\d+[A-Z]+$')
+
+# A postal code could only straddle two paragraphs joined by ' ' if the
+# first ends like "A1B" and the next starts like "2C3".
+_postal_tail_pattern = re.compile(r'[A-Z]\d[A-Z]$')
+_postal_head_pattern = re.compile(r'\d[A-Z]\d')
+
+
+class ScanCancelled(Exception):
+    """Raised by scan_acronyms when its cancel_check returns True."""
+
+
+def find_acronyms(word_app, base_definition_path, user_definition_path, context_range=5,
+                  document_source=None, incremental=False, profile=None,
+                  progress_callback=None, cancel_check=None):
+    """Returns {'likely': {acronym: context}, 'possible': ..., 'unlikely': ...}.
+       See scan_acronyms for the occurrence details behind each entry.
+    """
+    scan = scan_acronyms(word_app, base_definition_path, user_definition_path,
+                         context_range, document_source, incremental, profile,
+                         progress_callback, cancel_check)
+    return {category: {key: entry.context for key, entry in entries.items()}
+            for category, entries in scan.items()}
+
+
+def scan_acronyms(word_app, base_definition_path, user_definition_path, context_range=5,
+                  document_source=None, incremental=False, profile=None,
+                  progress_callback=None, cancel_check=None):
+    """Like find_acronyms, but each acronym maps to an AcronymEntry with its
+       usage count, first/last positions and a context built on demand.
+    """
+    # document_source: optional DocumentSource supplying the paragraphs.
+    # Defaults to a bulk read of the active document's story ranges.
+    # incremental: reuse the per-paragraph results of the last scan of the
+    # same document (see ScanCache), so only changed paragraphs are re-read.
+    # profile: optional ScanProfile that receives the time (and memory)
+    # spent in each stage of the scan.
+    # progress_callback(paragraphs, words, new_acronyms): called about every
+    # PROGRESS_INTERVAL seconds; new_acronyms is {category: {acronym: context}}
+    # for acronyms first seen since the last call, in a provisional category.
+    # cancel_check(): polled after every paragraph; when it returns True the
+    # scan stops and raises ScanCancelled.
+    profile = profile or NULL_PROFILE
+    with profile.activate():
+        return _scan_acronyms(word_app, base_definition_path, user_definition_path,
+                              context_range, document_source, incremental, profile,
+                              progress_callback, cancel_check)
+
+
+def _scan_acronyms(word_app, base_definition_path, user_definition_path, context_range,
+                   document_source, incremental, profile, progress_callback, cancel_check):
     # Determine base path for custom lists.
     # Uses the directory of the main definition_path for custom user lists.
     # The main definition_path is cached at:
     # os.path.join(os.path.expanduser("~"), ".doc_companion", "acronym_list.txt")
     # So, user_exclude.txt and user_include.txt should be placed in ~/.doc_companion/
     user_config_dir = os.path.dirname(user_definition_path)
-    base_defs_map = _load_definitions_from_file(base_definition_path)
-    user_defs_map = _load_definitions_from_file(user_definition_path)
-    combined_defs_map = {**base_defs_map, **user_defs_map}
-    defined_acronyms = set(combined_defs_map.keys()) # This set is used for 'word in defined_acronyms' checks
-    exclude_filepath = os.path.join(user_config_dir, "user_exclude.txt")
-    include_filepath = os.path.join(user_config_dir, "user_include.txt")
-
-    # Default exclusion list
-    DEFAULT_EXCLUDE = {
-        'ON', 'BC', 'MB', 'NB', 'NL', 'NS', 'NT', 'NU',
-        'PE', 'QC', 'SK', 'YT', 'AL', 'AK', 'AZ', 'AR', 'CA',
-        'CO', 'CT', 'DE', 'FL', 'GA', 'HI', 'ID', 'IL', 'IN',
-        'IA', 'KS', 'KY', 'LA', 'ME', 'MD', 'MA', 'MI',
-        'MN', 'MS', 'MO', 'MT', 'NE', 'NV', 'NH', 'NJ', 'NM',
-        'NY', 'NC', 'ND', 'OH', 'OK', 'OR', 'PA', 'RI',
-        'SC', 'SD', 'TN', 'TX', 'UT', 'VT', 'VA', 'WA', 'WV',
-        'WI', 'WY', 'Jan', 'Feb', 'Mar', 'Apr', 'May',
-        'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec', 'MM',
-        'DD', 'YYYY', "MMM"
-    }
-
-    # Default inclusion list
-    DEFAULT_INCLUDE = {'fl oz'}
-
-    # Load exclusion and inclusion lists
-    exclude = load_custom_list(exclude_filepath, DEFAULT_EXCLUDE)
-    include = load_custom_list(include_filepath, DEFAULT_INCLUDE)
-
-    # Predefined patterns (ensure these pattern definitions follow)
-    multiple_periods_pattern = re.compile(r'.*\..*\..*')
-    postal_code_pattern = re.compile(r'\b[A-Z]\d[A-Z] \d[A-Z]\d\b')
-
-    # Pattern for likely acronyms:
-    # - At least two characters.
-    # - Primarily uppercase Latin or Greek letters, and numbers.
-    # - Can contain hyphens but not start or end with them.
-    # - Not solely numbers or hyphens
-    # (partially covered by all_digits_or_hyphens_pattern but reinforced).
-    likely_pattern = re.compile(
-        r'^(?:[A-Z\u0391-\u03A90-9][A-Z\u0391-\u03A90-9-]*[A-Z\u0391-\u03A90-9]|[A-Z\u0391-\u03A90-9]{2,})$')
-
-    # Pattern for possible acronyms:
-    # - Words containing at least one sequence of two or more uppercase Latin or Greek letters.
-    # - Can be mixed case (e.g., jsHTML, ReqEx).
-    possible_pattern = re.compile(
-        r'^(?:[A-Za-z0-9\u03B1-\u03C9]*[A-Z\u0391-\u03A9]{2,}[A-Za-z0-9\u03B1-\u03C9]*)+$')
-
-    # Pattern for unlikely acronyms:
-    # - Words that start with a capital letter followed by lowercase/numbers,
-    #   and may have subsequent capitals followed by lowercase/numbers (e.g., "CamelCase", "Titlecase").
-    # - These are often regular capitalized words; is_english_word check is important.
-    unlikely_pattern = re.compile(
-        r'^[A-Z\u0391-\u03A9][a-z\u03B1-\u03C90-9]+(?:[A-Z\u0391-\u03A9][a-z\u03B1-\u03C90-9]+)*$')
-
-    consecutive_numbers_pattern = re.compile(r'\d{3,}')
-    all_digits_or_hyphens_pattern = re.compile(r'^[\d-]+$')
-    doc = word_app.ActiveDocument
-    text = ' '.join([p.Range.Text for p in doc.Paragraphs])
-    text = postal_code_pattern.sub('', text)
-    word_list = re.findall(r'\b[\w-]+\b', text)
-
-    acronyms = {'likely': {}, 'possible': {}, 'unlikely': {}}
-    prev_word_acronym_index = None
-
-    for i, word in enumerate(word_list):
-        if prev_word_acronym_index\
-         is not None and i == prev_word_acronym_index + 1:
-            prev_word_acronym_index = None
-            continue
-        elif i < len(word_list) - 1 and re.match(r'^[A-Z]+\d+$', word) and\
-                re.match(r'^\d+[A-Z]+$', word_list[i + 1]):
-            prev_word_acronym_index = i
-            continue
-
-        if (word in exclude or
-                consecutive_numbers_pattern.search(word) or
-                all_digits_or_hyphens_pattern.match(word) or
-                multiple_periods_pattern.match(word)):
-            continue
+    with profile.stage("load lists"):
+        definition_store = get_definition_store(base_definition_path, user_definition_path)
+        defined_acronyms = definition_store.defined_acronyms() # This set is used for 'word in defined_acronyms' checks
+        exclude_filepath = os.path.join(user_config_dir, "user_exclude.txt")
+        include_filepath = os.path.join(user_config_dir, "user_include.txt")
 
-# Core categorization logic:
-        # Priority 1: Defined acronyms (and their common variations)
-        if word[-1].isdigit() and word[:-1] in defined_acronyms:
-            acronyms.setdefault('likely', {})[word[:-1]] = get_context(i, word_list, context_range)
-        elif word[-1].lower() == "s" and word[:-1] in defined_acronyms:
-            acronyms.setdefault('likely', {})[word[:-1]] = get_context(i, word_list, context_range)
-        elif word in defined_acronyms:
-            acronyms.setdefault('likely', {})[word] = get_context(i, word_list, context_range)
-        
-        # Priority 2: Words not in defined_acronyms, evaluated by patterns and English word check.
-        elif likely_pattern.match(word): # Matches all-caps or similar acronym structure
-            if len(word) <= 3:
-                # Short words (e.g., "HDL", "CBS") matching likely_pattern are usually acronyms.
-                # Classify as 'likely' even if their lowercase form might be an English word.
-                acronyms.setdefault('likely', {})[word] = get_context(i, word_list, context_range)
-            elif not is_english_word(word.lower()):
-                # Longer words (e.g., "TEAE") matching likely_pattern and NOT English words.
-                acronyms.setdefault('likely', {})[word] = get_context(i, word_list, context_range)
-            else:
-                # Longer words (e.g., "AGAINST", "INTRODUCTION") matching likely_pattern AND ARE English words.
-                # These often come from headings or emphasized text.
-                acronyms.setdefault('unlikely', {})[word] = get_context(i, word_list, context_range)
-        
-        elif possible_pattern.match(word) and not is_english_word(word.lower()):
-            # Mixed-case with prominent caps (e.g., "ReactComponent", "jsHTML") AND is NOT an English word.
-            acronyms.setdefault('possible', {})[word] = get_context(i, word_list, context_range)
-        
-            # Note: The following block has been removed based on your request:
-            # elif unlikely_pattern.match(word) and not is_english_word(word.lower()):
-            #     acronyms.setdefault('unlikely', {})[word] = get_context(i, word_list, context_range)
-            
-            # Note: If a word matches no condition above, it's simply skipped.
-        if len(word) in {1, 2} and word.isupper() and\
-                i > 0 and i < len(word_list) - 1:
-            if word_list[i - 1][0].isupper() and word_list[i + 1][0].isupper():
-                for category in acronyms:
-                    if word in acronyms[category]:
-                        del acronyms[category][word]
+        # Load exclusion and inclusion lists
+        exclude = load_custom_list(exclude_filepath, DEFAULT_EXCLUDE)
+        include = load_custom_list(include_filepath, DEFAULT_INCLUDE)
+        classifier = get_token_classifier(definition_store, exclude)
+
+    if document_source is None:
+        document_source = get_document_source(word_app.ActiveDocument)
 
+    # Paragraphs are streamed through tokenization and classification;
+    # only a small window of tokens is kept in memory at any time.
+    # acronyms maps category -> {key: word index whose context is shown}.
+    scan_cache = None
+    identity = getattr(document_source, 'identity', None)
+    if incremental and identity:
+        with profile.stage("load scan cache"):
+            scan_cache = get_scan_cache(identity, scan_fingerprint([classifier.fingerprint], include))
+    paragraphs = profile.timed_iter("extract text", document_source.iter_paragraphs())
+    if scan_cache is not None:
+        # One scan of a document at a time (e.g. a cancelled scan still winding down)
+        with scan_cache.lock:
+            scan_cache.begin()
+            scan = _scan_paragraphs(paragraphs, classifier, include, context_range, scan_cache,
+                                    profile, progress_callback, cancel_check)
+            with profile.stage("save scan cache"):
+                scan_cache.save()
+    else:
+        scan = _scan_paragraphs(paragraphs, classifier, include, context_range, None,
+                                profile, progress_callback, cancel_check)
+    acronyms = scan.acronyms
+
+    with profile.stage("definition lookups"):
+        likely_definitions = definition_store.get_many(acronyms['likely'])
     for acronym in list(acronyms['likely']):
-        if get_definition(acronym, base_definition_path, user_definition_path) == "":
+        if likely_definitions[acronym] == "":
             # This part of your logic remains if you want to move undefined likely ones to possible
             if acronym in acronyms.get('likely', {}): # Ensure it still exists in likely
                 acronyms.setdefault('possible', {})[acronym] = acronyms['likely'][acronym]
                 del acronyms['likely'][acronym]
 
-# ... (this comes after the main loop that iterates through word_list
+# ... (this comes after the main scan
     #      and also after the loop that moves likely acronyms without definitions to possible)
 
-    for phrase_to_include in include:
-        # Case-insensitive check for the presence of the phrase in the text
-        if phrase_to_include.lower() in text.lower():
-            context_value = "Context not available" # Default context
-            try:
-                # Attempt to find the first occurrence for context (case-insensitive)
-                # This provides an estimated word index for get_context.
-                char_index = text.lower().index(phrase_to_include.lower())
-                # Estimate word index: count words before the char_index.
-                # This is an approximation and works best for phrases starting on word boundaries.
-                estimated_word_index = len(re.findall(r'\b\w+\b', text[:char_index]))
-                context_value = get_context(estimated_word_index, word_list, context_range)
-            except ValueError:
-                # This can happen if text.lower().index fails, though 'in' check passed (e.g. complex unicode)
-                print(f"Warning: Phrase '{phrase_to_include}' found by 'in' but not by index().")
-            except Exception as e:
-                print(f"Warning: Error getting context for included phrase '{phrase_to_include}': {e}")
-
-            # Categorize the included phrase
-            if phrase_to_include in defined_acronyms:
-                # If defined, it's 'likely'. Remove from other categories if miscategorized.
-                if phrase_to_include in acronyms.get('possible', {}): del acronyms['possible'][phrase_to_include]
+    # include_first only holds phrases that occur in the text (case-insensitive)
+    included = set()
+    for phrase_to_include, context_value in scan.include_first.items():
+        # Categorize the included phrase
+        if phrase_to_include in defined_acronyms:
+            # If defined, it's 'likely'. Remove from other categories if miscategorized.
+            if phrase_to_include in acronyms.get('possible', {}): del acronyms['possible'][phrase_to_include]
+            if phrase_to_include in acronyms.get('unlikely', {}): del acronyms['unlikely'][phrase_to_include]
+            acronyms.setdefault('likely', {})[phrase_to_include] = context_value
+            included.add(phrase_to_include)
+        else:
+            # If not defined but in 'include' list, it's considered 'possible'.
+            # Ensure it's not already 'likely' (e.g. from a previous broader match).
+            if phrase_to_include not in acronyms.get('likely', {}):
                 if phrase_to_include in acronyms.get('unlikely', {}): del acronyms['unlikely'][phrase_to_include]
-                acronyms.setdefault('likely', {})[phrase_to_include] = context_value
-            else:
-                # If not defined but in 'include' list, it's considered 'possible'.
-                # Ensure it's not already 'likely' (e.g. from a previous broader match).
-                if phrase_to_include not in acronyms.get('likely', {}):
-                    if phrase_to_include in acronyms.get('unlikely', {}): del acronyms['unlikely'][phrase_to_include]
-                    acronyms.setdefault('possible', {})[phrase_to_include] = context_value
+                acronyms.setdefault('possible', {})[phrase_to_include] = context_value
+                included.add(phrase_to_include)
+
+    result = {}
+    with profile.stage("build results"):
+        for category in ('likely', 'possible', 'unlikely'):
+            entries = {}
+            for key in sorted(acronyms.get(category, {})):
+                if key in included:
+                    occurrences = scan.include_occurrences[key]
+                else:
+                    occurrences = scan.occurrences[key]
+                entries[key] = AcronymEntry(key, acronyms[category][key], occurrences, scan.contexts)
+            result[category] = entries
+    return result
+
+
+class Occurrences:
+    """Word positions of one acronym, collected in a single pass."""
+    __slots__ = ('positions', 'first_word', 'match_case')
+
+    def __init__(self, first_word, match_case=True):
+        self.positions = array('l')
+        self.first_word = first_word  # Word form of the first use, for jumping to it
+        self.match_case = match_case  # Include phrases are matched case-insensitively
+
+
+class AcronymEntry:
+    """One row of the scan result. The context string is only built when read."""
+    __slots__ = ('key', 'context_index', 'occurrences', '_contexts')
+
+    def __init__(self, key, context_index, occurrences, contexts):
+        self.key = key
+        self.context_index = context_index
+        self.occurrences = occurrences
+        self._contexts = contexts
+
+    @property
+    def count(self):
+        return len(self.occurrences.positions)
+
+    @property
+    def first_index(self):
+        return self.occurrences.positions[0]
+
+    @property
+    def last_index(self):
+        return self.occurrences.positions[-1]
+
+    @property
+    def first_word(self):
+        return self.occurrences.first_word
+
+    @property
+    def context(self):
+        return self._contexts.context(self.context_index)
+
+    def __repr__(self):
+        return f"AcronymEntry({self.key!r}, count={self.count})"
+
+
+def classify_word(word, defined_acronyms):
+    """Returns (category, key) for a word that passed the exclusion checks,
+       or None if it is not an acronym candidate.
+    """
+# Core categorization logic:
+    # Priority 1: Defined acronyms (and their common variations)
+    if word[-1].isdigit() and word[:-1] in defined_acronyms:
+        return 'likely', word[:-1]
+    elif word[-1].lower() == "s" and word[:-1] in defined_acronyms:
+        return 'likely', word[:-1]
+    elif word in defined_acronyms:
+        return 'likely', word
+
+    # Priority 2: Words not in defined_acronyms, evaluated by patterns and English word check.
+    elif likely_pattern.match(word): # Matches all-caps or similar acronym structure
+        if len(word) <= 3:
+            # Short words (e.g., "HDL", "CBS") matching likely_pattern are usually acronyms.
+            # Classify as 'likely' even if their lowercase form might be an English word.
+            return 'likely', word
+        elif not is_english_word(word.lower()):
+            # Longer words (e.g., "TEAE") matching likely_pattern and NOT English words.
+            return 'likely', word
+        else:
+            # Longer words (e.g., "AGAINST", "INTRODUCTION") matching likely_pattern AND ARE English words.
+            # These often come from headings or emphasized text.
+            return 'unlikely', word
+
+    elif possible_pattern.match(word) and not is_english_word(word.lower()):
+        # Mixed-case with prominent caps (e.g., "ReactComponent", "jsHTML") AND is NOT an English word.
+        return 'possible', word
+
+        # Note: The following block has been removed based on your request:
+        # elif unlikely_pattern.match(word) and not is_english_word(word.lower()):
+        #     return 'unlikely', word
+
+    # Note: If a word matches no condition above, it's simply skipped.
+    return None
+
+
+def is_excluded_word(word, exclude):
+    return (word in exclude or
+            consecutive_numbers_pattern.search(word) or
+            all_digits_or_hyphens_pattern.match(word) or
+            multiple_periods_pattern.match(word))
+
+
+class WordVerdict:
+    """Everything the scan needs to know about one distinct word."""
+    __slots__ = ('letters_then_digits', 'digits_then_letters', 'excluded',
+                 'category', 'key', 'short_upper', 'candidate')
+
+    def __init__(self, word, defined_acronyms, exclude):
+        self.letters_then_digits = bool(letters_then_digits_pattern.match(word))
+        self.digits_then_letters = bool(digits_then_letters_pattern.match(word))
+        self.excluded = bool(is_excluded_word(word, exclude))
+        verdict = None if self.excluded else classify_word(word, defined_acronyms)
+        self.category, self.key = verdict if verdict is not None else (None, None)
+        # 1-2 letter capitals between two capitalized words are dropped
+        self.short_upper = len(word) in {1, 2} and word.isupper()
+        # Whether visiting this word can change the result at all; the
+        # others only matter as neighbours and are never visited
+        self.candidate = self.letters_then_digits or (
+            not self.excluded and (self.category is not None or self.short_upper))
+
+
+class TokenClassifier:
+    """
+    Classifies each distinct word once and caches the verdict. Clinical
+    documents repeat the same few thousand words many times, so the
+    exclusion checks, patterns and English-word lookups run once per word
+    instead of once per occurrence.
+    """
+
+    MAX_CACHED_WORDS = 200000
+
+    def __init__(self, defined_acronyms, exclude):
+        self.defined_acronyms = frozenset(defined_acronyms)
+        self.exclude = frozenset(exclude)
+        self._verdicts = {}
+        self._fingerprint = None
+
+    @property
+    def fingerprint(self):
+        """Identifies the definitions and exclusions verdicts are based on."""
+        if self._fingerprint is None:
+            self._fingerprint = scan_fingerprint(self.defined_acronyms, self.exclude)
+        return self._fingerprint
+
+    def verdict(self, word):
+        verdict = self._verdicts.get(word)
+        if verdict is None:
+            if len(self._verdicts) >= self.MAX_CACHED_WORDS:
+                self._verdicts.clear()
+            verdict = WordVerdict(word, self.defined_acronyms, self.exclude)
+            self._verdicts[word] = verdict
+        return verdict
+
+
+_classifiers = {}
+
+
+def get_token_classifier(definition_store, exclude):
+    """
+    Returns a TokenClassifier whose verdict cache is reused across scans as
+    long as the definitions and the exclusion list are unchanged.
+    """
+    definition_store.refresh()
+    key = (definition_store.base_definition_path, definition_store.user_definition_path)
+    exclude = frozenset(exclude)
+    cached = _classifiers.get(key)
+    if cached is not None:
+        generation, classifier = cached
+        if generation == definition_store.generation and classifier.exclude == exclude:
+            return classifier
+    classifier = TokenClassifier(definition_store.defined_acronyms(), exclude)
+    _classifiers[key] = (definition_store.generation, classifier)
+    return classifier
+
+
+def iter_scan_segments(paragraphs):
+    """
+    Yields the postal-code-stripped text of each paragraph. Paragraphs are
+    conceptually joined with ' ', so two paragraphs are merged first when a
+    postal code could straddle that join.
+    """
+    pending = None
+    for paragraph in paragraphs:
+        if pending is None:
+            pending = paragraph
+        elif _postal_tail_pattern.search(pending) and _postal_head_pattern.match(paragraph):
+            pending = pending + ' ' + paragraph
+        else:
+            yield postal_code_pattern.sub('', pending)
+            pending = paragraph
+    if pending is not None:
+        yield postal_code_pattern.sub('', pending)
+
+
+class _TokenWindow:
+    """The token stream, addressed by absolute index, with old tokens dropped."""
+
+    def __init__(self):
+        self.tokens = []
+        self.base = 0  # Absolute index of self.tokens[0]
+
+    def __len__(self):
+        return self.base + len(self.tokens)
+
+    def __getitem__(self, index):
+        return self.tokens[index - self.base]
+
+    def extend(self, tokens):
+        self.tokens.extend(tokens)
+
+    def context(self, index, context_range, total=None):
+        # Same slice as get_context(index, word_list, context_range)
+        total = len(self) if total is None else total
+        start = max(0, index - context_range)
+        end = min(total, index + context_range + 1)
+        if start >= end:
+            return ''
+        return ' '.join(self.tokens[start - self.base:end - self.base])
 
-    return {
-        'likely': {key: acronyms.get('likely', {}).get(key) for key in sorted(acronyms.get('likely', {}))},
-        'possible': {key: acronyms.get('possible', {}).get(key) for key in sorted(acronyms.get('possible', {}))},
-        'unlikely': {key: acronyms.get('unlikely', {}).get(key) for key in sorted(acronyms.get('unlikely', {}))},
-    }
+    def can_forget_before(self, index):
+        drop = index - self.base
+        # Trim in large steps so the list isn't shifted for every token
+        return drop > 4096 and drop * 2 > len(self.tokens)
+
+    def forget_before(self, index):
+        del self.tokens[:index - self.base]
+        self.base = index
+
+
+class _ContextStore:
+    """
+    Builds context strings on demand. Before the token window drops words
+    that a still-referenced context needs, those words are snapshotted.
+    """
+
+    def __init__(self, window, context_range):
+        self.window = window
+        self.context_range = context_range
+        self.snapshots = {}  # word index -> tuple of context words
+        self.total = None    # Word count, once the scan has finished
+
+    def snapshot(self, indices, keep_from):
+        """Keeps the words around every index in indices that keep_from would cut."""
+        window = self.window
+        snapshots = {}
+        for index in indices:
+            if index in self.snapshots:
+                snapshots[index] = self.snapshots[index]
+            elif index - self.context_range < keep_from:
+                start = max(0, index - self.context_range)
+                end = min(len(window), index + self.context_range + 1)
+                snapshots[index] = tuple(window.tokens[start - window.base:end - window.base])
+        self.snapshots = snapshots
+
+    def context(self, index):
+        # Same text as get_context(index, word_list, context_range)
+        words = self.snapshots.get(index)
+        if words is not None:
+            return ' '.join(words)
+        return self.window.context(index, self.context_range, self.total)
+
+
+class _IncludeSearch:
+    """
+    Finds every case-insensitive occurrence of the include phrases with an
+    Aho-Corasick search of the lowered text, and maps each straight to the
+    index of the word it starts in. Each segment is searched on its own
+    (so the result can be cached with it); phrases spanning the join
+    between segments are found from the few characters either side of it.
+    """
+
+    def __init__(self, include):
+        self.phrases = {}  # lowered phrase -> [include entries]
+        for phrase in include:
+            self.phrases.setdefault(phrase.lower(), []).append(phrase)
+        self.matcher = get_phrase_matcher(self.phrases) if self.phrases else None
+        self.overlap = max((len(p) for p in self.phrases), default=1) - 1
+        self.lowered_pos = 0      # Offset of the current segment in the lowered text
+        self.tail = ''            # The last `overlap` lowered characters read
+        self.segments = deque()   # Recent (lowered_start, char_map, token_start, token_ends)
+        self.first = {}           # phrase -> word index of its first occurrence
+        self.occurrences = {}     # phrase -> Occurrences
+
+    @property
+    def active(self):
+        return self.matcher is not None
+
+    def search_segment(self, text, token_ends):
+        """
+        Searches one segment on its own. Returns (matches, lowered_length,
+        head, tail, char_map) for a SegmentRecord, where matches are
+        (local word index, lowered phrase) pairs.
+        """
+        lowered = text.lower()
+        char_map = None
+        if len(lowered) != len(text):
+            # Lowercasing changed the length (e.g. 'İ'); map offsets back
+            char_map = []
+            for orig_index, ch in enumerate(text):
+                char_map.extend([orig_index] * len(ch.lower()))
+            char_map.append(len(text))
+        matches = tuple((_local_word_index(start, char_map, token_ends), phrase)
+                        for start, phrase in self.matcher.find_all(lowered))
+        overlap = self.overlap
+        head = lowered[:overlap]
+        tail = lowered[-overlap:] if overlap else ''
+        return matches, len(lowered), head, tail, char_map
+
+    def add_record(self, index, record, token_start):
+        """Records the phrases in one segment, including any that span into it."""
+        overlap = self.overlap
+        if index > 0:
+            # The ' ' paragraphs are joined with
+            self.lowered_pos += 1
+            self.tail = (self.tail + ' ')[-overlap:] if overlap else ''
+        self.segments.append((self.lowered_pos, record.char_map, token_start, record.token_ends))
+
+        if self.tail and record.head:
+            # Phrases starting before this segment and ending inside it
+            tail_length = len(self.tail)
+            probe_start = self.lowered_pos - tail_length
+            for start, lowered_phrase in self.matcher.find_all(self.tail + record.head):
+                if start < tail_length < start + len(lowered_phrase):
+                    self._add_occurrence(lowered_phrase, self._word_index(probe_start + start))
+        for local_index, lowered_phrase in record.include_matches:
+            self._add_occurrence(lowered_phrase, token_start + local_index)
+
+        self.lowered_pos += record.lowered_length
+        if overlap:
+            self.tail = (self.tail + record.tail)[-overlap:]
+        # Keep only the segments a match spanning the join can still start in
+        while len(self.segments) > 1 and self.segments[1][0] <= self.lowered_pos - overlap:
+            self.segments.popleft()
+
+    def _add_occurrence(self, lowered_phrase, word_index):
+        for phrase in self.phrases[lowered_phrase]:
+            occurrences = self.occurrences.get(phrase)
+            if occurrences is None:
+                occurrences = self.occurrences[phrase] = Occurrences(phrase, match_case=False)
+                self.first[phrase] = word_index
+            occurrences.positions.append(word_index)
+
+    def _word_index(self, lowered_start):
+        for segment_start, char_map, token_start, token_ends in reversed(self.segments):
+            if segment_start <= lowered_start:
+                return token_start + _local_word_index(lowered_start - segment_start,
+                                                       char_map, token_ends)
+        return self.segments[0][2]
+
+
+def _local_word_index(lowered_offset, char_map, token_ends):
+    # Index of the first word ending after the phrase starts
+    if char_map is not None:
+        lowered_offset = char_map[min(lowered_offset, len(char_map) - 1)]
+    return bisect.bisect_right(token_ends, lowered_offset)
+
+
+# What one scan of a segment yields, independent of the rest of the document:
+# its words, the indexes of the words worth classifying, and the include
+# phrases found wholly inside it. Cached per segment by ScanCache.
+SegmentRecord = namedtuple('SegmentRecord', [
+    'tokens',           # tuple of words
+    'token_ends',       # array of word end offsets (only kept for include search)
+    'candidates',       # array of indexes of words whose verdict is a candidate
+    'include_matches',  # tuple of (word index, lowered phrase)
+    'lowered_length',   # Length of the lowered segment text
+    'head',             # First/last characters of the lowered text, for
+    'tail',             #   phrases spanning the join with the next segment
+    'char_map',         # Lowered -> original offsets, if lowering changed the length
+])
+
+_NO_INCLUDE = ((), 0, '', '', None)
+
+
+def _build_segment_record(segment, classifier, include_search, profile=NULL_PROFILE):
+    if include_search.active:
+        with profile.stage("tokenize"):
+            matches = list(word_pattern.finditer(segment))
+            tokens = tuple(m.group() for m in matches)
+            token_ends = array('l', [m.end() for m in matches])
+        with profile.stage("include search"):
+            include_fields = include_search.search_segment(segment, token_ends)
+    else:
+        with profile.stage("tokenize"):
+            tokens = tuple(word_pattern.findall(segment))
+        token_ends = array('l')
+        include_fields = _NO_INCLUDE
+    verdict = classifier.verdict
+    with profile.stage("classify words"):
+        candidates = array('l', [i for i, word in enumerate(tokens) if verdict(word).candidate])
+    return SegmentRecord(tokens, token_ends, candidates, *include_fields)
+
+
+class _ScanState:
+    """Everything one pass over the paragraphs collects."""
+
+    def __init__(self, window, context_range):
+        self.acronyms = {'likely': {}, 'possible': {}, 'unlikely': {}}  # category -> {key: word index}
+        self.occurrences = {}           # key -> Occurrences
+        self.include_first = {}         # phrase -> word index of first occurrence
+        self.include_occurrences = {}   # phrase -> Occurrences
+        self.contexts = _ContextStore(window, context_range)
+        self.next = 0                   # Next word index to classify
+        self.prev_word_acronym_index = None
+
+    def referenced_indices(self):
+        for entries in self.acronyms.values():
+            yield from entries.values()
+        yield from self.include_first.values()
+
+    def take_new_acronyms(self, defined_acronyms, include_first, reported):
+        """
+        {category: {acronym: context}} for acronyms not in reported (which is
+        updated). Categories are provisional: undefined 'likely' acronyms are
+        only moved to 'possible', and include phrases sorted, at the end.
+        """
+        new = {'likely': {}, 'possible': {}, 'unlikely': {}}
+        for category, entries in self.acronyms.items():
+            for key, index in entries.items():
+                if key not in reported:
+                    reported.add(key)
+                    if category == 'likely' and key not in defined_acronyms:
+                        category_now = 'possible'
+                    else:
+                        category_now = category
+                    new[category_now][key] = self.contexts.context(index)
+        for phrase, index in include_first.items():
+            if phrase not in reported:
+                reported.add(phrase)
+                category_now = 'likely' if phrase in defined_acronyms else 'possible'
+                new[category_now][phrase] = self.contexts.context(index)
+        return new
+
+
+def _scan_paragraphs(paragraphs, classifier, include, context_range, scan_cache=None,
+                     profile=NULL_PROFILE, progress_callback=None, cancel_check=None):
+    """
+    Streams paragraphs through tokenization, exclusion filtering and
+    classification. Each word is classified once its neighbours have been
+    read, and only word indexes are recorded; contexts are built later on
+    demand. Memory stays bounded by the largest paragraph rather than the
+    document (unless a scan_cache is holding the per-segment records).
+    Returns a _ScanState.
+    """
+    window = _TokenWindow()
+    state = _ScanState(window, context_range)
+    include_search = _IncludeSearch(include)
+    reach = max(context_range, 1)
+    # Only candidate words are visited. Skipping the rest is safe: a word
+    # that is not a candidate can't start an "A1 1B" pair, has no category
+    # and isn't subject to the short-capitals rule.
+    candidates = deque()
+
+    def classify_up_to(limit, total=None):
+        with profile.stage("categorize"):
+            while candidates and candidates[0] < limit:
+                _classify_at(candidates.popleft(), window, total, state, classifier)
+            state.next = max(state.next, limit)
+
+    reported = set()  # Acronyms already passed to progress_callback
+    next_progress = time.perf_counter() + PROGRESS_INTERVAL
+
+    segments = profile.timed_iter("split paragraphs", iter_scan_segments(paragraphs))
+    for index, segment in enumerate(segments):
+        if cancel_check is not None and cancel_check():
+            raise ScanCancelled()
+        record = None
+        if scan_cache is not None:
+            with profile.stage("scan cache"):
+                key = segment_key(segment)
+                record = scan_cache.get(key)
+        if record is None:
+            record = _build_segment_record(segment, classifier, include_search, profile)
+            if scan_cache is not None:
+                scan_cache.put(key, record)
+
+        token_start = len(window)
+        window.extend(record.tokens)
+        if include_search.active:
+            with profile.stage("include search"):
+                include_search.add_record(index, record, token_start)
+        candidates.extend([token_start + i for i in record.candidates])
+
+        # A word needs `reach` words after it before it can be classified
+        classify_up_to(len(window) - reach)
+
+        keep_from = state.next - reach
+        for word_index in include_search.first.values():
+            if word_index + context_range >= len(window):
+                # Its context still needs words that haven't been read
+                keep_from = min(keep_from, word_index - context_range)
+        keep_from = max(0, keep_from)
+        if window.can_forget_before(keep_from):
+            state.include_first = include_search.first
+            state.contexts.snapshot(set(state.referenced_indices()), keep_from)
+            window.forget_before(keep_from)
+
+        if progress_callback is not None and time.perf_counter() >= next_progress:
+            progress_callback(index + 1, len(window), state.take_new_acronyms(
+                classifier.defined_acronyms, include_search.first, reported))
+            next_progress = time.perf_counter() + PROGRESS_INTERVAL
+
+    total = len(window)
+    classify_up_to(total, total)
+    state.contexts.total = total
+    state.include_first = include_search.first
+    state.include_occurrences = include_search.occurrences
+    return state
+
+
+def _classify_at(i, window, total, state, classifier):
+    """One step of the classification loop for the word at index i.
+       total is None while more words may follow (at least one always does).
+    """
+    word = window[i]
+    verdict = classifier.verdict(word)
+    has_next = total is None or i < total - 1
+
+    prev_word_acronym_index = state.prev_word_acronym_index
+    if prev_word_acronym_index is not None and i == prev_word_acronym_index + 1:
+        state.prev_word_acronym_index = None
+        return
+    elif has_next and verdict.letters_then_digits and\
+            classifier.verdict(window[i + 1]).digits_then_letters:
+        state.prev_word_acronym_index = i
+        return
+
+    if verdict.excluded:
+        return
+
+    acronyms = state.acronyms
+    if verdict.category is not None:
+        key = verdict.key
+        acronyms.setdefault(verdict.category, {})[key] = i
+        occurrences = state.occurrences.get(key)
+        if occurrences is None:
+            occurrences = state.occurrences[key] = Occurrences(word)
+        occurrences.positions.append(i)
+
+    if verdict.short_upper and i > 0 and has_next:
+        if window[i - 1][0].isupper() and window[i + 1][0].isupper():
+            for category in acronyms:
+                if word in acronyms[category]:
+                    del acronyms[category][word]
+
+
+def select_first_occurrence(word_app, word, match_case=True):
+    """Selects the first use of word in the active document's main text.
+       Returns False if Word can't find it (e.g. it only occurs in a header).
+    """
+    WD_FIND_STOP = 0
+    doc = word_app.ActiveDocument
+    search_range = doc.Content
+    find = search_range.Find
+    find.ClearFormatting()
+    find.Text = word
+    find.Forward = True
+    find.Wrap = WD_FIND_STOP
+    find.Format = False
+    find.MatchCase = match_case
+    find.MatchWholeWord = ' ' not in word
+    find.MatchWildcards = False
+    if not find.Execute():
+        return False
+    search_range.Select()
+    word_app.Activate()
+    return True
 
 
 # Other helper functions like get_context,
@@ -187,40 +767,16 @@ def get_context(index, word_list, range):
 
 
 def get_definition(acronym, base_definition_path, user_definition_path):
-    # Check user definitions first
-    if os.path.exists(user_definition_path):
-        try:
-            with open(user_definition_path, "r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if '\t' in line:
-                        acr, definition = line.split("\t", 1)
-                        if acr == acronym:
-                            return definition
-        except Exception as e:
-            print(f"Warning: Could not read user definitions from {user_definition_path}: {e}")
-
-    # If not found in user definitions, check base definitions
-    if os.path.exists(base_definition_path):
-        try:
-            with open(base_definition_path, "r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if '\t' in line:
-                        acr, definition = line.split("\t", 1)
-                        if acr == acronym:
-                            return definition
-        except Exception as e:
-            print(f"Warning: Could not read base definitions from {base_definition_path}: {e}")
-
-    return "" # Return empty if not found in either
+    # User definitions take precedence over base definitions.
+    # Lookups go through the shared in-memory store, which only rereads
+    # the files when they change on disk.
+    return get_definition_store(base_definition_path, user_definition_path).get(acronym)
 
 
 def is_english_word(word):
-    if wordnet.synsets(word):
-        return True
-    else:
-        return False
+    # Precomputed WordNet lemma set (see EnglishLexicon), loaded once
+    with current_profile().stage("english words"):
+        return get_english_lexicon().is_english_word(word)
 
 
 def load_custom_list(filepath, default_set):
@@ -242,18 +798,3 @@ def load_custom_list(filepath, default_set):
             print(f"Warning: Could not load custom list from {filepath}: {e}")
             return default_set.copy() # Fallback to a copy of the default on error
     return default_set.copy() # Fallback to a copy of the default if file doesn't exist
-
-
-def _load_definitions_from_file(filepath):
-    definitions = {}
-    if os.path.exists(filepath):
-        try:
-            with open(filepath, "r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if '\t' in line:
-                        acronym, definition = line.split("\t", 1)
-                        definitions[acronym] = definition
-        except Exception as e:
-            print(f"Warning: Could not load definitions from {filepath}: {e}")
-    return definitions
\ No newline at end of file
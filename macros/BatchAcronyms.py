@@ -0,0 +1,167 @@
+# macros/BatchAcronyms.py
+# Acronym scan over a whole folder of .docx files, without Word. Each file
+# is read straight from its XML parts and scanned in its own worker
+# process; the per-file results are merged with provenance.
+#
+#   python -m macros.BatchAcronyms <folder or .docx> [...] [-o glossary.tsv] [-j workers]
+import os
+import sys
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .AcronymList import (ACRONYM_LIST_URL, fetch_acronym_list_online,
+                          get_base_acronym_cache_path, get_doc_companion_dir)
+from .Acronyms import scan_acronyms
+from .DefinitionStore import get_definition_store
+from .DocumentSource import DocxDocumentSource, find_docx_files
+
+CATEGORIES = ('likely', 'possible', 'unlikely')
+
+# One file's share of a merged acronym
+FileHit = namedtuple('FileHit', ['path', 'count', 'context'])
+
+
+class BatchEntry:
+    """One acronym across every scanned file, with the files it occurs in."""
+    __slots__ = ('key', 'category', 'files')
+
+    def __init__(self, key, category):
+        self.key = key
+        self.category = category
+        self.files = []  # FileHit per file, in the order the files were given
+
+    @property
+    def count(self):
+        return sum(hit.count for hit in self.files)
+
+    @property
+    def context(self):
+        return self.files[0].context if self.files else ''
+
+    def __repr__(self):
+        return f"BatchEntry({self.key!r}, {self.category!r}, files={len(self.files)})"
+
+
+def scan_docx_file(path, base_definition_path, user_definition_path, context_range=5):
+    """
+    Scans one .docx file. Returns {category: {acronym: (count, context)}},
+    plain data so it can be sent back from a worker process.
+    """
+    scan = scan_acronyms(None, base_definition_path, user_definition_path, context_range,
+                         DocxDocumentSource(path))
+    return {category: {key: (entry.count, entry.context) for key, entry in entries.items()}
+            for category, entries in scan.items()}
+
+
+def _scan_worker(path, base_definition_path, user_definition_path, context_range):
+    # Runs in a worker process; errors come back as text rather than
+    # cancelling the rest of the batch
+    try:
+        return path, scan_docx_file(path, base_definition_path, user_definition_path,
+                                    context_range), None
+    except Exception as e:
+        return path, None, f"{type(e).__name__}: {e}"
+
+
+def merge_scan_results(file_results):
+    """
+    Merges [(path, {category: {acronym: (count, context)}})] into
+    {category: {acronym: BatchEntry}}. An acronym found in more than one
+    category keeps the strongest one (likely, then possible, then unlikely).
+    """
+    entries = {}
+    for path, result in file_results:
+        for category in CATEGORIES:
+            for key, (count, context) in result.get(category, {}).items():
+                entry = entries.get(key)
+                if entry is None:
+                    entry = entries[key] = BatchEntry(key, category)
+                elif CATEGORIES.index(category) < CATEGORIES.index(entry.category):
+                    entry.category = category
+                entry.files.append(FileHit(path, count, context))
+    merged = {category: {} for category in CATEGORIES}
+    for key in sorted(entries):
+        merged[entries[key].category][key] = entries[key]
+    return merged
+
+
+def batch_find_acronyms(paths, base_definition_path, user_definition_path, context_range=5,
+                        max_workers=None, progress_callback=None):
+    """
+    Scans every .docx in paths (files and/or folders) in parallel.
+    Returns (merged, errors): merged is {category: {acronym: BatchEntry}},
+    errors maps the path of each file that couldn't be scanned to the reason.
+    progress_callback(done, total, path) is called as each file finishes.
+    """
+    files = find_docx_files(paths)
+    max_workers = max_workers or os.cpu_count() or 1
+    results = {}
+    errors = {}
+
+    def collect(done, path, result, error):
+        if error is None:
+            results[path] = result
+        else:
+            errors[path] = error
+            print(f"Warning: Could not scan {path}: {error}")
+        if progress_callback:
+            progress_callback(done, len(files), path)
+
+    if max_workers == 1 or len(files) <= 1:
+        for done, path in enumerate(files, 1):
+            collect(done, *_scan_worker(path, base_definition_path, user_definition_path,
+                                        context_range))
+    else:
+        # One task per file: each scan is large enough that the process
+        # start-up and definition loading are paid only once per worker
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(files))) as pool:
+            futures = [pool.submit(_scan_worker, path, base_definition_path,
+                                   user_definition_path, context_range) for path in files]
+            for done, future in enumerate(as_completed(futures), 1):
+                collect(done, *future.result())
+
+    # Merge in the order the files were given, not the order they finished
+    merged = merge_scan_results([(path, results[path]) for path in files if path in results])
+    return merged, errors
+
+
+def write_glossary_tsv(merged, definitions, output):
+    """Writes the merged result as tab-separated rows to an open text file."""
+    output.write("Category\tAcronym\tDefinition\tUses\tFiles\tContext\n")
+    for category in CATEGORIES:
+        for key, entry in merged.get(category, {}).items():
+            files = "; ".join(f"{os.path.basename(hit.path)} ({hit.count})" for hit in entry.files)
+            output.write(f"{category}\t{key}\t{definitions.get(key, '')}\t{entry.count}\t"
+                         f"{files}\t{entry.context}\n")
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(
+        prog="python -m macros.BatchAcronyms",
+        description="Find acronyms in every .docx file in the given folders, without Word.")
+    parser.add_argument("paths", nargs="+", help=".docx files or folders")
+    parser.add_argument("-o", "--output", help="write the glossary to this .tsv file")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="number of worker processes (default: one per CPU)")
+    args = parser.parse_args(argv)
+
+    base_definition_path = fetch_acronym_list_online(ACRONYM_LIST_URL, get_base_acronym_cache_path())
+    user_definition_path = os.path.join(get_doc_companion_dir(), "user_acronyms.txt")
+    merged, errors = batch_find_acronyms(
+        args.paths, base_definition_path, user_definition_path, max_workers=args.workers,
+        progress_callback=lambda done, total, path: print(f"[{done}/{total}] {path}",
+                                                          file=sys.stderr))
+    definitions = get_definition_store(base_definition_path, user_definition_path).get_many(
+        key for entries in merged.values() for key in entries)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            write_glossary_tsv(merged, definitions, f)
+        print(f"Glossary written to: {args.output}")
+    else:
+        write_glossary_tsv(merged, definitions, sys.stdout)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,321 @@
+# macros/BatchReplace.py
+# Replace Values over whole .docx files, without Word. Each story part
+# (main text, footnotes, endnotes, headers, footers) is edited in place in
+# its XML: only the text of the <w:t> elements a replacement touches is
+# rewritten, so run formatting survives, and everything else in the
+# package is copied unchanged. Files are processed in worker processes.
+#
+#   python -m macros.BatchReplace <table.xlsx> <folder or .docx> [...] -o <output folder>
+import bisect
+import html
+import os
+import re
+import sys
+import zipfile
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from xml.sax.saxutils import escape
+
+from .DocumentSource import find_docx_files
+from .ReplaceEngine import plan_pattern_replacements, plan_replacements
+from .ReplacementTable import load_replacement_table
+
+# What one file got: replacements made, replacements that had to be left
+# out (they ran into a tab, line break or paragraph mark), and per table row
+FileReport = namedtuple('FileReport', ['path', 'output', 'replacements', 'skipped', 'row_counts'])
+
+_STORY_PART_PATTERN = re.compile(r'word/(document|footnotes|endnotes|header\d*|footer\d*)\.xml$')
+
+# The WordprocessingML that makes up the text of a part. Tabs and breaks
+# only count inside a run (<w:tab> also defines tab stops).
+_TOKEN_PATTERN = re.compile(
+    r'<w:t(?:\s[^>]*)?>(?P<text>[^<]*)</w:t>'
+    r'|(?P<run><w:r(?:\s[^>]*)?>)|(?P<run_end></w:r>)'
+    r'|<w:(?P<char>tab|br|cr)(?:\s[^>]*)?/>'
+    r'|(?P<p_empty><w:p(?:\s[^>]*)?/>)|(?P<p><w:p(?:\s[^>]*)?>)|(?P<p_end></w:p>)')
+_RUN_CHARS = {'tab': '\t', 'br': '\x0b', 'cr': '\x0b'}
+
+
+class _PartText:
+    """
+    The text of one story part as Word would show it, with where each
+    piece of <w:t> text sits in the XML. Only <w:t> characters can be
+    edited; tabs, breaks and paragraph marks can only be matched.
+    """
+
+    def __init__(self, xml):
+        self.xml = xml
+        pieces = []
+        self.editable = bytearray()
+        self.nodes = []        # (text offset, open tag start, content start, content end, text)
+        self.node_offsets = []
+        offset = 0
+        in_run = False
+        depth = 0
+        for match in _TOKEN_PATTERN.finditer(xml):
+            kind = match.lastgroup
+            if kind == 'text':
+                text = html.unescape(match.group('text'))
+                if text:
+                    self.nodes.append((offset, match.start(), match.start('text'),
+                                       match.end('text'), text))
+                    self.node_offsets.append(offset)
+                    pieces.append(text)
+                    self.editable += b'\x01' * len(text)
+                    offset += len(text)
+                continue
+            if kind == 'run':
+                in_run = True
+                continue
+            if kind == 'run_end':
+                in_run = False
+                continue
+            if kind == 'char':
+                if not in_run:
+                    continue
+                char = _RUN_CHARS[match.group('char')]
+            elif kind == 'p':
+                depth += 1
+                if depth == 1:
+                    continue
+                char = '\r'  # Keeps text box paragraphs apart from the one holding them
+            else:
+                if kind == 'p_end':
+                    depth -= 1
+                char = '\r'
+            pieces.append(char)
+            self.editable.append(0)
+            offset += 1
+        self.text = ''.join(pieces)
+
+    def apply(self, edits):
+        """
+        Writes edits (Edit spans of self.text) into the XML. Returns the new
+        XML and the number of edits left out because they include text that
+        can't be edited.
+        """
+        changes = {}  # node index -> [(start, end, replacement)] within the node
+        skipped = 0
+        for start, end, replacement in edits:
+            if self.editable.find(0, start, end) != -1:
+                skipped += 1
+                continue
+            if start == end:
+                # A pure insertion goes into the text it follows (or precedes)
+                position = start - 1 if start and self.editable[start - 1] else start
+                if position >= len(self.editable) or not self.editable[position]:
+                    skipped += 1
+                    continue
+            else:
+                position = start
+            first = bisect.bisect_right(self.node_offsets, position) - 1
+            node = first
+            while True:
+                node_offset = self.nodes[node][0]
+                node_end = node_offset + len(self.nodes[node][4])
+                local_start = max(start, node_offset) - node_offset
+                local_end = min(end, node_end) - node_offset
+                changes.setdefault(node, []).append(
+                    (local_start, local_end, replacement if node == first else ''))
+                if end <= node_end:
+                    break
+                node += 1
+
+        parts = []
+        position = 0
+        for node in sorted(changes):
+            _, tag_start, content_start, content_end, text = self.nodes[node]
+            new_text = []
+            last = 0
+            for local_start, local_end, replacement in changes[node]:
+                new_text.append(text[last:local_start])
+                new_text.append(replacement)
+                last = local_end
+            new_text.append(text[last:])
+            new_text = ''.join(new_text)
+            open_tag = self.xml[tag_start:content_start]
+            if new_text != new_text.strip() and 'xml:space' not in open_tag:
+                # Leading or trailing spaces would otherwise be dropped
+                open_tag = open_tag[:-1].rstrip('/') + ' xml:space="preserve">'
+            parts.append(self.xml[position:tag_start])
+            parts.append(open_tag)
+            parts.append(escape(new_text))
+            position = content_end
+        parts.append(self.xml[position:])
+        return ''.join(parts), skipped
+
+
+def replace_in_part(xml, table, use_wildcards=False):
+    """
+    Applies a ReplacementTable to the XML of one story part. Returns
+    (new XML, per-row counts, skipped edits).
+    """
+    part = _PartText(xml)
+    if use_wildcards:
+        plan = plan_pattern_replacements(part.text, table.compiled_wildcards())
+    else:
+        compiled = table.compiled()
+        if compiled is None:
+            raise ValueError("The table uses Word ^codes that only Word can replace.")
+        plan = plan_replacements(part.text, compiled)
+    if not plan.edits:
+        return xml, plan.counts, 0
+    new_xml, skipped = part.apply(plan.edits)
+    return new_xml, plan.counts, skipped
+
+
+def replace_in_docx(path, output_path, table, use_wildcards=False):
+    """
+    Applies a ReplacementTable to every story part of a .docx file and
+    writes the result to output_path (which may be path itself). Parts
+    without replacements, and everything else in the package, are copied
+    unchanged. Returns (per-row counts, skipped edits).
+    """
+    row_counts = [0] * len(table.replacements())
+    skipped = 0
+    new_parts = {}
+    in_place = os.path.abspath(output_path) == os.path.abspath(path)
+    with zipfile.ZipFile(path) as package:
+        for info in package.infolist():
+            if not _STORY_PART_PATTERN.match(info.filename):
+                continue
+            xml = package.read(info).decode('utf-8')
+            new_xml, counts, part_skipped = replace_in_part(xml, table, use_wildcards)
+            row_counts = [a + b for a, b in zip(row_counts, counts)]
+            skipped += part_skipped
+            if new_xml != xml:
+                new_parts[info.filename] = new_xml.encode('utf-8')
+        if in_place and not new_parts:
+            return row_counts, skipped
+
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        tmp_path = f"{output_path}.{os.getpid()}.tmp"
+        try:
+            with zipfile.ZipFile(tmp_path, 'w') as output:
+                for info in package.infolist():
+                    data = new_parts.get(info.filename)
+                    output.writestr(info, data if data is not None else package.read(info))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    os.replace(tmp_path, output_path)
+    return row_counts, skipped
+
+
+def _replace_worker(path, output_path, table_path, use_wildcards):
+    # Runs in a worker process, which loads (and caches) the table once;
+    # errors come back as text rather than cancelling the rest of the batch
+    try:
+        table = load_replacement_table(table_path)
+        row_counts, skipped = replace_in_docx(path, output_path, table, use_wildcards)
+        return FileReport(path, output_path, sum(row_counts), skipped, row_counts), None
+    except Exception as e:
+        return FileReport(path, output_path, 0, 0, []), f"{type(e).__name__}: {e}"
+
+
+def _plan_outputs(paths, output_dir):
+    # (input, output) for every .docx in paths. Under output_dir each file
+    # keeps its path relative to the folder it was found in, so same-named
+    # files in different subfolders don't overwrite each other.
+    if isinstance(paths, str):
+        paths = [paths]
+    jobs = {}
+    for root in paths:
+        for path in find_docx_files([root]):
+            if path in jobs:
+                continue
+            if not output_dir:
+                jobs[path] = path
+            elif os.path.isdir(root):
+                jobs[path] = os.path.join(output_dir, os.path.relpath(path, root))
+            else:
+                jobs[path] = os.path.join(output_dir, os.path.basename(path))
+    outputs = {}
+    for path, output_path in jobs.items():
+        key = os.path.normcase(os.path.abspath(output_path))
+        if key in outputs:
+            raise ValueError(f"{outputs[key]} and {path} would both be written to "
+                             f"{output_path}.")
+        outputs[key] = path
+    return list(jobs.items())
+
+
+def batch_replace(paths, table_path, output_dir=None, use_wildcards=False, max_workers=None,
+                  progress_callback=None):
+    """
+    Applies the replacement table at table_path to every .docx in paths
+    (files and/or folders) in parallel. Results are written to output_dir,
+    keeping each file's path relative to the folder given for it, or over the
+    originals if output_dir is None. Raises ValueError, before any file is
+    written, if two files would be written to the same place.
+    Returns (reports, errors): a FileReport per file, in the order given,
+    and the reason for each file that couldn't be processed.
+    progress_callback(done, total, path) is called as each file finishes.
+    """
+    # Problems with the table itself show up here, before any file is touched
+    table = load_replacement_table(table_path)
+    if use_wildcards:
+        table.compiled_wildcards()
+    elif table.compiled() is None:
+        raise ValueError("The table uses Word ^codes that only Word can replace.")
+
+    jobs = _plan_outputs(paths, output_dir)
+    max_workers = max_workers or os.cpu_count() or 1
+    reports = {}
+    errors = {}
+
+    def collect(done, report, error):
+        reports[report.path] = report
+        if error is not None:
+            errors[report.path] = error
+            print(f"Warning: Could not replace in {report.path}: {error}")
+        if progress_callback:
+            progress_callback(done, len(jobs), report.path)
+
+    if max_workers == 1 or len(jobs) <= 1:
+        for done, (path, output_path) in enumerate(jobs, 1):
+            collect(done, *_replace_worker(path, output_path, table_path, use_wildcards))
+    else:
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(jobs))) as pool:
+            futures = [pool.submit(_replace_worker, path, output_path, table_path, use_wildcards)
+                       for path, output_path in jobs]
+            for done, future in enumerate(as_completed(futures), 1):
+                collect(done, *future.result())
+
+    return [reports[path] for path, _ in jobs], errors
+
+
+def write_report_tsv(reports, output):
+    """Writes one line per file (replacements, skipped, path) to an open text file."""
+    output.write("Replacements\tSkipped\tFile\tOutput\n")
+    for report in reports:
+        output.write(f"{report.replacements}\t{report.skipped}\t{report.path}\t{report.output}\n")
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(
+        prog="python -m macros.BatchReplace",
+        description="Apply a find/replace table to every .docx file in the given folders, "
+                    "without Word.")
+    parser.add_argument("table", help="Excel, CSV or TSV file: column A find, column B replace")
+    parser.add_argument("paths", nargs="+", help=".docx files or folders")
+    parser.add_argument("-o", "--output-dir",
+                        help="write the changed files here (default: overwrite the originals)")
+    parser.add_argument("-w", "--wildcards", action="store_true",
+                        help="treat the find texts as Word wildcard patterns")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="number of worker processes (default: one per CPU)")
+    args = parser.parse_args(argv)
+
+    reports, errors = batch_replace(
+        args.paths, args.table, args.output_dir, args.wildcards, max_workers=args.workers,
+        progress_callback=lambda done, total, path: print(f"[{done}/{total}] {path}",
+                                                          file=sys.stderr))
+    write_report_tsv(reports, sys.stdout)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
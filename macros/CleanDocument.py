@@ -1,10 +1,56 @@
 # macros/CleanDocument.py
 import sys
 import os
-import win32com.client as win32
 import time
 import re
 
+# Password of the protection applied to cleaned documents
+PROTECTION_PASSWORD = "pwdMW001"
+# Longest wait for Word to finish a step before carrying on anyway
+STEP_TIMEOUT = 30.0
+
+
+def _wait_until(condition, timeout=STEP_TIMEOUT):
+    """
+    Polls condition() until it is true, starting at 10 ms and backing off
+    to 250 ms between checks. Returns False if it timed out.
+    """
+    deadline = time.monotonic() + timeout
+    interval = 0.01
+    while not condition():
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(interval)
+        interval = min(interval * 2, 0.25)
+    return True
+
+
+class CleanCancelled(Exception):
+    """Raised inside a clean once its cancel_check returns True."""
+
+
+class MessageLog(list):
+    """
+    The messages of one clean. Each line is also passed to log(line) as it
+    is added, so callers can show progress as it happens;
+    check_cancelled() raises CleanCancelled once cancel_check() is true.
+    """
+
+    def __init__(self, log=None, cancel_check=None):
+        super().__init__()
+        self.log = log
+        self.cancel_check = cancel_check
+
+    def append(self, line):
+        super().append(line)
+        if self.log is not None:
+            self.log(line)
+
+    def check_cancelled(self):
+        if self.cancel_check is not None and self.cancel_check():
+            raise CleanCancelled()
+
+
 def generate_clean_filename(file_path):
     """
     Generates a new filename with '_clean' added after the YYYY.MM.DD date.
@@ -32,16 +78,20 @@ def generate_clean_filename(file_path):
     return os.path.join(dir_name, new_filename)
 
 
-def process_word_document(file_path):
+def process_word_document(file_path, word_app=None, log=None, cancel_check=None):
     """
     Opens a Word document, performs processing, and saves it as a copy.
     Returns a tuple (success: bool, messages: list[str]).
+    word_app: optional Word application to use instead of starting a new
+    one (e.g. a fake for benchmarks); it is left running afterwards.
+    log(line) is called with each message as it is produced; cancel_check()
+    is polled between steps and stops the run (unsaved) when true.
     """
     word = None
     doc = None
     absolute_path = os.path.abspath(file_path)
-    messages = []
-    password = "pwdMW001"  # Hardcoded password
+    messages = MessageLog(log, cancel_check)
+    password = PROTECTION_PASSWORD
 
     messages.append("-" * 50)
     messages.append(f"Starting processing for: {absolute_path}")
@@ -55,8 +105,12 @@ def process_word_document(file_path):
     messages.append(f"Output file will be: {new_save_path}")
 
     try:
-        messages.append("Starting Word application...")
-        word = win32.DispatchEx("Word.Application")
+        if word_app is None:
+            messages.append("Starting Word application...")
+            import win32com.client as win32
+            word = win32.DispatchEx("Word.Application")
+        else:
+            word = word_app
         word.Visible = False
         word.DisplayAlerts = False
 
@@ -64,6 +118,7 @@ def process_word_document(file_path):
         WD_NO_PROTECTION = -1
         messages.append(f"Using Protection Type = {WD_ALLOW_ONLY_REVISIONS}")
 
+        messages.check_cancelled()
         messages.append(f"Opening document: {os.path.basename(absolute_path)}...")
         doc = word.Documents.Open(absolute_path)
 
@@ -77,11 +132,12 @@ def process_word_document(file_path):
                 messages.append(f"!!! CRITICAL ERROR: Could not unprotect document: {unprotect_err}")
                 messages.append("    Aborting processing.")
                 doc.Close(SaveChanges=False)
-                word.Quit()
+                doc = None
                 return False, messages
         else:
             messages.append("Document is not protected. Proceeding.")
 
+        messages.check_cancelled()
         messages.append("Updating all fields...")
         for story in doc.StoryRanges:
             story.Fields.Update()
@@ -89,33 +145,45 @@ def process_word_document(file_path):
             while current_story.NextStoryRange:
                 current_story = current_story.NextStoryRange
                 current_story.Fields.Update()
+        # Fields.Update returns once the fields are done, so there's nothing to wait for
         messages.append("Fields updated.")
-        time.sleep(1)
 
+        messages.check_cancelled()
         messages.append("Deleting all comments...")
         comment_count = doc.Comments.Count
         if comment_count > 0:
             doc.DeleteAllComments()
+            # DeleteAllComments returns once it's done, so one check is enough
+            if doc.Comments.Count:
+                messages.append("Warning: Some comments could not be deleted; carrying on.")
             messages.append(f"{comment_count} comments deleted.")
         else:
             messages.append("No comments found to delete.")
-        time.sleep(1)
 
+        messages.check_cancelled()
         messages.append("Accepting all tracked revisions...")
         revision_count = doc.Revisions.Count
         if revision_count > 0:
             doc.AcceptAllRevisions()
+            # Revisions.Count walks the whole document, so check it once
+            # rather than polling it
+            if doc.Revisions.Count:
+                messages.append("Warning: Some revisions could not be accepted; carrying on.")
             messages.append(f"{revision_count} revisions accepted.")
         else:
             messages.append("No revisions found to accept.")
-        time.sleep(1)
 
+        messages.check_cancelled()
         messages.append(f"Applying protection (Using Type={WD_ALLOW_ONLY_REVISIONS})...")
         doc.Protect(Type=WD_ALLOW_ONLY_REVISIONS, Password=password)
         messages.append("Document protected.")
 
+        messages.check_cancelled()
         messages.append(f"Saving document as: {os.path.basename(new_save_path)}...")
         doc.SaveAs(new_save_path)
+        # With background saving on, SaveAs can return before the file is written
+        if not _wait_until(lambda: word.BackgroundSavingStatus == 0):
+            messages.append("Warning: Word is still saving; closing anyway.")
         messages.append("Closing original document...")
         doc.Close(SaveChanges=False)
         doc = None
@@ -125,6 +193,10 @@ def process_word_document(file_path):
         messages.append("-" * 50)
         return True, messages
 
+    except CleanCancelled:
+        messages.append("Processing cancelled; nothing was saved.")
+        return False, messages
+
     except Exception as e:
         messages.append("\n" + "=" * 50)
         messages.append(f"!!! An Error Occurred !!!")
@@ -139,8 +211,54 @@ def process_word_document(file_path):
         if doc:
             try: doc.Close(SaveChanges=False)
             except Exception: pass
-        if word:
+        if word and word_app is None:
             try: word.Quit()
             except Exception: pass
         word = None
-        doc = None
\ No newline at end of file
+        doc = None
+
+
+def needs_word(file_path, update_fields=False):
+    """True if cleaning the file takes Word: to update fields, or for a .doc."""
+    from .CleanDocx import is_docx_package
+    return update_fields or not os.path.exists(file_path) or not is_docx_package(file_path)
+
+
+def clean_document(file_path, update_fields=False, word_app=None, log=None, cancel_check=None):
+    """
+    Cleans and protects one document. A .docx is cleaned by editing its XML
+    (CleanDocx.clean_docx), which is much faster and works without Word;
+    Word is only used to update fields or for a .doc. log and cancel_check
+    are as for process_word_document. Returns (success, messages).
+    """
+    if needs_word(file_path, update_fields):
+        return process_word_document(file_path, word_app=word_app, log=log,
+                                     cancel_check=cancel_check)
+    from .CleanDocx import clean_docx
+    return clean_docx(file_path, log=log, cancel_check=cancel_check)
+
+
+def clean_documents(file_paths, update_fields=False, pool=None, pool_size=None):
+    """
+    Runs clean_document on many files. The files that need Word are
+    processed in parallel on a WordPool of long-lived Word instances.
+    Returns [(success, messages)] in the order of file_paths. pool: an open
+    WordPool to use (it is left open); otherwise one of pool_size instances
+    is started if needed and closed afterwards.
+    """
+    from .CleanDocx import clean_docx
+    from .WordPool import DEFAULT_POOL_SIZE, WordPool
+    file_paths = list(file_paths)
+    word_paths = [path for path in file_paths if needs_word(path, update_fields)]
+    own_pool = None
+    if word_paths and pool is None:
+        pool = own_pool = WordPool(min(pool_size or DEFAULT_POOL_SIZE, len(word_paths)))
+    try:
+        futures = {path: pool.submit(process_word_document, path) for path in word_paths}
+        # The rest are cleaned here while the pool works through the Word files
+        results = {path: clean_docx(path) for path in file_paths if path not in futures}
+        results.update((path, future.result()) for path, future in futures.items())
+    finally:
+        if own_pool is not None:
+            own_pool.close()
+    return [results[path] for path in file_paths]
@@ -0,0 +1,488 @@
+# macros/CleanDocx.py
+# Clean & Protect for .docx files without Word: comments are deleted,
+# tracked revisions accepted and editing restricted to tracked changes by
+# rewriting the package XML directly. The parts are read with a small pull
+# tokenizer rather than an XML library, so the markup that isn't changed
+# keeps its exact bytes; parts with nothing to change, and everything
+# else in the package, are copied unchanged. Updating fields still needs
+# Word (see CleanDocument.clean_document).
+import base64
+import hashlib
+import os
+import re
+import zipfile
+
+from .CleanDocument import (PROTECTION_PASSWORD, CleanCancelled, MessageLog,
+                            generate_clean_filename)
+
+# Parts that can hold comment anchors or tracked revisions
+_REVISION_PART_PATTERN = re.compile(
+    r'word/(document|footnotes|endnotes|header\d*|footer\d*|styles|numbering|glossary/document)\.xml$')
+_COMMENTS_PART_PATTERN = re.compile(r'word/comments(Extended|Ids|Extensible)?\.xml$')
+_SETTINGS_PART = 'word/settings.xml'
+_DOCUMENT_RELS_PART = 'word/_rels/document.xml.rels'
+_CONTENT_TYPES_PART = '[Content_Types].xml'
+_SETTINGS_RELATIONSHIP = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/settings'
+_SETTINGS_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.settings+xml'
+# Written when a package has no settings part (it is optional)
+_EMPTY_SETTINGS = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\r\n'
+                   '<w:settings xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+                   '</w:settings>')
+_EMPTY_RELATIONSHIPS = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\r\n'
+                        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                        '</Relationships>')
+
+# A tag (with its name, and whether it is an end or empty tag), or a
+# comment, processing instruction or CDATA section (no name)
+_TAG_PATTERN = re.compile(
+    r'<!--.*?-->|<!\[CDATA\[.*?\]\]>|<\?.*?\?>'
+    r'|<(?P<end>/)?(?P<name>[^\s/>]+)(?P<attrs>(?:[^>"\']|"[^"]*"|\'[^\']*\')*?)(?P<empty>/)?>',
+    re.DOTALL)
+_ATTRIBUTE_PATTERN = re.compile(r'([^\s=]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+# Quick test for parts that have nothing to accept or remove
+_REVISION_HINT_PATTERN = re.compile(
+    r'<w:(?:ins|del|moveFrom|moveTo|cellIns|cellDel|cellMerge|comment\w*|\w+Change)[\s/>]')
+
+# Revisions that are removed together with their content when accepted ...
+_DROPPED = {'w:del', 'w:moveFrom', 'w:rPrChange', 'w:pPrChange', 'w:sectPrChange',
+            'w:tblPrChange', 'w:tblPrExChange', 'w:trPrChange', 'w:tcPrChange',
+            'w:tblGridChange', 'w:numberingChange',
+            # Table cell markers; an accepted w:cellDel also takes its cell
+            'w:cellIns', 'w:cellDel', 'w:cellMerge'}
+# ... and those whose content stays
+_UNWRAPPED = {'w:ins', 'w:moveTo'}
+# Range markers of moves, which mean nothing once the move is accepted
+_MOVE_MARKERS = {'w:moveFromRangeStart', 'w:moveFromRangeEnd',
+                 'w:moveToRangeStart', 'w:moveToRangeEnd'}
+_COMMENT_MARKS = {'w:commentRangeStart', 'w:commentRangeEnd', 'w:commentReference'}
+# What may come between a paragraph whose mark was deleted and the one it joins
+_BETWEEN_PARAGRAPHS = {'w:p', 'w:bookmarkStart', 'w:bookmarkEnd', 'w:permStart', 'w:permEnd',
+                       'w:proofErr'}
+
+# Children of <w:settings> that must come before <w:trackRevisions> and
+# <w:documentProtection>, in schema order
+_SETTINGS_ORDER = (
+    'w:writeProtection', 'w:view', 'w:zoom', 'w:removePersonalInformation',
+    'w:removeDateAndTime', 'w:doNotDisplayPageBoundaries', 'w:displayBackgroundShape',
+    'w:printPostScriptOverText', 'w:printFractionalCharacterWidth', 'w:printFormsData',
+    'w:embedTrueTypeFonts', 'w:embedSystemFonts', 'w:saveSubsetFonts', 'w:saveFormsData',
+    'w:mirrorMargins', 'w:alignBordersAndEdges', 'w:bordersDoNotSurroundHeader',
+    'w:bordersDoNotSurroundFooter', 'w:gutterAtTop', 'w:hideSpellingErrors',
+    'w:hideGrammaticalErrors', 'w:activeWritingStyle', 'w:proofState', 'w:formsDesign',
+    'w:attachedTemplate', 'w:linkStyles', 'w:stylePaneFormatFilter', 'w:stylePaneSortMethod',
+    'w:documentType', 'w:mailMerge', 'w:revisionView', 'w:trackRevisions',
+    'w:doNotTrackMoves', 'w:doNotTrackFormatting', 'w:documentProtection')
+
+# Password hashing of <w:documentProtection>: Word runs the password
+# through the legacy Word 2007 hash (ECMA-376 Part 4, 2.15.1.28) first
+_INITIAL_CODES = (0xE1F0, 0x1D0F, 0xCC9C, 0x84C0, 0x110C, 0x0E10, 0xF1CE, 0x313E,
+                  0x1872, 0xE139, 0xD40F, 0x84F9, 0x280C, 0xA96A, 0x4EC3)
+_ENCRYPTION_MATRIX = (
+    (0xAEFC, 0x4DD9, 0x9BB2, 0x2745, 0x4E8A, 0x9D14, 0x2A09),
+    (0x7B61, 0xF6C2, 0xFDA5, 0xEB6B, 0xC6F7, 0x9DCF, 0x2BBF),
+    (0x4563, 0x8AC6, 0x05AD, 0x0B5A, 0x16B4, 0x2D68, 0x5AD0),
+    (0x0375, 0x06EA, 0x0DD4, 0x1BA8, 0x3750, 0x6EA0, 0xDD40),
+    (0xD849, 0xA0B3, 0x5147, 0xA28E, 0x553D, 0xAA7A, 0x44D5),
+    (0x6F45, 0xDE8A, 0xAD35, 0x4A4B, 0x9496, 0x390D, 0x721A),
+    (0xEB23, 0xC667, 0x9CEF, 0x29FF, 0x53FE, 0xA7FC, 0x5FD9),
+    (0x47D3, 0x8FA6, 0x0F6D, 0x1EDA, 0x3DB4, 0x7B68, 0xF6D0),
+    (0xB861, 0x60E3, 0xC1C6, 0x93AD, 0x377B, 0x6EF6, 0xDDEC),
+    (0x45A0, 0x8B40, 0x06A1, 0x0D42, 0x1A84, 0x3508, 0x6A10),
+    (0xAA51, 0x4483, 0x8906, 0x022D, 0x045A, 0x08B4, 0x1168),
+    (0x76B4, 0xED68, 0xCAF1, 0x85C3, 0x1BA7, 0x374E, 0x6E9C),
+    (0x3730, 0x6E60, 0xDCC0, 0xA9A1, 0x4363, 0x86C6, 0x1DAD),
+    (0x3331, 0x6662, 0xCCC4, 0x89A9, 0x0373, 0x06E6, 0x0DCC),
+    (0x1021, 0x2042, 0x4084, 0x8108, 0x1231, 0x2462, 0x48C4))
+# cryptAlgorithmSid / algorithmName -> hashlib name
+_HASH_ALGORITHMS = {'4': 'sha1', '12': 'sha256', '13': 'sha384', '14': 'sha512',
+                    'SHA-1': 'sha1', 'SHA-256': 'sha256', 'SHA-384': 'sha384', 'SHA-512': 'sha512'}
+SPIN_COUNT = 100000
+
+
+class ProtectionError(Exception):
+    """The document is protected with a password other than PROTECTION_PASSWORD."""
+
+
+def is_docx_package(file_path):
+    """True for a .docx-style package (not a .doc, or an encrypted file)."""
+    if not zipfile.is_zipfile(file_path):
+        return False
+    with zipfile.ZipFile(file_path) as package:
+        return 'word/document.xml' in package.namelist()
+
+
+def _legacy_password_key(password):
+    # The 32-bit key of the Word 2007 password hash, as Word feeds it to the
+    # real hash: its bytes low first, as upper-case hex
+    password = password[:15]
+    if not password:
+        return ""
+    chars = [(ord(c) & 0xFF) or (ord(c) >> 8) for c in password]
+    high = _INITIAL_CODES[len(chars) - 1]
+    for i, char in enumerate(chars):
+        row = _ENCRYPTION_MATRIX[15 - len(chars) + i]
+        for bit in range(7):
+            if char & (1 << bit):
+                high ^= row[bit]
+    low = 0
+    for char in reversed(chars):
+        low = (((low >> 14) & 1) | ((low << 1) & 0x7FFF)) ^ char
+    low = (((low >> 14) & 1) | ((low << 1) & 0x7FFF)) ^ len(chars) ^ 0xCE4B
+    key = (high << 16) | low
+    return ''.join(f"{(key >> shift) & 0xFF:02X}" for shift in (0, 8, 16, 24))
+
+
+def hash_password(password, salt, algorithm='sha512', spin_count=SPIN_COUNT, legacy=True):
+    """The documentProtection hash of password (bytes), as Word computes it."""
+    if legacy:
+        password = _legacy_password_key(password)
+    digest = hashlib.new(algorithm, salt + password.encode('utf-16-le')).digest()
+    for i in range(spin_count):
+        digest = hashlib.new(algorithm, digest + i.to_bytes(4, 'little')).digest()
+    return digest
+
+
+def _attributes(attrs):
+    return {name: double or single for name, double, single in _ATTRIBUTE_PATTERN.findall(attrs or '')}
+
+
+def _check_password(attributes, password):
+    # True when the existing protection (its attributes) opens with password
+    hash_value = attributes.get('w:hash', attributes.get('w:hashValue'))
+    salt = attributes.get('w:salt', attributes.get('w:saltValue'))
+    if not hash_value:
+        return True  # Protected without a password
+    algorithm = _HASH_ALGORITHMS.get(attributes.get('w:cryptAlgorithmSid',
+                                                    attributes.get('w:algorithmName')))
+    spin_count = attributes.get('w:cryptSpinCount', attributes.get('w:spinCount'))
+    if algorithm is None or salt is None or not (spin_count or '').isdigit():
+        return False
+    expected = base64.b64decode(hash_value)
+    salt = base64.b64decode(salt)
+    return any(hash_password(password, salt, algorithm, int(spin_count), legacy) == expected
+               for legacy in (True, False))
+
+
+def protection_element(password, salt=None):
+    """<w:documentProtection> allowing only tracked changes, with password."""
+    salt = salt if salt is not None else os.urandom(16)
+    digest = hash_password(password, salt)
+    return ('<w:documentProtection w:edit="trackedChanges" w:enforcement="1" '
+            'w:cryptProviderType="rsaAES" w:cryptAlgorithmClass="hash" '
+            'w:cryptAlgorithmType="typeAny" w:cryptAlgorithmSid="14" '
+            f'w:cryptSpinCount="{SPIN_COUNT}" '
+            f'w:hash="{base64.b64encode(digest).decode("ascii")}" '
+            f'w:salt="{base64.b64encode(salt).decode("ascii")}"/>')
+
+
+class _Open:
+    """An open element while a part is rewritten."""
+    __slots__ = ('name', 'start', 'content', 'unwrapped', 'flagged', 'has_content')
+
+    def __init__(self, name, start, unwrapped=False):
+        self.name = name
+        self.start = start          # Index of its start tag in the output
+        self.content = start + 1    # Where its content starts (after <w:pPr> for a paragraph)
+        self.unwrapped = unwrapped  # Start tag dropped; drop the end tag too
+        self.flagged = False        # Paragraph mark, table row or cell deleted; run lost its comment mark
+        self.has_content = False    # Run has something besides its properties
+
+
+def accept_revisions(xml, remove_comments=True):
+    """
+    Accepts the tracked revisions in the XML of a part and (optionally)
+    removes its comment anchors. Returns (new XML, revisions accepted,
+    comment references removed).
+    """
+    out = []
+    stack = []
+    revisions = 0
+    comment_references = 0
+    skip_depth = None  # Depth of a dropped element whose content is being skipped
+    carry = None       # (depth, paragraph, its content) of a paragraph whose mark was deleted
+    position = 0
+    for match in _TAG_PATTERN.finditer(xml):
+        if skip_depth is None and match.start() > position:
+            out.append(xml[position:match.start()])
+        position = match.end()
+        name = match.group('name')
+        if name is None:
+            if skip_depth is None:
+                out.append(match.group())
+            continue
+
+        if match.group('end'):
+            element = stack.pop()
+            if skip_depth is not None:
+                if len(stack) == skip_depth:
+                    skip_depth = None
+                continue
+            if element.unwrapped:
+                continue
+            if carry is not None and len(stack) < carry[0]:
+                # The container ends before another paragraph: the deleted mark stays
+                out.extend(carry[1])
+                carry = None
+            if name == 'w:r' and element.flagged and not element.has_content:
+                del out[element.start:]  # Only held a comment reference
+                continue
+            if name in ('w:tr', 'w:tc') and element.flagged:
+                del out[element.start:]
+                continue
+            out.append(match.group())
+            if name == 'w:pPr' and stack and stack[-1].name == 'w:p':
+                stack[-1].content = len(out)
+            elif name == 'w:p':
+                if carry is not None and carry[0] == len(stack):
+                    out[element.content:element.content] = carry[2]
+                    carry = None
+                if element.flagged:
+                    # Accepting the deleted mark joins this paragraph's text to the next one
+                    carry = (len(stack), out[element.start:], out[element.content:-1])
+                    del out[element.start:]
+            continue
+
+        empty = bool(match.group('empty'))
+        if skip_depth is not None:
+            if not empty:
+                stack.append(_Open(name, len(out)))
+            continue
+        if stack and stack[-1].name == 'w:r' and name != 'w:rPr' and \
+                not (remove_comments and name in _COMMENT_MARKS):
+            stack[-1].has_content = True
+
+        if name in _DROPPED or name in _UNWRAPPED:
+            revisions += 1
+            if name == 'w:cellDel' and [element.name for element in stack[-2:]] == ['w:tc', 'w:tcPr']:
+                stack[-2].flagged = True  # Deleted table cell
+            if empty:
+                names = [element.name for element in stack[-3:]]
+                if name in _DROPPED and names == ['w:p', 'w:pPr', 'w:rPr']:
+                    stack[-3].flagged = True  # Deleted paragraph mark
+                elif name in _DROPPED and names[-2:] == ['w:tr', 'w:trPr']:
+                    stack[-2].flagged = True  # Deleted table row
+                continue
+            if name in _DROPPED:
+                skip_depth = len(stack)
+            stack.append(_Open(name, len(out), unwrapped=True))
+            continue
+        if name in _MOVE_MARKERS or (remove_comments and name in _COMMENT_MARKS):
+            if name == 'w:commentReference':
+                comment_references += 1
+                if stack and stack[-1].name == 'w:r':
+                    stack[-1].flagged = True
+            if not empty:
+                skip_depth = len(stack)
+                stack.append(_Open(name, len(out)))
+            continue
+
+        if carry is not None and len(stack) == carry[0] and name not in _BETWEEN_PARAGRAPHS:
+            # Something other than a paragraph follows: the deleted mark stays
+            out.extend(carry[1])
+            carry = None
+        out.append(match.group())
+        if not empty:
+            stack.append(_Open(name, len(out) - 1))
+    if position < len(xml):
+        out.append(xml[position:])
+    return ''.join(out), revisions, comment_references
+
+
+def _empty_root(xml):
+    # The part with its root element emptied: <root ...></root>
+    for match in _TAG_PATTERN.finditer(xml):
+        name = match.group('name')
+        if name is None:
+            continue
+        if match.group('empty'):
+            return xml
+        return xml[:match.end()] + f"</{name}>"
+    return xml
+
+
+def _open_root(xml):
+    # The part with a self-closing root element (<root .../>) written as
+    # <root ...></root>, so children can be added to it
+    for match in _TAG_PATTERN.finditer(xml):
+        name = match.group('name')
+        if name is None:
+            continue
+        if not match.group('empty'):
+            return xml
+        start_tag = match.group()[:-2].rstrip()
+        return xml[:match.start()] + f"{start_tag}></{name}>" + xml[match.end():]
+    return xml
+
+
+def _append_to_root(xml, element):
+    # element added as the last child of the part's root element
+    xml = _open_root(xml)
+    end = xml.rindex('</')
+    return xml[:end] + element + xml[end:]
+
+
+def add_settings_part(rels_xml, content_types_xml):
+    """
+    The document relationships and content types with a settings part
+    added, for a package that has none. Returns (rels XML, content types XML).
+    """
+    ids = {int(n) for n in re.findall(r'\bId\s*=\s*["\']rId(\d+)["\']', rels_xml)}
+    relationship_id = f"rId{max(ids, default=0) + 1}"
+    rels_xml = _append_to_root(
+        rels_xml or _EMPTY_RELATIONSHIPS,
+        f'<Relationship Id="{relationship_id}" Type="{_SETTINGS_RELATIONSHIP}" '
+        f'Target="settings.xml"/>')
+    if '/word/settings.xml' not in content_types_xml:
+        content_types_xml = _append_to_root(
+            content_types_xml,
+            f'<Override PartName="/{_SETTINGS_PART}" ContentType="{_SETTINGS_CONTENT_TYPE}"/>')
+    return rels_xml, content_types_xml
+
+
+def protect_settings(xml, password=PROTECTION_PASSWORD):
+    """
+    settings.xml with tracked changes turned on and editing restricted to
+    them, protected by password. Raises ProtectionError if the document is
+    already protected with a different password.
+    """
+    xml = _open_root(xml)
+    children = []  # (name, start, end) of each child of <w:settings>
+    depth = 0
+    settings_end = None
+    for match in _TAG_PATTERN.finditer(xml):
+        name = match.group('name')
+        if name is None:
+            continue
+        if match.group('end'):
+            depth -= 1
+            if depth == 0:
+                settings_end = match.start()
+            elif depth == 1:
+                children[-1] = (children[-1][0], children[-1][1], match.end())
+            continue
+        if depth == 1:
+            children.append((name, match.start(), match.end()))
+            if name == 'w:documentProtection':
+                attributes = _attributes(match.group('attrs'))
+                enforced = attributes.get('w:enforcement', '0') in ('1', 'true', 'on')
+                if enforced and not _check_password(attributes, password):
+                    raise ProtectionError("The password is incorrect.")
+        if not match.group('empty'):
+            depth += 1
+    if settings_end is None:
+        raise ValueError("settings.xml has no <w:settings> element.")
+
+    new_elements = {'w:trackRevisions': '<w:trackRevisions/>',
+                    'w:documentProtection': protection_element(password)}
+    # Each goes before the first child that the schema puts after it
+    position = children[0][1] if children else settings_end
+    parts = [xml[:position]]
+    for name, start, end in children:
+        for new_name in list(new_elements):
+            if name not in _SETTINGS_ORDER[:_SETTINGS_ORDER.index(new_name)]:
+                parts.append(new_elements.pop(new_name))
+        if name not in ('w:trackRevisions', 'w:documentProtection'):
+            parts.append(xml[position:end])
+        position = end
+    parts.extend(new_elements.values())
+    parts.append(xml[position:])
+    return ''.join(parts)
+
+
+def clean_docx(file_path, output_path=None, password=PROTECTION_PASSWORD, log=None,
+               cancel_check=None):
+    """
+    Deletes the comments, accepts the tracked revisions and protects a
+    .docx file (only tracked changes allowed), writing the result to
+    output_path (by default the generate_clean_filename name).
+    Returns (success, messages); log and cancel_check are as for
+    process_word_document.
+    """
+    absolute_path = os.path.abspath(file_path)
+    messages = MessageLog(log, cancel_check)
+    messages.append("-" * 50)
+    messages.append(f"Starting processing for: {absolute_path}")
+    messages.append("-" * 50)
+
+    if not os.path.exists(absolute_path):
+        messages.append(f"Error: File not found at {absolute_path}")
+        return False, messages
+
+    new_save_path = os.path.abspath(output_path or generate_clean_filename(absolute_path))
+    messages.append(f"Output file will be: {new_save_path}")
+    tmp_path = f"{new_save_path}.{os.getpid()}.tmp"
+    try:
+        with zipfile.ZipFile(absolute_path) as package:
+            new_parts = {}
+            comment_count = 0
+            revision_count = 0
+            messages.append(f"Reading document: {os.path.basename(absolute_path)}...")
+            for info in package.infolist():
+                messages.check_cancelled()
+                if _COMMENTS_PART_PATTERN.match(info.filename):
+                    xml = package.read(info).decode('utf-8')
+                    if info.filename == 'word/comments.xml':
+                        comment_count = len(re.findall(r'<w:comment[\s>]', xml))
+                    new_parts[info.filename] = _empty_root(xml)
+                elif _REVISION_PART_PATTERN.match(info.filename):
+                    xml = package.read(info).decode('utf-8')
+                    if _REVISION_HINT_PATTERN.search(xml):
+                        new_xml, revisions, _ = accept_revisions(xml)
+                        revision_count += revisions
+                        if new_xml != xml:
+                            new_parts[info.filename] = new_xml
+
+            messages.append("Checking document protection status...")
+            names = set(package.namelist())
+            if _SETTINGS_PART in names:
+                settings = package.read(_SETTINGS_PART).decode('utf-8')
+            else:
+                # Optional in a package: add one (and its relationship) to protect
+                settings = _EMPTY_SETTINGS
+                rels = (package.read(_DOCUMENT_RELS_PART).decode('utf-8')
+                        if _DOCUMENT_RELS_PART in names else '')
+                new_parts[_DOCUMENT_RELS_PART], new_parts[_CONTENT_TYPES_PART] = add_settings_part(
+                    rels, package.read(_CONTENT_TYPES_PART).decode('utf-8'))
+            try:
+                settings = protect_settings(settings, password)
+            except ProtectionError as e:
+                messages.append(f"!!! CRITICAL ERROR: Could not unprotect document: {e}")
+                messages.append("    Aborting processing.")
+                return False, messages
+            new_parts[_SETTINGS_PART] = settings
+
+            messages.append(f"{comment_count} comments deleted." if comment_count
+                            else "No comments found to delete.")
+            messages.append(f"{revision_count} revisions accepted." if revision_count
+                            else "No revisions found to accept.")
+            messages.append("Document protected (only tracked changes allowed).")
+
+            messages.check_cancelled()
+            messages.append(f"Saving document as: {os.path.basename(new_save_path)}...")
+            with zipfile.ZipFile(tmp_path, 'w') as output:
+                for info in package.infolist():
+                    xml = new_parts.get(info.filename)
+                    output.writestr(info, xml.encode('utf-8') if xml is not None
+                                    else package.read(info))
+                for name in sorted(set(new_parts) - names):
+                    output.writestr(name, new_parts[name].encode('utf-8'), zipfile.ZIP_DEFLATED)
+        os.replace(tmp_path, new_save_path)
+
+        messages.append("-" * 50)
+        messages.append(f"Processing completed successfully! Output: {new_save_path}")
+        messages.append("-" * 50)
+        return True, messages
+
+    except CleanCancelled:
+        messages.append("Processing cancelled; nothing was saved.")
+        return False, messages
+
+    except Exception as e:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        messages.append("\n" + "=" * 50)
+        messages.append("!!! An Error Occurred !!!")
+        messages.append(f"    Error Type: {type(e).__name__}")
+        messages.append(f"    Details: {e}")
+        messages.append("=" * 50 + "\n")
+        return False, messages
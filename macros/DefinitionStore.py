@@ -0,0 +1,213 @@
+# macros/DefinitionStore.py
+import os
+
+# Edits made in the app are appended to '<user file>.journal' before they
+# are folded into the user file (see UserDefinitions.py)
+JOURNAL_SUFFIX = ".journal"
+
+
+def _file_signature(filepath):
+    """Returns (mtime_ns, size) for a file, or None if it can't be stat'ed."""
+    try:
+        st = os.stat(filepath)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def load_definitions_from_file(filepath):
+    """Loads a tab-separated 'ACRONYM<TAB>Definition' file into a dict.
+       When an acronym appears more than once, the first line wins
+       (the same result a top-to-bottom scan of the file would give).
+    """
+    definitions = {}
+    if filepath and os.path.exists(filepath):
+        try:
+            with open(filepath, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if '\t' in line:
+                        acronym, definition = line.split("\t", 1)
+                        definitions.setdefault(acronym, definition)
+        except Exception as e:
+            print(f"Warning: Could not load definitions from {filepath}: {e}")
+    return definitions
+
+
+def get_journal_path(user_definition_path):
+    return user_definition_path + JOURNAL_SUFFIX
+
+
+def _read_journal(journal_path):
+    # (definitions, number of complete lines) of a journal
+    definitions = {}
+    lines = 0
+    if not os.path.exists(journal_path):
+        return definitions, lines
+    try:
+        with open(journal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    break
+                lines += 1
+                line = line.strip()
+                if '\t' in line:
+                    acronym, definition = line.split("\t", 1)
+                    definitions[acronym] = definition
+    except Exception as e:
+        print(f"Warning: Could not load definition journal {journal_path}: {e}")
+    return definitions, lines
+
+
+def load_journal(journal_path):
+    """
+    Reads journaled 'ACRONYM<TAB>Definition' edits; later lines win. A last
+    line without a newline (an append cut short) is ignored.
+    """
+    return _read_journal(journal_path)[0]
+
+
+def load_user_definitions(user_definition_path):
+    """The user definitions file with the journaled edits applied."""
+    definitions = load_definitions_from_file(user_definition_path)
+    definitions.update(load_journal(get_journal_path(user_definition_path)))
+    return definitions
+
+
+class UserDefinitionFiles:
+    """
+    The user definitions file and its journal, held in memory. They are
+    only reread when their mtime or size changes behind the app's back;
+    the app's own appends and compactions update the copy in memory
+    instead (record_append / record_compact), so saving an edit doesn't
+    read either file. Shared by every DefinitionStore using the file.
+    """
+
+    def __init__(self, user_definition_path):
+        self.user_definition_path = user_definition_path
+        self.journal_path = get_journal_path(user_definition_path)
+        self.definitions = {}   # Replaced, never changed in place
+        self.journal_lines = 0  # Complete lines in the journal
+        self._sig = None
+        self._loaded = False
+        self.generation = 0     # Bumped whenever the definitions change
+
+    def _signature(self):
+        return (_file_signature(self.user_definition_path), _file_signature(self.journal_path))
+
+    def refresh(self):
+        """Rereads the files if they changed on disk. Returns True if they did."""
+        sig = self._signature()
+        if sig == self._sig and self._loaded:
+            return False
+        definitions = load_definitions_from_file(self.user_definition_path)
+        journaled, self.journal_lines = _read_journal(self.journal_path)
+        definitions.update(journaled)
+        self.definitions = definitions
+        self._sig = sig
+        self._loaded = True
+        self.generation += 1
+        return True
+
+    def record_append(self, changes, lines):
+        """The app appended lines journal lines holding changes."""
+        self.definitions = {**self.definitions, **changes}
+        self.journal_lines += lines
+        self._sig = self._signature()
+        self.generation += 1
+
+    def record_compact(self):
+        """The app folded the journal into the file (same definitions)."""
+        self.journal_lines = 0
+        self._sig = self._signature()
+
+
+_user_files = {}
+
+
+def get_user_definition_files(user_definition_path):
+    """Returns the shared UserDefinitionFiles for a user definitions file."""
+    files = _user_files.get(user_definition_path)
+    if files is None:
+        files = _user_files[user_definition_path] = UserDefinitionFiles(user_definition_path)
+    return files
+
+
+class DefinitionStore:
+    """
+    In-memory index of the base and user acronym definitions.
+    Both files (and the user file's journal) are read once and only reloaded
+    when their mtime or size changes, so lookups are plain dict hits. User
+    definitions take precedence over base definitions.
+    """
+
+    def __init__(self, base_definition_path, user_definition_path):
+        self.base_definition_path = base_definition_path
+        self.user_definition_path = user_definition_path
+        self._base_defs = {}
+        self._user_files = get_user_definition_files(user_definition_path)
+        self._base_sig = None
+        self._user_generation = None
+        self._combined = {}
+        self._loaded = False
+        # Bumped whenever the combined definitions change, so caches built
+        # from them (e.g. the acronym verdict cache) know to start over.
+        self.generation = 0
+
+    def refresh(self):
+        """Reloads any definition file whose mtime/size has changed."""
+        changed = not self._loaded
+
+        base_sig = _file_signature(self.base_definition_path)
+        if base_sig != self._base_sig or not self._loaded:
+            self._base_defs = load_definitions_from_file(self.base_definition_path)
+            self._base_sig = base_sig
+            changed = True
+
+        self._user_files.refresh()
+        if self._user_files.generation != self._user_generation:
+            self._user_generation = self._user_files.generation
+            changed = True
+
+        if changed:
+            self._combined = {**self._base_defs, **self._user_files.definitions}
+            self._loaded = True
+            self.generation += 1
+        return changed
+
+    def get(self, acronym, default=""):
+        """Returns the definition for one acronym (user list first)."""
+        self.refresh()
+        return self._combined.get(acronym, default)
+
+    def get_many(self, acronyms, default=""):
+        """Returns {acronym: definition} for every acronym in the iterable."""
+        self.refresh()
+        combined = self._combined
+        return {acronym: combined.get(acronym, default) for acronym in acronyms}
+
+    def defined_acronyms(self):
+        """Returns the set of every acronym that has a definition."""
+        self.refresh()
+        return set(self._combined)
+
+    def __contains__(self, acronym):
+        self.refresh()
+        return acronym in self._combined
+
+    def __len__(self):
+        self.refresh()
+        return len(self._combined)
+
+
+_stores = {}
+
+
+def get_definition_store(base_definition_path, user_definition_path):
+    """Returns the shared DefinitionStore for this pair of files."""
+    key = (base_definition_path, user_definition_path)
+    store = _stores.get(key)
+    if store is None:
+        store = DefinitionStore(base_definition_path, user_definition_path)
+        _stores[key] = store
+    return store
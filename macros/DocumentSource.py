@@ -0,0 +1,268 @@
+# macros/DocumentSource.py
+# Where the acronym scan gets its text from. The bulk COM source pulls each
+# story range with a single .Text call and splits paragraphs locally, instead
+# of two or more cross-process COM calls per paragraph. The .docx source
+# reads the document's XML parts directly, without Word.
+import os
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+
+# Word story types (WdStoryType)
+WD_MAIN_TEXT_STORY = 1
+WD_FOOTNOTES_STORY = 2
+WD_ENDNOTES_STORY = 3
+WD_COMMENTS_STORY = 4
+WD_TEXT_FRAME_STORY = 5
+WD_EVEN_PAGES_HEADER_STORY = 6
+WD_PRIMARY_HEADER_STORY = 7
+WD_EVEN_PAGES_FOOTER_STORY = 8
+WD_PRIMARY_FOOTER_STORY = 9
+WD_FIRST_PAGE_HEADER_STORY = 10
+WD_FIRST_PAGE_FOOTER_STORY = 11
+
+HEADER_FOOTER_STORIES = {
+    WD_EVEN_PAGES_HEADER_STORY, WD_PRIMARY_HEADER_STORY,
+    WD_EVEN_PAGES_FOOTER_STORY, WD_PRIMARY_FOOTER_STORY,
+    WD_FIRST_PAGE_HEADER_STORY, WD_FIRST_PAGE_FOOTER_STORY,
+}
+
+# Main text, footnotes, endnotes, text boxes, headers and footers.
+# Comments are left out on purpose: they are not part of the document body.
+DEFAULT_STORIES = (
+    WD_MAIN_TEXT_STORY, WD_FOOTNOTES_STORY, WD_ENDNOTES_STORY,
+    WD_TEXT_FRAME_STORY,
+    WD_PRIMARY_HEADER_STORY, WD_FIRST_PAGE_HEADER_STORY, WD_EVEN_PAGES_HEADER_STORY,
+    WD_PRIMARY_FOOTER_STORY, WD_FIRST_PAGE_FOOTER_STORY, WD_EVEN_PAGES_FOOTER_STORY,
+)
+
+# A paragraph is everything up to and including its '\r' paragraph mark,
+# which is exactly what Paragraph.Range.Text returns.
+_paragraph_pattern = re.compile(r'[^\r]*\r|[^\r]+')
+
+
+def split_paragraphs(text):
+    """Splits story text into paragraphs, keeping each '\\r' terminator."""
+    if not text:
+        return []
+    return _paragraph_pattern.findall(text)
+
+
+class DocumentSource:
+    """Base class: yields the document's paragraphs as plain strings."""
+
+    # Identifies the document across scans (its full path) for ScanCache,
+    # or None when results shouldn't be cached.
+    identity = None
+
+    def iter_paragraphs(self):
+        raise NotImplementedError
+
+    def get_text(self):
+        # Same joining the acronym scan has always used
+        return ' '.join(self.iter_paragraphs())
+
+
+class TextDocumentSource(DocumentSource):
+    """Paragraphs from a plain string or list of strings (tests, .docx files)."""
+
+    def __init__(self, text_or_paragraphs):
+        if isinstance(text_or_paragraphs, str):
+            self.paragraphs = split_paragraphs(text_or_paragraphs)
+        else:
+            self.paragraphs = list(text_or_paragraphs)
+
+    def iter_paragraphs(self):
+        return iter(self.paragraphs)
+
+
+def _com_document_identity(doc):
+    try:
+        return doc.FullName or None
+    except Exception:
+        return None
+
+
+class ParagraphComDocumentSource(DocumentSource):
+    """The original path: one Range.Text round-trip per main-text paragraph."""
+
+    def __init__(self, doc):
+        self.doc = doc
+
+    @property
+    def identity(self):
+        return _com_document_identity(self.doc)
+
+    def iter_paragraphs(self):
+        for p in self.doc.Paragraphs:
+            yield p.Range.Text
+
+
+class BulkComDocumentSource(DocumentSource):
+    """
+    Reads whole story ranges (main text, footnotes, endnotes, text boxes,
+    headers and footers) with one .Text call each and splits them into
+    paragraphs locally. Linked headers/footers repeat the same text in
+    every section, so identical header/footer stories are only read once.
+    """
+
+    def __init__(self, doc, stories=DEFAULT_STORIES):
+        self.doc = doc
+        self.stories = tuple(stories)
+
+    @property
+    def identity(self):
+        return _com_document_identity(self.doc)
+
+    def iter_story_texts(self):
+        # Each story is yielded as soon as it has been read, in Word's
+        # StoryRanges order (main text first), so a scan can report
+        # progress or stop between stories
+        wanted = set(self.stories)
+        seen_header_footer = set()
+        for story in self.doc.StoryRanges:
+            story_type = story.StoryType
+            if story_type not in wanted:
+                continue
+            current_story = story
+            while current_story is not None:
+                text = current_story.Text
+                if story_type in HEADER_FOOTER_STORIES:
+                    if text not in seen_header_footer:
+                        seen_header_footer.add(text)
+                        yield story_type, text
+                elif text:
+                    yield story_type, text
+                current_story = current_story.NextStoryRange
+
+    def iter_paragraphs(self):
+        for _, text in self.iter_story_texts():
+            yield from split_paragraphs(text)
+
+
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_W_P = _W + 'p'
+_W_R = _W + 'r'
+_W_T = _W + 't'
+# Run content that Range.Text returns as a control character
+_W_RUN_CHARS = {_W + 'tab': '\t', _W + 'br': '\x0b', _W + 'cr': '\x0b'}
+_MC_FALLBACK = '{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback'
+
+_part_number_pattern = re.compile(r'(\d+)\.xml$')
+
+
+def iter_docx_part_paragraphs(fileobj):
+    """
+    Streams the paragraphs of one WordprocessingML part (document.xml,
+    footnotes.xml, header1.xml, ...) as Range.Text-style strings ending in
+    '\r'. Paragraphs nested in text boxes come before the one holding them.
+    """
+    # Text boxes are saved twice, as a drawing (mc:Choice) and as VML for
+    # older readers (mc:Fallback); Word only reads one, so the fallback
+    # copy is skipped
+    in_fallback = 0
+    for event, elem in ET.iterparse(fileobj, events=('start', 'end')):
+        tag = elem.tag
+        if tag == _MC_FALLBACK:
+            in_fallback += 1 if event == 'start' else -1
+            if event == 'end':
+                elem.clear()
+            continue
+        if event != 'end' or tag != _W_P:
+            continue
+        if in_fallback:
+            elem.clear()
+            continue
+        pieces = []
+        # Only run content counts: <w:tab> also defines tab stops in the
+        # paragraph properties. Nested paragraphs were cleared when yielded.
+        for run in elem.iter(_W_R):
+            for child in run:
+                tag = child.tag
+                if tag == _W_T:
+                    pieces.append(child.text or '')
+                elif tag in _W_RUN_CHARS:
+                    pieces.append(_W_RUN_CHARS[tag])
+        yield ''.join(pieces) + '\r'
+        elem.clear()
+
+
+def _part_number(name):
+    match = _part_number_pattern.search(name)
+    return int(match.group(1)) if match else 0
+
+
+def _docx_story_parts(names):
+    """The story parts of a .docx in DEFAULT_STORIES order."""
+    def numbered(prefix):
+        parts = [n for n in names if n.startswith(prefix) and n.endswith('.xml')]
+        return sorted(parts, key=lambda n: (_part_number(n), n))
+    parts = [(WD_MAIN_TEXT_STORY, 'word/document.xml'),
+             (WD_FOOTNOTES_STORY, 'word/footnotes.xml'),
+             (WD_ENDNOTES_STORY, 'word/endnotes.xml')]
+    parts += [(WD_PRIMARY_HEADER_STORY, n) for n in numbered('word/header')]
+    parts += [(WD_PRIMARY_FOOTER_STORY, n) for n in numbered('word/footer')]
+    return [(story_type, name) for story_type, name in parts if name in names]
+
+
+class DocxDocumentSource(DocumentSource):
+    """
+    Reads a .docx file straight from its XML parts, without Word: main text
+    (including text boxes), footnotes, endnotes, headers and footers.
+    Identical header/footer parts are only read once, as with the bulk
+    COM source.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    @property
+    def identity(self):
+        return os.path.abspath(self.path)
+
+    def iter_story_texts(self):
+        with zipfile.ZipFile(self.path) as package:
+            names = set(package.namelist())
+            seen_header_footer = set()
+            for story_type, name in _docx_story_parts(names):
+                with package.open(name) as part:
+                    text = ''.join(iter_docx_part_paragraphs(part))
+                if story_type in HEADER_FOOTER_STORIES:
+                    if text in seen_header_footer:
+                        continue
+                    seen_header_footer.add(text)
+                if text:
+                    yield story_type, text
+
+    def iter_paragraphs(self):
+        for _, text in self.iter_story_texts():
+            yield from split_paragraphs(text)
+
+
+def find_docx_files(paths, recursive=True):
+    """
+    Expands files and folders into a list of .docx paths. Word's '~$' lock
+    files are skipped. Folders are listed in sorted order.
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, dirnames, filenames in os.walk(path):
+                dirnames.sort()
+                for filename in sorted(filenames):
+                    if filename.lower().endswith('.docx') and not filename.startswith('~$'):
+                        files.append(os.path.join(dirpath, filename))
+                if not recursive:
+                    break
+        else:
+            files.append(path)
+    return list(dict.fromkeys(files))
+
+
+def get_document_source(doc, bulk=True, stories=DEFAULT_STORIES):
+    """Returns the DocumentSource to use for a Word document."""
+    if bulk:
+        return BulkComDocumentSource(doc, stories)
+    return ParagraphComDocumentSource(doc)
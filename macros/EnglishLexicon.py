@@ -0,0 +1,165 @@
+# macros/EnglishLexicon.py
+import os
+import sys
+import pickle
+import functools
+
+LEXICON_VERSION = 1
+LEXICON_FILENAME = "english_lexicon.pickle"
+
+# Same part-of-speech order and suffix rules WordNet's morphy() uses,
+# so a lookup here answers exactly what wordnet.synsets(word) would.
+POS_LIST = ('n', 'v', 'a', 'r')
+MORPHOLOGICAL_SUBSTITUTIONS = {
+    'n': [('s', ''), ('ses', 's'), ('ves', 'f'), ('xes', 'x'), ('zes', 'z'),
+          ('ches', 'ch'), ('shes', 'sh'), ('men', 'man'), ('ies', 'y')],
+    'v': [('s', ''), ('ies', 'y'), ('es', 'e'), ('es', ''), ('ed', 'e'),
+          ('ed', ''), ('ing', 'e'), ('ing', '')],
+    'a': [('er', ''), ('est', ''), ('er', 'e'), ('est', 'e')],
+    'r': [],
+}
+
+
+def get_user_lexicon_path():
+    return os.path.join(os.path.expanduser("~"), ".doc_companion", LEXICON_FILENAME)
+
+
+def get_bundled_lexicon_path():
+    """Path of the lexicon shipped inside a PyInstaller bundle, if any."""
+    base_path = getattr(sys, '_MEIPASS', None)
+    if base_path is None:
+        return None
+    return os.path.join(base_path, 'lexicon', LEXICON_FILENAME)
+
+
+def _import_wordnet():
+    """Imports nltk's WordNet reader, pointing nltk at bundled data first."""
+    import nltk
+    # --- NLTK data path for PyInstaller ---
+    if getattr(sys, 'frozen', False) and hasattr(sys, '_MEIPASS'):
+        nltk_data_dir = os.path.join(sys._MEIPASS, 'nltk_data')
+        if nltk_data_dir not in nltk.data.path:
+            nltk.data.path.append(nltk_data_dir)
+    # --- End NLTK data path for PyInstaller ---
+    from nltk.corpus import wordnet
+    return wordnet
+
+
+def build_lexicon_data():
+    """Reads every lemma and morphy exception out of the WordNet corpus."""
+    wordnet = _import_wordnet()
+    lemmas = {}
+    exceptions = {}
+    for pos in POS_LIST:
+        lemmas[pos] = frozenset(wordnet.all_lemma_names(pos=pos))
+        exc_map = getattr(wordnet, '_exception_map', {}).get(pos, {})
+        exceptions[pos] = {form: tuple(bases) for form, bases in exc_map.items()}
+    return {'version': LEXICON_VERSION, 'lemmas': lemmas, 'exceptions': exceptions}
+
+
+def build_lexicon(output_path=None):
+    """Builds the lexicon from WordNet and writes it to output_path."""
+    output_path = output_path or get_user_lexicon_path()
+    data = build_lexicon_data()
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    # Unique per process, so parallel builds don't write the same file
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, output_path)
+    print(f"English lexicon written to: {output_path}")
+    return data
+
+
+def load_lexicon_data(path):
+    """Loads a lexicon pickle, returning None if it is missing or stale."""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+    except Exception as e:
+        print(f"Warning: Could not load English lexicon from {path}: {e}")
+        return None
+    if not isinstance(data, dict) or data.get('version') != LEXICON_VERSION:
+        return None
+    return data
+
+
+@functools.lru_cache(maxsize=8192)
+def _live_is_english_word(word):
+    """Fallback to the live WordNet corpus (slow first call)."""
+    return bool(_import_wordnet().synsets(word))
+
+
+class EnglishLexicon:
+    """
+    Precomputed WordNet lemma sets with a local copy of morphy's
+    suffix rules. When no lexicon could be loaded or built, lookups fall
+    back to the live corpus through an LRU cache.
+    """
+
+    def __init__(self, data=None):
+        self._lemmas = data['lemmas'] if data else None
+        self._exceptions = data['exceptions'] if data else None
+
+    @property
+    def available(self):
+        return self._lemmas is not None
+
+    def _has_form(self, word, pos):
+        lemmas = self._lemmas[pos]
+        if word in lemmas:
+            return True
+        exception_forms = self._exceptions[pos].get(word)
+        if exception_forms is not None:
+            return any(form in lemmas for form in exception_forms)
+        # Like nltk's _morphy, the rules are applied again to each new form
+        # until one of them is a lemma (or no rule applies any more)
+        substitutions = MORPHOLOGICAL_SUBSTITUTIONS[pos]
+        forms = [word]
+        while forms:
+            forms = list(dict.fromkeys(form[:-len(old)] + new
+                                       for form in forms
+                                       for old, new in substitutions
+                                       if form.endswith(old)))
+            if any(form in lemmas for form in forms):
+                return True
+        return False
+
+    def is_english_word(self, word):
+        if self._lemmas is None:
+            return _live_is_english_word(word)
+        word = word.lower()
+        return any(self._has_form(word, pos) for pos in POS_LIST)
+
+
+_lexicon = None
+
+
+def get_english_lexicon():
+    """
+    Returns the shared lexicon. Looks for a bundled copy first, then the
+    cached one under ~/.doc_companion, and builds the cache from WordNet
+    if neither exists.
+    """
+    global _lexicon
+    if _lexicon is not None:
+        return _lexicon
+
+    data = load_lexicon_data(get_bundled_lexicon_path())
+    if data is None:
+        data = load_lexicon_data(get_user_lexicon_path())
+    if data is None:
+        try:
+            data = build_lexicon()
+        except Exception as e:
+            print(f"Warning: Could not build English lexicon, using live WordNet: {e}")
+            data = None
+    _lexicon = EnglishLexicon(data)
+    return _lexicon
+
+
+if __name__ == "__main__":
+    # python -m macros.EnglishLexicon [output_path]
+    build_lexicon(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,476 @@
+# macros/FakeWord.py
+# Minimal stand-ins for the Word COM objects the macros touch, so the text
+# processing can be exercised and benchmarked without Word (e.g. on Linux).
+# Every property read that would be a cross-process call in real COM bumps
+# FakeWordApplication.com_calls.
+import os
+import re
+import weakref
+
+from .DocumentSource import WD_MAIN_TEXT_STORY, split_paragraphs
+from .WordWildcards import compile_wildcard
+
+WD_NO_PROTECTION = -1
+WD_REPLACE_ALL = 2
+
+
+class _CallCounter:
+    def __init__(self):
+        self.count = 0
+
+
+class FakeFields:
+    def __init__(self, count, counter, story=None):
+        self._count = count
+        self._counter = counter
+        self._story = story
+        self.updates = 0
+
+    @property
+    def Count(self):
+        self._counter.count += 1
+        return self._count
+
+    def Update(self):
+        self._counter.count += 1
+        self.updates += 1
+        # Word finds the fields by going through the story's text
+        if self._story is not None:
+            split_paragraphs(self._story._text)
+        return 0
+
+
+class FakeRange:
+    def __init__(self, text, counter, story_type=WD_MAIN_TEXT_STORY, next_story=None, fields=0):
+        self._text = text
+        self._counter = counter
+        self._story_type = story_type
+        self._next_story = next_story
+        self._fields = FakeFields(fields, counter, self)
+
+    @property
+    def Fields(self):
+        self._counter.count += 1
+        return self._fields
+
+    @property
+    def Text(self):
+        self._counter.count += 1
+        return self._text
+
+    @Text.setter
+    def Text(self, value):
+        self._counter.count += 1
+        self._text = value
+
+    @property
+    def StoryType(self):
+        self._counter.count += 1
+        return self._story_type
+
+    @property
+    def NextStoryRange(self):
+        self._counter.count += 1
+        return self._next_story
+
+
+class FakeParagraph:
+    def __init__(self, text, counter):
+        self._range = FakeRange(text, counter)
+        self._counter = counter
+
+    @property
+    def Range(self):
+        self._counter.count += 1
+        return self._range
+
+
+class FakeDocument:
+    """
+    stories maps a WdStoryType to a list of story texts; more than one text
+    for a type is chained through NextStoryRange (e.g. one header per section).
+    """
+
+    def __init__(self, stories=None, name="Fake.docx", path="", comments=0, revisions=0,
+                 fields=0, protection_type=WD_NO_PROTECTION, password=None):
+        self._counter = _CallCounter()
+        self.Name = name
+        self.Path = path
+        self.saved = False
+        self.saved_as = None
+        self.saved_bytes = 0
+        self.closed = False
+        self._comments = comments
+        self._revisions = revisions
+        self._protection_type = protection_type
+        self._password = password
+        self._stories = {}
+        for story_type, texts in (stories or {}).items():
+            if isinstance(texts, str):
+                texts = [texts]
+            next_story = None
+            for text in reversed(texts):
+                next_story = FakeRange(text, self._counter, story_type, next_story, fields)
+            if next_story is not None:
+                self._stories[story_type] = next_story
+
+    @classmethod
+    def from_paragraphs(cls, paragraphs, **kwargs):
+        """Builds a document whose main story is the given paragraphs."""
+        text = ''.join(p if p.endswith('\r') else p + '\r' for p in paragraphs)
+        return cls({WD_MAIN_TEXT_STORY: [text]}, **kwargs)
+
+    @property
+    def com_calls(self):
+        return self._counter.count
+
+    @property
+    def FullName(self):
+        self._counter.count += 1
+        return self.Path + "\\" + self.Name if self.Path else self.Name
+
+    @property
+    def Content(self):
+        self._counter.count += 1
+        return self._stories.get(WD_MAIN_TEXT_STORY) or FakeRange("", self._counter)
+
+    @property
+    def StoryRanges(self):
+        self._counter.count += 1
+        return [self._stories[t] for t in sorted(self._stories)]
+
+    @property
+    def Paragraphs(self):
+        self._counter.count += 1
+        main_text = self._stories[WD_MAIN_TEXT_STORY]._text if WD_MAIN_TEXT_STORY in self._stories else ""
+        return [FakeParagraph(p, self._counter) for p in split_paragraphs(main_text)]
+
+    @property
+    def ProtectionType(self):
+        self._counter.count += 1
+        return self._protection_type
+
+    def Protect(self, Type, Password=None, **kwargs):
+        self._counter.count += 1
+        self._protection_type = Type
+        self._password = Password
+
+    def Unprotect(self, Password=None):
+        self._counter.count += 1
+        if self._password is not None and Password != self._password:
+            raise Exception("The password is incorrect.")
+        self._protection_type = WD_NO_PROTECTION
+
+    @property
+    def Comments(self):
+        self._counter.count += 1
+        return _FakeCollection(self._comments, self._counter)
+
+    def _walk_text(self):
+        # Whole-document operations go through all of the text, as Word's
+        # do, so their cost grows with the document. Returns its size in
+        # bytes as Word stores it (UTF-16).
+        size = 0
+        for story in self._stories.values():
+            while story is not None:
+                size += sum(len(p.encode('utf-16-le')) for p in split_paragraphs(story._text))
+                story = story._next_story
+        return size
+
+    def DeleteAllComments(self):
+        self._counter.count += 1
+        self._walk_text()
+        self._comments = 0
+
+    @property
+    def Revisions(self):
+        self._counter.count += 1
+        return _FakeCollection(self._revisions, self._counter)
+
+    def AcceptAllRevisions(self):
+        self._counter.count += 1
+        self._walk_text()
+        self._revisions = 0
+
+    def Save(self):
+        self._counter.count += 1
+        self.saved_bytes = self._walk_text()
+        self.saved = True
+
+    def SaveAs(self, FileName, *args, **kwargs):
+        self._counter.count += 1
+        self.saved_bytes = self._walk_text()
+        self.saved_as = FileName
+
+    def Close(self, SaveChanges=None, *args, **kwargs):
+        self._counter.count += 1
+        self.closed = True
+
+
+class _FakeCollection:
+    def __init__(self, count, counter):
+        self._count = count
+        self._counter = counter
+
+    @property
+    def Count(self):
+        self._counter.count += 1
+        return self._count
+
+
+class FakeReplacement:
+    def __init__(self):
+        self.Text = ""
+
+    def ClearFormatting(self):
+        pass
+
+
+class FakeFind:
+    """
+    Find object of a FakeSelection or FakeTextRange. Execute(Replace=wdReplaceAll)
+    replaces every match in the selection text; on a range, Execute() finds
+    the first match in it. With MatchWildcards the find text is a Word
+    wildcard pattern (see macros/WordWildcards.py).
+    """
+
+    def __init__(self, selection):
+        self._selection = selection
+        self.Replacement = FakeReplacement()
+        self.Text = ""
+        self.Forward = True
+        self.Wrap = 0
+        self.Format = False
+        self.MatchCase = False
+        self.MatchWholeWord = False
+        self.MatchWildcards = False
+        self.MatchSoundsLike = False
+        self.MatchAllWordForms = False
+
+    def ClearFormatting(self):
+        pass
+
+    def Execute(self, Replace=0, **kwargs):
+        selection = self._selection
+        selection._counter.count += 1
+        replacement = self.Replacement.Text
+        if self.MatchWildcards:
+            regex, template = compile_wildcard(self.Text, replacement)
+        else:
+            pattern = re.escape(self.Text)
+            if self.MatchWholeWord:
+                pattern = rf'\b{pattern}\b'
+            regex = re.compile(pattern, 0 if self.MatchCase else re.IGNORECASE)
+            template = None
+        if isinstance(selection, FakeTextRange):
+            match = regex.search(selection._selection._text, selection.start, selection.end)
+            if match is None:
+                return False
+            selection.start, selection.end = match.span()
+            return True
+        if Replace != WD_REPLACE_ALL:
+            return regex.search(selection._text) is not None
+        text, count = regex.subn(
+            lambda m: m.expand(template) if template is not None else replacement, selection._text)
+        selection._text = text
+        selection.replacements += count
+        return count > 0
+
+
+class FakeTextRange:
+    """
+    A Range over (part of) the selection text, for ranged edits: Duplicate,
+    SetRange, Text, and Find, whose Execute() (without Replace) moves the
+    range to the first match. Writing Text moves the other live ranges the
+    way Word does.
+    """
+
+    def __init__(self, selection, start, end):
+        self._selection = selection
+        self._counter = selection._counter
+        self.start = start
+        self.end = end
+        selection._ranges.add(self)
+
+    @property
+    def Start(self):
+        self._counter.count += 1
+        return self.start
+
+    @property
+    def End(self):
+        self._counter.count += 1
+        return self.end
+
+    @property
+    def Duplicate(self):
+        self._counter.count += 1
+        return FakeTextRange(self._selection, self.start, self.end)
+
+    def SetRange(self, Start, End):
+        self._counter.count += 1
+        length = len(self._selection._text)
+        self.start = min(max(Start, 0), length)
+        self.end = min(max(End, self.start), length)
+
+    @property
+    def Text(self):
+        self._counter.count += 1
+        return self._selection._text[self.start:self.end]
+
+    @Text.setter
+    def Text(self, value):
+        self._counter.count += 1
+        selection = self._selection
+        start, end = self.start, self.end
+        selection._text = selection._text[:start] + value + selection._text[end:]
+        delta = len(value) - (end - start)
+        for other in list(selection._ranges):
+            if other is self:
+                continue
+            if other.start >= end:
+                other.start += delta
+            if other.end >= end:
+                other.end += delta
+        self.end = start + len(value)
+
+    @property
+    def Find(self):
+        self._counter.count += 1
+        return FakeFind(self)
+
+
+class FakeSelection:
+    def __init__(self, text, counter):
+        self._text = text
+        self._counter = counter
+        self._ranges = weakref.WeakSet()  # Live FakeTextRanges
+        self.replacements = 0
+
+    @property
+    def Range(self):
+        self._counter.count += 1
+        return FakeTextRange(self, 0, len(self._text))
+
+    @property
+    def Text(self):
+        self._counter.count += 1
+        return self._text
+
+    @Text.setter
+    def Text(self, value):
+        self._counter.count += 1
+        self._text = value
+
+    @property
+    def Find(self):
+        self._counter.count += 1
+        return FakeFind(self)
+
+
+class FakeDocuments:
+    def __init__(self, app):
+        self._app = app
+
+    @property
+    def Count(self):
+        return len(self._app.documents)
+
+    def Open(self, FileName, *args, **kwargs):
+        """Opens the fake registered for FileName (or a blank one)."""
+        path = os.path.abspath(FileName)
+        doc = self._app.files.get(path)
+        if doc is None:
+            doc = FakeDocument(name=os.path.basename(path), path=os.path.dirname(path))
+        self._app.documents.append(doc)
+        return doc
+
+
+class FakeWordApplication:
+    """
+    documents are the open documents (the last one is active); files maps
+    paths to the FakeDocument that Documents.Open returns for them, and
+    selection is the text of the current Selection.
+    """
+
+    def __init__(self, documents=None, files=None, selection=""):
+        self.documents = list(documents or [])
+        self.files = {os.path.abspath(path): doc for path, doc in (files or {}).items()}
+        self.Visible = False
+        self.DisplayAlerts = False
+        self.BackgroundSavingStatus = 0
+        self.quit = False
+        self._selection_counter = _CallCounter()
+        self._selection = FakeSelection(selection, self._selection_counter)
+
+    @property
+    def Documents(self):
+        return FakeDocuments(self)
+
+    @property
+    def Selection(self):
+        self._selection_counter.count += 1
+        return self._selection
+
+    def Activate(self):
+        pass
+
+    def Quit(self, *args, **kwargs):
+        self.quit = True
+
+    @property
+    def ActiveDocument(self):
+        if not self.documents:
+            raise Exception("No document is open.")
+        return self.documents[-1]
+
+    @property
+    def com_calls(self):
+        return self._selection_counter.count + sum(doc.com_calls for doc in self.documents)
+
+
+class FakeWordEvents:
+    """
+    Simulated Word application events. attach(word_app, sink) stands in
+    for connecting to Word's events (e.g. as ActiveDocumentTracker's
+    attach_events); the other methods change the fake application the way
+    the user would in Word and call the sink's on_* methods to match.
+    """
+
+    def __init__(self, word_app):
+        self.word_app = word_app
+        self.sinks = []
+
+    def attach(self, word_app, sink):
+        if word_app is not self.word_app:
+            raise Exception("Events are only simulated for one fake Word application.")
+        self.sinks.append(sink)
+        return self
+
+    def close(self):
+        self.sinks = []
+
+    def _fire(self, event):
+        for sink in list(self.sinks):
+            getattr(sink, event)()
+
+    def open_document(self, doc):
+        self.word_app.documents.append(doc)
+        self._fire('on_document_change')
+
+    def activate_document(self, doc):
+        self.word_app.documents.remove(doc)
+        self.word_app.documents.append(doc)
+        self._fire('on_document_change')
+
+    def close_document(self, doc):
+        self._fire('on_document_before_close')
+        self.word_app.documents.remove(doc)
+        doc.closed = True
+        if self.word_app.documents:
+            self._fire('on_document_change')
+
+    def quit(self):
+        self._fire('on_quit')
+        self.word_app.documents.clear()
+        self.word_app.quit = True
@@ -0,0 +1,126 @@
+# macros/PhraseMatcher.py
+# Aho-Corasick automaton: finds every occurrence of many phrases in a single
+# pass over the text, however long the phrase list is.
+import functools
+import re
+from collections import deque
+
+
+class PhraseMatcher:
+    """
+    Multi-phrase matcher. The automaton is immutable once built, so one
+    instance can be shared; use scan() for incremental matching.
+    """
+
+    def __init__(self, phrases):
+        self.phrases = tuple(dict.fromkeys(p for p in phrases if p))
+        # Node 0 is the root. goto[node] maps a character to the next node.
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]  # Phrases ending at this node (as indexes into self.phrases)
+        for phrase_index, phrase in enumerate(self.phrases):
+            node = 0
+            for ch in phrase:
+                next_node = self._goto[node].get(ch)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][ch] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                node = next_node
+            self._out[node] = self._out[node] + (phrase_index,)
+        self._build_failure_links()
+        # While no match is in progress, jump straight to the next character
+        # that can start a phrase instead of stepping through every one.
+        root_chars = ''.join(re.escape(ch) for ch in self._goto[0])
+        self._root_search = re.compile(f'[{root_chars}]').search if root_chars else None
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0)
+                if self._fail[child] == child:
+                    self._fail[child] = 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def scan(self):
+        """Starts a new incremental scan over text fed piece by piece."""
+        return PhraseScan(self)
+
+    def find_all(self, text):
+        """All (start, phrase) occurrences in a single string."""
+        return list(self.scan().feed(text))
+
+    def find_first(self, text):
+        """{phrase: first start offset} for each phrase that occurs in text."""
+        first = {}
+        for start, phrase in self.find_all(text):
+            if phrase not in first or start < first[phrase]:
+                first[phrase] = start
+        return first
+
+
+class PhraseScan:
+    """
+    Scan state for one pass of a PhraseMatcher. Matches that span two
+    pieces of fed text are still found; positions are offsets into the
+    concatenation of everything fed so far.
+    """
+
+    def __init__(self, matcher):
+        self.matcher = matcher
+        self.state = 0
+        self.offset = 0
+
+    def feed(self, text):
+        """
+        Scans the next piece of text. Yields (start, phrase) for every
+        occurrence that ends inside this piece, in order of end position.
+        The generator must be consumed fully before the next feed().
+        """
+        matcher = self.matcher
+        goto = matcher._goto
+        fail = matcher._fail
+        out = matcher._out
+        phrases = matcher.phrases
+        root_search = matcher._root_search
+        state = self.state
+        offset = self.offset
+        i = 0
+        length = len(text)
+        while i < length:
+            if state == 0:
+                if root_search is None:
+                    break
+                m = root_search(text, i)
+                if m is None:
+                    break
+                i = m.start()
+            ch = text[i]
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                for phrase_index in out[state]:
+                    phrase = phrases[phrase_index]
+                    yield offset + i - len(phrase) + 1, phrase
+            i += 1
+        self.state = state
+        self.offset = offset + length
+
+
+@functools.lru_cache(maxsize=16)
+def _cached_phrase_matcher(phrases):
+    return PhraseMatcher(phrases)
+
+
+def get_phrase_matcher(phrases):
+    """Returns the matcher for this phrase list, built once and cached."""
+    return _cached_phrase_matcher(tuple(sorted(set(phrases))))
@@ -0,0 +1,537 @@
+# macros/ReplaceEngine.py
+# In-process engine for Replace Values in Selection. Instead of one Word
+# Replace All per Excel row (each rescanning the whole selection inside
+# Word), the selection text is read once, every find string is located in
+# a single Aho-Corasick pass, the result of running the Replace All calls
+# one after another is worked out here, and only the changed spans are
+# written back to Word.
+import bisect
+from collections import namedtuple
+
+from .PhraseMatcher import PhraseMatcher
+from .ReplacementGraph import ReplacementGraph
+from .WordWildcards import CARET_CODES
+
+# Word constants (numeric, so they work without a makepy-generated cache)
+WD_FIND_STOP = 0
+
+# Word's Find.Text is limited to 255 characters
+MAX_FIND_LENGTH = 255
+# Above this many replacements, one ranged write each costs more COM calls
+# than letting Word's Replace All do the pairs that match
+MAX_RANGED_EDITS = 5000
+
+Edit = namedtuple('Edit', 'start end text')  # Replace text[start:end] with text
+ReplacementPlan = namedtuple('ReplacementPlan', 'text edits counts')
+
+
+class UnsupportedReplacement(ValueError):
+    """A find/replace string uses a Word ^code the engine can't reproduce."""
+
+
+def decode_word_text(text, find_text=None):
+    """
+    Turns the ^codes of a Word Find/Replace string (^p, ^t, ^^, ...) into
+    the characters they stand for. For a replacement string, pass the
+    (decoded) find_text so ^& can be expanded.
+    """
+    if '^' not in text:
+        return text
+    parts = []
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if ch != '^':
+            parts.append(ch)
+            i += 1
+            continue
+        code = text[i + 1:i + 2]
+        if code in CARET_CODES:
+            parts.append(CARET_CODES[code])
+        elif code == '&' and find_text is not None:
+            parts.append(find_text)
+        else:
+            raise UnsupportedReplacement(f"Unsupported Word code '^{code}' in {text!r}")
+        i += 2
+    return ''.join(parts)
+
+
+def decode_pairs(pairs):
+    """decode_word_text for a list of (find, replace) pairs as typed in Word."""
+    decoded = []
+    for find_text, replace_text in pairs:
+        find_text = decode_word_text(find_text)
+        decoded.append((find_text, decode_word_text(replace_text, find_text)))
+    return decoded
+
+
+class _Phase:
+    """
+    Edits claimed since the text was last rebuilt, plus what is needed to
+    tell whether a later find string could match text they produce.
+    """
+
+    def __init__(self, text_length, max_find_length):
+        self.claimed = bytearray(text_length)  # 1 where an edit replaces text
+        self.edits = []
+        self.spans = {}           # replacement -> [(start, end)] of its edits
+        self.max_find_length = max_find_length
+        self.contained = set()    # Indexes of find strings found inside a replacement
+        self.replacements = {}    # length -> set of replacement strings
+        self.suffixes = set()     # Proper suffixes of replacements
+        self.prefixes = set()     # Proper prefixes of replacements
+
+    def add_edit(self, start, end, replacement):
+        self.claimed[start:end] = b'\x01' * (end - start)
+        self.edits.append((start, end, replacement))
+        self.spans.setdefault(replacement, []).append((start, end))
+
+    def add_replacement(self, replacement, matcher, index_of):
+        for _, phrase in matcher.scan().feed(replacement):
+            self.contained.add(index_of[phrase])
+        self.replacements.setdefault(len(replacement), set()).add(replacement)
+        for k in range(1, min(len(replacement), self.max_find_length)):
+            self.suffixes.add(replacement[-k:])
+            self.prefixes.add(replacement[:k])
+
+    def may_create(self, index, find_text):
+        """
+        True if find_text could match text that overlaps one of this phase's
+        replacements (or spans the gap left by an empty one), i.e. the claims
+        alone can't tell where it matches.
+        """
+        if index in self.contained:
+            return True
+        length = len(find_text)
+        for replacement_length, replacements in self.replacements.items():
+            if replacement_length <= length and any(
+                    find_text[k:k + replacement_length] in replacements
+                    for k in range(length - replacement_length + 1)):
+                return True
+        suffixes = self.suffixes
+        prefixes = self.prefixes
+        for k in range(1, length):
+            if find_text[:k] in suffixes or find_text[-k:] in prefixes:
+                return True
+        return False
+
+    def creates_match(self, find_text, text):
+        """
+        True unless find_text is sure not to match any text produced by this
+        phase's edits. Each edit whose replacement could take part in a match
+        is checked in its surroundings; an edit with another edit too close
+        by counts as a match.
+        """
+        claimed = self.claimed
+        reach = len(find_text) - 1
+        for replacement, spans in self.spans.items():
+            if not _can_overlap(replacement, find_text):
+                continue
+            for start, end in spans:
+                left = max(0, start - reach)
+                right = min(len(text), end + reach)
+                if claimed.find(1, left, start) != -1 or claimed.find(1, end, right) != -1:
+                    return True
+                window = text[left:start] + replacement + text[end:right]
+                replaced_start = start - left
+                replaced_end = replaced_start + len(replacement)
+                i = window.find(find_text)
+                while i != -1:
+                    # Overlaps the replacement, or spans the gap left by an empty one
+                    if (i < replaced_end and i + len(find_text) > replaced_start
+                            if replaced_end > replaced_start
+                            else i < replaced_start < i + len(find_text)):
+                        return True
+                    i = window.find(find_text, i + 1)
+        return False
+
+
+def _can_overlap(replacement, find_text):
+    """True if find_text could match text that shares characters with replacement."""
+    if find_text in replacement or replacement in find_text:
+        return True
+    for k in range(1, min(len(replacement), len(find_text))):
+        if replacement.endswith(find_text[:k]) or replacement.startswith(find_text[-k:]):
+            return True
+    return False
+
+
+class CompiledReplacements:
+    """
+    (find, replace) pairs with their matcher built, for reuse across
+    plan_replacements calls. Find strings must be unique and non-empty.
+    """
+
+    def __init__(self, pairs):
+        self.pairs = list(pairs)
+        self.finds = [find_text for find_text, _ in self.pairs]
+        self.index_of = {find_text: i for i, find_text in enumerate(self.finds)}
+        self.max_find_length = max((len(find_text) for find_text in self.finds), default=0)
+        self._matcher = None
+        self._graph = None
+
+    @property
+    def matcher(self):
+        if self._matcher is None:
+            self._matcher = PhraseMatcher(self.finds)
+        return self._matcher
+
+    @property
+    def graph(self):
+        if self._graph is None:
+            self._graph = ReplacementGraph(self.pairs)
+        return self._graph
+
+
+def plan_replacements(text, pairs, max_edits=None):
+    """
+    Works out what replacing every (find, replace) pair in turn would do to
+    text, where each replacement is a case-sensitive, left-to-right Replace
+    All over the result of the previous ones (as Word does). pairs is a
+    CompiledReplacements or a list of pairs whose find strings are unique
+    and non-empty.
+
+    Returns a ReplacementPlan: the final text, the edits as non-overlapping
+    Edit(start, end, text) spans of the original text, in order, and the
+    number of replacements made by each pair. Returns None if there would
+    be more than max_edits replacements.
+    """
+    compiled = pairs if isinstance(pairs, CompiledReplacements) else CompiledReplacements(pairs)
+    pairs = compiled.pairs
+    finds = compiled.finds
+    counts = [0] * len(pairs)
+    if not pairs or not text:
+        return ReplacementPlan(text, [], counts)
+    matcher = compiled.matcher
+    index_of = compiled.index_of
+    max_find_length = compiled.max_find_length
+
+    # Start offsets of every find string in the current text, in order
+    occurrences = [[] for _ in pairs]
+    for start, phrase in matcher.scan().feed(text):
+        occurrences[index_of[phrase]].append(start)
+
+    original = text
+    changed = _ChangedSpans()
+    phase = _Phase(len(text), max_find_length)
+    total = 0
+    # Pairs are taken level by level (see ReplacementGraph), so a pass over
+    # the text is only needed where one pair uses another's output
+    for index in compiled.graph.schedule:
+        find_text, replace_text = pairs[index]
+        if find_text == replace_text:
+            occurrences[index] = None
+            continue
+        if (phase.edits and phase.may_create(index, find_text)
+                and phase.creates_match(find_text, text)):
+            text = _rebuild(text, changed, phase.edits, occurrences,
+                            finds, matcher, index_of, max_find_length)
+            phase = _Phase(len(text), max_find_length)
+
+        # Matches overlapping an earlier replacement are gone; the rest are
+        # taken left to right without overlapping, like Replace All
+        claimed = phase.claimed
+        length = len(find_text)
+        last_end = 0
+        count = 0
+        for start in occurrences[index]:
+            end = start + length
+            if start < last_end or claimed.find(1, start, end) != -1:
+                continue
+            phase.add_edit(start, end, replace_text)
+            last_end = end
+            count += 1
+        occurrences[index] = None
+        counts[index] = count
+        if count:
+            total += count
+            if max_edits is not None and total > max_edits:
+                return None
+            phase.add_replacement(replace_text, matcher, index_of)
+
+    if phase.edits:
+        text = _rebuild(text, changed, phase.edits, occurrences,
+                        finds, matcher, index_of, max_find_length)
+    return ReplacementPlan(text, changed.edits(original, text), counts)
+
+
+def count_replacements(text, pairs):
+    """
+    The number of replacements each pair makes when the pairs are replaced
+    in turn (what plan_replacements counts, without working out the edits).
+    """
+    counts = []
+    for find_text, replace_text in pairs:
+        if find_text == replace_text:
+            counts.append(0)
+            continue
+        count = text.count(find_text)
+        if count:
+            text = text.replace(find_text, replace_text)
+        counts.append(count)
+    return counts
+
+
+def plan_pattern_replacements(text, patterns, max_edits=None):
+    """
+    plan_replacements for (regex, template) pairs, e.g. compiled Word
+    wildcards: each pattern in turn replaces every (non-empty) match in the
+    result of the previous ones, with match.expand(template). Every pattern
+    takes one pass over the text.
+    """
+    original = text
+    changed = _ChangedSpans()
+    counts = []
+    total = 0
+    for regex, template in patterns:
+        edits = [(m.start(), m.end(), m.expand(template))
+                 for m in regex.finditer(text) if m.end() > m.start()]
+        counts.append(len(edits))
+        total += len(edits)
+        if max_edits is not None and total > max_edits:
+            return None
+        if edits:
+            text, _ = _splice(text, edits)
+            changed.apply(edits)
+    return ReplacementPlan(text, changed.edits(original, text), counts)
+
+
+def count_pattern_replacements(text, patterns):
+    """count_replacements for (regex, template) pairs."""
+    counts = []
+    for regex, template in patterns:
+        count = 0
+
+        def expand(match):
+            nonlocal count
+            if match.end() == match.start():
+                return ''
+            count += 1
+            return match.expand(template)
+        text = regex.sub(expand, text)
+        counts.append(count)
+    return counts
+
+
+def _rebuild(text, changed, edits, occurrences, finds, matcher, index_of, max_find_length):
+    """
+    Applies a phase's edits to the text, and brings the occurrences of the
+    find strings not yet used up to date: matches that survive are shifted,
+    and matches touching the new text are added. Returns the new text.
+    """
+    edits.sort()
+    new_text, spans = _splice(text, edits)
+    changed.apply(edits)
+
+    starts = [start for start, _, _ in edits]
+    ends = [end for _, end, _ in edits]
+    shifts = [0]
+    for start, end, replacement in edits:
+        shifts.append(shifts[-1] + len(replacement) - (end - start))
+    bisect_left = bisect.bisect_left
+    for index, found in enumerate(occurrences):
+        if not found:
+            continue
+        length = len(finds[index])
+        kept = []
+        for start in found:
+            k = bisect_left(starts, start + length)
+            if k and ends[k - 1] > start:
+                continue
+            kept.append(start + shifts[k])
+        occurrences[index] = kept
+
+    # Matches that touch a replacement lie within max_find_length - 1
+    # characters of it. The windows around the replacements are scanned in
+    # one go, joined by a character no find string contains.
+    windows = _merge_windows(spans, max_find_length - 1, len(new_text))
+    separator = _unused_character(finds)
+    joined_starts = []
+    offset = 0
+    for window_start, window_end in windows:
+        joined_starts.append(offset)
+        offset += window_end - window_start + 1
+    joined = separator.join(new_text[window_start:window_end] for window_start, window_end in windows)
+    span_starts = [span_start for span_start, _ in spans]
+    added = {}
+    for joined_start, phrase in matcher.scan().feed(joined):
+        index = index_of[phrase]
+        if occurrences[index] is None:
+            continue
+        w = bisect.bisect_right(joined_starts, joined_start) - 1
+        start = windows[w][0] + joined_start - joined_starts[w]
+        end = start + len(phrase)
+        k = bisect_left(span_starts, end)
+        if not k:
+            continue
+        span_start, span_end = spans[k - 1]
+        # Overlaps the replacement, or spans the gap left by an empty one
+        if span_end > start if span_end > span_start else span_start > start:
+            added.setdefault(index, []).append(start)
+    for index, starts_added in added.items():
+        occurrences[index] = sorted(set(occurrences[index]).union(starts_added))
+    return new_text
+
+
+def _splice(text, edits):
+    """
+    Applies sorted, non-overlapping edits to text. Returns the new text and
+    where each replacement ended up in it.
+    """
+    parts = []
+    spans = []
+    position = 0
+    new_length = 0
+    for start, end, replacement in edits:
+        parts.append(text[position:start])
+        new_length += start - position
+        spans.append((new_length, new_length + len(replacement)))
+        parts.append(replacement)
+        new_length += len(replacement)
+        position = end
+    parts.append(text[position:])
+    return ''.join(parts), spans
+
+
+def _merge_windows(spans, reach, text_length):
+    windows = []
+    for span_start, span_end in spans:
+        start = max(0, span_start - reach)
+        end = min(text_length, span_end + reach)
+        if windows and start <= windows[-1][1]:
+            windows[-1][1] = max(windows[-1][1], end)
+        else:
+            windows.append([start, end])
+    return windows
+
+
+def _unused_character(strings):
+    used = set(''.join(strings))
+    for code in range(0xFFFF):
+        if chr(code) not in used:
+            return chr(code)
+    raise ValueError("No character left to separate the windows with")
+
+
+class _ChangedSpans:
+    """
+    The parts of the current text that differ from the original: sorted,
+    non-touching spans, each with where it is now and which part of the
+    original text it replaced. Everything in between is original text,
+    only shifted.
+    """
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+        self.original_starts = []
+        self.original_ends = []
+
+    def apply(self, edits):
+        """Records sorted, non-overlapping edits (start, end, replacement) of the current text."""
+        starts, ends = self.starts, self.ends
+        original_starts, original_ends = self.original_starts, self.original_ends
+        new_starts, new_ends, new_original_starts, new_original_ends = [], [], [], []
+        count = len(starts)
+        i = 0
+        skew = 0   # Current minus original position, after the spans passed so far
+        delta = 0  # New minus current position, after the edits applied so far
+        group = None  # [current start, current end, original start, new start]
+
+        def close_group():
+            new_starts.append(group[3])
+            new_ends.append(group[1] + delta)
+            new_original_starts.append(group[2])
+            new_original_ends.append(group[1] - skew)
+
+        for start, end, replacement in edits:
+            if group is not None and start > group[1]:
+                close_group()
+                group = None
+            # Spans that end before this edit starts are only shifted
+            j = bisect.bisect_left(ends, start, i)
+            if j > i:
+                new_starts.extend([position + delta for position in starts[i:j]])
+                new_ends.extend([position + delta for position in ends[i:j]])
+                new_original_starts.extend(original_starts[i:j])
+                new_original_ends.extend(original_ends[i:j])
+                skew = ends[j - 1] - original_ends[j - 1]
+                i = j
+            if group is None:
+                if i < count and starts[i] < start:
+                    group = [starts[i], end, original_starts[i], starts[i] + delta]
+                else:
+                    group = [start, end, start - skew, start + delta]
+            else:
+                group[1] = max(group[1], end)
+            # Spans touching the edit become part of it
+            while i < count and starts[i] <= group[1]:
+                group[1] = max(group[1], ends[i])
+                skew = ends[i] - original_ends[i]
+                i += 1
+            delta += len(replacement) - (end - start)
+        if group is not None:
+            close_group()
+        new_starts.extend([position + delta for position in starts[i:]])
+        new_ends.extend([position + delta for position in ends[i:]])
+        new_original_starts.extend(original_starts[i:])
+        new_original_ends.extend(original_ends[i:])
+        self.starts, self.ends = new_starts, new_ends
+        self.original_starts, self.original_ends = new_original_starts, new_original_ends
+
+    def edits(self, original, text):
+        """The changes as Edits of the original text (text being the current one)."""
+        edits = []
+        for start, end, original_start, original_end in zip(
+                self.starts, self.ends, self.original_starts, self.original_ends):
+            replacement = text[start:end]
+            if original[original_start:original_end] != replacement:
+                edits.append(Edit(original_start, original_end, replacement))
+        return edits
+
+
+def apply_edits(word_range, original_text, edits):
+    """
+    Writes edits (offsets into original_text, which was word_range.Text)
+    into a Word range, one ranged write per edit. Where Word's character
+    positions don't line up with the text (fields, table cell markers),
+    the original text is looked up with Find from the expected position.
+    Returns the number of edits that couldn't be placed.
+    """
+    base = word_range.Start
+    drift = 0
+    missed = 0
+    for edit in edits:
+        expected = original_text[edit.start:edit.end]
+        start = base + edit.start + drift
+        target = word_range.Duplicate
+        target.SetRange(start, start + len(expected))
+        if expected and target.Text != expected:
+            target = _find_after(word_range, start, expected)
+            if target is None:
+                missed += 1
+                continue
+        target_start = target.Start
+        target_length = target.End - target_start
+        target.Text = edit.text
+        drift += target_start - start + len(edit.text) - target_length
+    return missed
+
+
+def _find_after(word_range, start, text):
+    if len(text) > MAX_FIND_LENGTH:
+        return None
+    target = word_range.Duplicate
+    target.SetRange(start, word_range.End)
+    find = target.Find
+    find.ClearFormatting()
+    find.Text = text.replace('^', '^^')
+    find.Forward = True
+    find.Wrap = WD_FIND_STOP
+    find.Format = False
+    find.MatchCase = True
+    find.MatchWholeWord = False
+    find.MatchWildcards = False
+    find.MatchSoundsLike = False
+    find.MatchAllWordForms = False
+    return target if find.Execute() else None
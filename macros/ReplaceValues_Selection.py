@@ -1,21 +1,39 @@
-import win32com.client
-from openpyxl import load_workbook
+# win32com and openpyxl (see ReplacementTable) are imported when first
+# needed, so the replace logic can also be driven with fake Word objects
+# (see macros/FakeWord.py).
+from .ReplaceEngine import (MAX_RANGED_EDITS, apply_edits, count_pattern_replacements,
+                            count_replacements, plan_pattern_replacements, plan_replacements)
+from .ReplacementTable import load_replacement_table
+
+# Word constants (numeric, so they work without a makepy-generated cache)
+WD_FIND_STOP = 0
+WD_REPLACE_ALL = 2
 
 
 class Macro_ReplaceValues_Selection:
-    def __init__(self):
-        self.word_app = win32com.client.Dispatch('Word.Application')
-        self.excel_file = None
+    def __init__(self, word_app=None):
+        if word_app is None:
+            import win32com.client
+            word_app = win32com.client.Dispatch('Word.Application')
+        self.word_app = word_app
+        self.table = None  # ReplacementTable of the loaded Excel/CSV file
+        self.replacement_count = None  # Replacements made by the last replace_values()
 
     def load_excel_file(self, excel_file_path):
-        self.excel_file = load_workbook(excel_file_path)
+        self.table = load_replacement_table(excel_file_path)
+
+    def check_replacements(self, use_wildcards):
+        """Messages about suspicious rows in the loaded table (see ReplacementTable.problems)."""
+        if self.table is None:
+            return []
+        return self.table.problems(use_wildcards)
 
     def replace_values(self, use_wildcards):
         try:
             if self.word_app is None:
                 return "Word is not open."
-            if self.excel_file is None:
-                return "No Excel file loaded."
+            if self.table is None:
+                return "No replacement file loaded."
 
             # Get the current selection
             selection = self.word_app.Selection
@@ -23,47 +41,70 @@ class Macro_ReplaceValues_Selection:
             if not selection.Text:
                 raise Exception("No text is selected in Word.")
 
-            excel_sheet = self.excel_file.active
-            replacements = {}
-            for row in excel_sheet.iter_rows():
-                find_text = str(row[0].value)
-                # If the cell is empty, stop the loop
-                if find_text is None:
-                    break
-                replace_text = str(row[1].value)
-                if find_text and replace_text:
-                    if use_wildcards:
-                        # Convert wildcards to regex
-                        find_text = find_text.replace("~*", "\\*")
-                        find_text = find_text.replace("~?", "\\?")
-                        find_text = find_text.replace("~~", "~")
-                        find_text = find_text.replace("?", ".")
-                        find_text = find_text.replace("*", ".*")
-                        find_text = find_text.replace("[!", "[^")
-                        find_text = find_text.replace("#", "\\d")
-                    replacements[find_text] = replace_text
-
-            # Iterate through the selection and replace words
-            for find_text, replace_text in replacements.items():
-                # Word's Find and Replace function
-                find = selection.Find
-                find.ClearFormatting()
-                find.Replacement.ClearFormatting()
-                find.Text = find_text
-                find.Replacement.Text = replace_text
-                find.Forward = True
-                find.Wrap = win32com.client.constants.wdFindStop
-                find.Format = False
-                find.MatchCase = True  # Make it case-sensitive
-                find.MatchWholeWord = False
-                find.MatchWildcards = use_wildcards
-                find.MatchSoundsLike = False
-                find.MatchAllWordForms = False
-                find.Execute(Replace=win32com.client.constants.wdReplaceAll)
+            self.replacement_count = None
+            return self.replace_in_selection_text(selection, use_wildcards)
 
         except Exception as e:
             return str(e)
 
+    def replace_in_selection_text(self, selection, use_wildcards):
+        """
+        Works out the result of the Replace All calls from the selection text
+        (see macros/ReplaceEngine.py) and writes only the changed spans.
+        Rows with ^codes the engine can't reproduce are left to Word.
+        """
+        replacements = self.table.replacements()
+        if use_wildcards:
+            patterns = self.table.compiled_wildcards()
+        else:
+            compiled = self.table.compiled()
+            if compiled is None:
+                self.replace_in_word(selection, replacements.items(), False)
+                return None
+
+        word_range = selection.Range
+        text = word_range.Text
+        if use_wildcards:
+            plan = plan_pattern_replacements(text, patterns, max_edits=MAX_RANGED_EDITS)
+        else:
+            plan = plan_replacements(text, compiled, max_edits=MAX_RANGED_EDITS)
+        if plan is None:
+            # Too many changes to write one at a time; Word's Replace All is
+            # cheaper, but only for the rows that actually match something
+            if use_wildcards:
+                counts = count_pattern_replacements(text, patterns)
+            else:
+                counts = count_replacements(text, compiled.pairs)
+            self.replace_in_word(selection, [pair for pair, count in zip(replacements.items(), counts)
+                                             if count], use_wildcards)
+            self.replacement_count = sum(counts)
+            return None
+
+        missed = apply_edits(word_range, text, plan.edits)
+        self.replacement_count = sum(plan.counts)
+        if missed:
+            return f"{missed} replacement(s) could not be placed in the document."
+        return None
+
+    def replace_in_word(self, selection, pairs, use_wildcards):
+        """One Word Replace All per (find, replace) pair, in order."""
+        for find_text, replace_text in pairs:
+            # Word's Find and Replace function
+            find = selection.Find
+            find.ClearFormatting()
+            find.Replacement.ClearFormatting()
+            find.Text = find_text
+            find.Replacement.Text = replace_text
+            find.Forward = True
+            find.Wrap = WD_FIND_STOP
+            find.Format = False
+            find.MatchCase = True  # Make it case-sensitive
+            find.MatchWholeWord = False
+            find.MatchWildcards = use_wildcards
+            find.MatchSoundsLike = False
+            find.MatchAllWordForms = False
+            find.Execute(Replace=WD_REPLACE_ALL)
+
     def save_document(self):
         if self.word_app is None:
             raise Exception("Word is not open.")
@@ -0,0 +1,192 @@
+# macros/ReplacementGraph.py
+# Dependencies between find/replace pairs that are applied one after
+# another. Two pairs depend on each other when the find text of one can
+# overlap the find or replacement text of the other; pairs that don't can
+# be applied in either order with the same result. Grouping the pairs into
+# levels, where a pair only needs the output of lower levels, lets the
+# replace engine apply each level in one pass. The same analysis finds
+# rows that undo each other or can never match.
+import bisect
+
+from .PhraseMatcher import PhraseMatcher
+
+
+class ReplacementGraph:
+    """
+    Analysis of (find, replace) pairs with unique, non-empty find strings.
+
+    levels[i] is the pass pair i belongs to: a pair is on a higher level
+    than the earlier pairs whose replacements can form its find text, and
+    on at least the level of the earlier pairs it otherwise overlaps.
+    schedule lists the pair indexes level by level (in row order within a
+    level); applying the pairs in that order gives the same result as row
+    order.
+    """
+
+    def __init__(self, pairs):
+        self.pairs = list(pairs)
+        strings = {s for pair in self.pairs for s in pair if s}
+        matcher = PhraseMatcher(strings)
+        # Every string -> the strings (of any pair) that occur inside it, itself included
+        self._contains = {s: {phrase for _, phrase in matcher.scan().feed(s)} for s in strings}
+        self._contains[""] = set()
+        self._find_index = {find_text: i for i, (find_text, _) in enumerate(self.pairs)}
+        self.levels = self._assign_levels()
+        self.schedule = sorted(range(len(self.pairs)), key=lambda i: (self.levels[i], i))
+        self.passes = max(self.levels) + 1 if self.pairs else 0
+
+    def _assign_levels(self):
+        max_affix = max((len(find_text) for find_text, _ in self.pairs), default=0)
+        finds = _OverlapIndex(self._contains, max_affix)
+        replacements = _OverlapIndex(self._contains, max_affix)
+        levels = []
+        for find_text, replace_text in self.pairs:
+            if find_text == replace_text:
+                levels.append(0)  # Changes nothing, so depends on nothing
+                continue
+            level = max(replacements.max_level(find_text) + 1,
+                        finds.max_level(find_text),
+                        finds.max_level(replace_text),
+                        0)
+            levels.append(level)
+            finds.add(find_text, level)
+            replacements.add(replace_text, level)
+        return levels
+
+    def _feeds(self, i):
+        """Indexes of the other pairs whose find text occurs in pair i's replacement."""
+        find_text, replace_text = self.pairs[i]
+        if find_text == replace_text:
+            return []
+        found = (self._find_index.get(s) for s in self._contains[replace_text])
+        return sorted(j for j in found if j is not None and j != i
+                      and self.pairs[j][0] != self.pairs[j][1])
+
+    def cycles(self):
+        """
+        Groups of two or more pairs whose replacements produce each other's
+        find text (e.g. colour -> color and color -> colour), as sorted
+        lists of pair indexes.
+        """
+        # Tarjan's strongly connected components, without recursion
+        n = len(self.pairs)
+        index_of = [None] * n
+        lowlink = [0] * n
+        on_stack = [False] * n
+        stack = []
+        groups = []
+        counter = 0
+        for root in range(n):
+            if index_of[root] is not None:
+                continue
+            work = [(root, iter(self._feeds(root)))]
+            index_of[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = True
+            while work:
+                node, children = work[-1]
+                for child in children:
+                    if index_of[child] is None:
+                        index_of[child] = lowlink[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack[child] = True
+                        work.append((child, iter(self._feeds(child))))
+                        break
+                    if on_stack[child]:
+                        lowlink[node] = min(lowlink[node], index_of[child])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[node])
+                    if lowlink[node] == index_of[node]:
+                        group = []
+                        while True:
+                            member = stack.pop()
+                            on_stack[member] = False
+                            group.append(member)
+                            if member == node:
+                                break
+                        if len(group) > 1:
+                            groups.append(sorted(group))
+        return sorted(groups)
+
+    def shadowed(self):
+        """
+        (j, i) for each pair j whose find text contains the find text of an
+        earlier pair i, which is replaced first and (as nothing in between
+        puts it back) leaves pair j nothing to match.
+        """
+        # Pairs whose replacement contains a given find text, in order
+        producers = {}
+        for k, (find_text, replace_text) in enumerate(self.pairs):
+            if find_text != replace_text:
+                for s in self._contains[replace_text]:
+                    producers.setdefault(s, []).append(k)
+        result = []
+        for j, (find_text, replace_text) in enumerate(self.pairs):
+            if find_text == replace_text:
+                continue
+            earlier = (self._find_index.get(s) for s in self._contains[find_text])
+            for i in sorted(i for i in earlier if i is not None and i < j):
+                earlier_find, earlier_replace = self.pairs[i]
+                if earlier_find == earlier_replace:
+                    continue
+                made = producers.get(earlier_find, [])
+                # Put back by pair i itself, or by a pair between i and j
+                k = bisect.bisect_left(made, i)
+                if k < len(made) and made[k] < j:
+                    continue
+                result.append((j, i))
+                break
+        return result
+
+
+class _OverlapIndex:
+    """
+    The strings added so far with their levels, for looking up the highest
+    level among those that can overlap a given string: one contains the
+    other, or the end of one is the start of the other.
+    """
+
+    def __init__(self, contains, max_affix):
+        self._contains = contains
+        self._max_affix = max_affix   # Overlaps are shorter than the longest find text
+        self._levels = {}             # Added string -> level
+        self._containing = {}         # String -> highest level of an added string containing it
+        self._suffixes = {}           # Proper suffix of an added string -> highest level
+        self._prefixes = {}           # Proper prefix of an added string -> highest level
+        self._highest = -1
+        self._empty = -1              # An empty string overlaps every gap between characters
+
+    def add(self, s, level):
+        self._highest = max(self._highest, level)
+        if not s:
+            self._empty = max(self._empty, level)
+            return
+        if self._levels.get(s, -1) < level:
+            self._levels[s] = level
+        for sub in self._contains[s]:
+            if self._containing.get(sub, -1) < level:
+                self._containing[sub] = level
+        for k in range(1, min(len(s), self._max_affix)):
+            if self._suffixes.get(s[-k:], -1) < level:
+                self._suffixes[s[-k:]] = level
+            if self._prefixes.get(s[:k], -1) < level:
+                self._prefixes[s[:k]] = level
+
+    def max_level(self, s):
+        """Highest level of an added string that can overlap s, or -1."""
+        if not s:
+            return self._highest
+        best = max(self._empty, self._containing.get(s, -1))
+        levels = self._levels
+        for sub in self._contains[s]:
+            best = max(best, levels.get(sub, -1))
+        suffixes = self._suffixes
+        prefixes = self._prefixes
+        for k in range(1, min(len(s), self._max_affix)):
+            best = max(best, suffixes.get(s[:k], -1), prefixes.get(s[-k:], -1))
+        return best
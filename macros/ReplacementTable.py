@@ -0,0 +1,175 @@
+# macros/ReplacementTable.py
+# Find/replace tables for Replace Values in Selection: column A is the find
+# text, column B the replacement, read until the first row with an empty
+# find cell. Excel workbooks are streamed (read-only, values only); CSV and
+# TSV files work too. Loaded tables are cached by path and modification
+# time, so running the macro again on the same file doesn't re-read it.
+import csv
+import os
+import threading
+
+from .ReplaceEngine import CompiledReplacements, UnsupportedReplacement, decode_pairs
+from .WordWildcards import WildcardError, compile_wildcard
+
+TEXT_DELIMITERS = {'.csv': ',', '.tsv': '\t', '.txt': '\t'}
+FILE_DIALOG_FILTER = "Replacement Tables (*.xlsx *.xlsm *.csv *.tsv *.txt)"
+# Problems listed by describe_problems before the rest are summarised
+MAX_LISTED_PROBLEMS = 10
+
+
+class ReplacementTable:
+    """
+    The (find, replace) rows of a table, plus what is derived from them.
+    row_numbers are the rows' numbers in the file (1, 2, ... by default).
+    """
+
+    def __init__(self, rows, row_numbers=None):
+        self.rows = list(rows)
+        self.row_numbers = list(row_numbers) if row_numbers is not None else \
+            list(range(1, len(self.rows) + 1))
+        self._replacements = None
+        self._compiled = None
+        self._compiled_wildcards = None
+
+    def replacements(self):
+        """{find: replace} in row order; later duplicates of a find text win."""
+        if self._replacements is None:
+            self._replacements = dict(self.rows)
+        return self._replacements
+
+    def compiled(self):
+        """
+        The rows (without wildcards) ready for plan_replacements, or None if
+        they use ^codes that only Word can handle.
+        """
+        if self._compiled is None:
+            try:
+                self._compiled = CompiledReplacements(decode_pairs(self.replacements().items()))
+            except UnsupportedReplacement:
+                self._compiled = False
+        return self._compiled or None
+
+    def compiled_wildcards(self):
+        """
+        The rows as Word wildcards, compiled to (regex, template) pairs for
+        plan_pattern_replacements. Raises WildcardError for a bad row.
+        """
+        if self._compiled_wildcards is None:
+            first_row = {}
+            for (find_text, _), row in zip(self.rows, self.row_numbers):
+                first_row.setdefault(find_text, row)
+            patterns = []
+            for find_text, replace_text in self.replacements().items():
+                try:
+                    patterns.append(compile_wildcard(find_text, replace_text))
+                except WildcardError as e:
+                    raise WildcardError(f"Row {first_row[find_text]}: {e}") from None
+            self._compiled_wildcards = patterns
+        return self._compiled_wildcards
+
+    def problems(self, use_wildcards=False):
+        """
+        Messages about rows that probably don't do what was meant: repeated
+        find texts, and (without wildcards) rows that undo each other or
+        can't match because an earlier row replaces part of their find text.
+        """
+        first_row = {}
+        messages = []
+        for (find_text, _), row in zip(self.rows, self.row_numbers):
+            if find_text in first_row:
+                messages.append(f"Row {row} repeats the find text of row {first_row[find_text]} "
+                                f"('{find_text}'); only the last of them is used.")
+            else:
+                first_row[find_text] = row
+
+        compiled = None if use_wildcards else self.compiled()
+        if compiled is None:
+            return messages
+        graph = compiled.graph
+        pairs = compiled.pairs
+        rows = [first_row[find_text] for find_text in self.replacements()]
+        for group in graph.cycles():
+            changes = ", ".join(f"'{pairs[i][0]}' -> '{pairs[i][1]}'" for i in group)
+            messages.append(f"Rows {_join_rows(rows[i] for i in group)} replace each other's "
+                            f"output ({changes}).")
+        for j, i in graph.shadowed():
+            messages.append(f"Row {rows[j]} ('{pairs[j][0]}') is unlikely to match anything: "
+                            f"row {rows[i]} replaces '{pairs[i][0]}' first.")
+        return messages
+
+
+def _join_rows(rows):
+    rows = [str(row) for row in rows]
+    return ", ".join(rows[:-1]) + " and " + rows[-1]
+
+
+def describe_problems(messages):
+    """The problems as one block of text, listing at most MAX_LISTED_PROBLEMS."""
+    lines = messages[:MAX_LISTED_PROBLEMS]
+    if len(messages) > MAX_LISTED_PROBLEMS:
+        lines.append(f"... and {len(messages) - MAX_LISTED_PROBLEMS} more.")
+    return "\n".join(lines)
+
+
+def _cell_text(value):
+    return "" if value is None else str(value)
+
+
+def _table_rows(values):
+    # (find, replace, row number) up to the first empty find cell; rows
+    # without a replacement are skipped
+    for number, row in enumerate(values, 1):
+        find_text = _cell_text(row[0]) if row else ""
+        if not find_text:
+            break
+        replace_text = _cell_text(row[1]) if len(row) > 1 else ""
+        if replace_text:
+            yield find_text, replace_text, number
+
+
+def read_replacement_rows(path):
+    """Reads the (find, replace, row number) rows of an Excel, CSV or TSV file."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in TEXT_DELIMITERS:
+        try:
+            return _read_text_rows(path, TEXT_DELIMITERS[extension], "utf-8-sig")
+        except UnicodeDecodeError:
+            # Excel saves "CSV (Comma delimited)" in the ANSI code page
+            return _read_text_rows(path, TEXT_DELIMITERS[extension], "cp1252")
+
+    from openpyxl import load_workbook
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = workbook.active
+        return list(_table_rows(sheet.iter_rows(max_col=2, values_only=True)))
+    finally:
+        workbook.close()
+
+
+def _read_text_rows(path, delimiter, encoding):
+    with open(path, "r", encoding=encoding, newline="") as f:
+        return list(_table_rows(csv.reader(f, delimiter=delimiter)))
+
+
+_tables = {}  # Absolute path -> (modification stamp, ReplacementTable)
+_tables_lock = threading.Lock()
+
+
+def load_replacement_table(path):
+    """
+    Returns the ReplacementTable of a file, re-reading it only when the
+    file has changed since it was last loaded.
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    with _tables_lock:
+        cached = _tables.get(path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+    rows = read_replacement_rows(path)
+    table = ReplacementTable([(find_text, replace_text) for find_text, replace_text, _ in rows],
+                             [number for _, _, number in rows])
+    with _tables_lock:
+        _tables[path] = (stamp, table)
+    return table
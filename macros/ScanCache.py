@@ -0,0 +1,155 @@
+# macros/ScanCache.py
+# Per-document cache of acronym scan results, one record per paragraph,
+# keyed by a hash of the paragraph text. A re-scan of a document that has
+# barely changed only re-tokenizes and re-classifies the changed paragraphs.
+import hashlib
+import os
+import pickle
+import threading
+
+from .AcronymList import get_doc_companion_dir
+
+SCAN_CACHE_VERSION = 1
+MAX_CACHED_DOCUMENTS = 20
+
+
+def get_scan_cache_dir():
+    return os.path.join(get_doc_companion_dir(), "scan_cache")
+
+
+def segment_key(text):
+    """Content hash of one paragraph (segment) of scanned text."""
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+def scan_fingerprint(*parts):
+    """
+    Hash of everything the cached records depend on besides the text itself
+    (definitions, exclusion and inclusion lists). Each part is a collection
+    of strings; order within a part doesn't matter.
+    """
+    h = hashlib.sha1(f"v{SCAN_CACHE_VERSION}".encode("ascii"))
+    for part in parts:
+        for item in sorted(part):
+            h.update(item.encode("utf-8", "surrogatepass"))
+            h.update(b"\0")
+        h.update(b"\1")
+    return h.hexdigest()
+
+
+class ScanCache:
+    """
+    Records from the last scan of one document. get()/put() collect the
+    records the current scan uses; save() writes only those, so paragraphs
+    that were deleted from the document drop out of the cache.
+    """
+
+    def __init__(self, identity, fingerprint, cache_dir=None):
+        self.identity = identity
+        self.fingerprint = fingerprint
+        self.cache_dir = cache_dir or get_scan_cache_dir()
+        name = hashlib.sha1(identity.encode("utf-8", "surrogatepass")).hexdigest()
+        self.path = os.path.join(self.cache_dir, name + ".pickle")
+        self.records = {}  # segment key -> record from the previous scan
+        self.used = {}     # segment key -> record used by the current scan
+        self.hits = 0
+        self.misses = 0
+        # Held by a scan from begin() to save(), so two scans of the same
+        # document (e.g. one cancelled but still winding down) don't mix
+        self.lock = threading.Lock()
+
+    def load(self):
+        """Reads the cached records, ignoring a file written for other settings."""
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, "rb") as f:
+                data = pickle.load(f)
+        except Exception as e:
+            print(f"Warning: Could not load scan cache from {self.path}: {e}")
+            return False
+        if (not isinstance(data, dict) or data.get("version") != SCAN_CACHE_VERSION
+                or data.get("fingerprint") != self.fingerprint
+                or data.get("identity") != self.identity):
+            return False
+        self.records = data["records"]
+        return True
+
+    def begin(self):
+        """Starts a new scan of the document."""
+        self.used = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        record = self.used.get(key)
+        if record is None:
+            record = self.records.get(key)
+            if record is None:
+                return None
+            self.used[key] = record
+        self.hits += 1
+        return record
+
+    def put(self, key, record):
+        self.used[key] = record
+        self.misses += 1
+
+    def save(self):
+        """Keeps this scan's records and writes them out if anything changed."""
+        changed = self.misses > 0 or len(self.used) != len(self.records)
+        self.records = self.used
+        self.used = {}
+        if not changed:
+            return False
+        data = {
+            "version": SCAN_CACHE_VERSION,
+            "identity": self.identity,
+            "fingerprint": self.fingerprint,
+            "records": self.records,
+        }
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Warning: Could not write scan cache to {self.path}: {e}")
+            return False
+        prune_scan_cache(self.cache_dir)
+        return True
+
+
+def prune_scan_cache(cache_dir=None, keep=MAX_CACHED_DOCUMENTS):
+    """Deletes all but the most recently written document caches."""
+    cache_dir = cache_dir or get_scan_cache_dir()
+    try:
+        paths = [os.path.join(cache_dir, name) for name in os.listdir(cache_dir)
+                 if name.endswith(".pickle")]
+        paths.sort(key=os.path.getmtime, reverse=True)
+        for path in paths[keep:]:
+            os.remove(path)
+    except OSError as e:
+        print(f"Warning: Could not prune scan cache in {cache_dir}: {e}")
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_scan_cache(identity, fingerprint, cache_dir=None):
+    """
+    Returns the ScanCache for a document. Kept in memory between scans in
+    the same session, and loaded from disk the first time a document is
+    scanned or when the definitions/lists have changed. Call begin() (with
+    its lock held) before using it for a scan.
+    """
+    with _caches_lock:
+        cache = _caches.get(identity)
+        if cache is None or cache.fingerprint != fingerprint or \
+                (cache_dir is not None and cache.cache_dir != cache_dir):
+            cache = ScanCache(identity, fingerprint, cache_dir)
+            cache.load()
+            _caches[identity] = cache
+    return cache
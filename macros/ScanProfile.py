@@ -0,0 +1,224 @@
+# macros/ScanProfile.py
+# Per-stage timing (and optionally memory) for the acronym scan: where the
+# time went between text extraction, tokenization, classification, English
+# word checks, definition lookups and include scanning. Can be exported as
+# a Chrome trace (chrome://tracing or https://ui.perfetto.dev).
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Individual trace events kept per profile; after that only totals are kept
+MAX_TRACE_EVENTS = 50000
+
+
+class StageStats:
+    __slots__ = ('name', 'calls', 'seconds', 'self_seconds', 'peak_bytes')
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.seconds = 0.0       # Including nested stages
+        self.self_seconds = 0.0  # Excluding nested stages
+        self.peak_bytes = None   # Largest allocation peak above the stage's start
+
+    def as_dict(self):
+        return {'calls': self.calls, 'seconds': self.seconds,
+                'self_seconds': self.self_seconds, 'peak_bytes': self.peak_bytes}
+
+
+class _Frame:
+    __slots__ = ('stats', 'start', 'child_seconds', 'start_memory', 'peak_memory')
+
+    def __init__(self, stats, start):
+        self.stats = stats
+        self.start = start
+        self.child_seconds = 0.0
+        self.start_memory = 0
+        self.peak_memory = 0
+
+
+class ScanProfile:
+    """
+    Collects wall time, call counts and (with trace_memory) the tracemalloc
+    peak of each named stage. Stages nest:
+
+        with profile.stage("tokenize"):
+            ...
+    """
+
+    enabled = True
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.stages = {}    # name -> StageStats, in first-seen order
+        self.events = []    # Chrome trace 'X' events
+        self.dropped_events = 0
+        self.total_seconds = None
+        self._stack = []
+        self._origin = time.perf_counter()
+        self._thread_id = threading.get_ident()
+        self._started_tracemalloc = False
+
+    @contextmanager
+    def stage(self, name):
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = StageStats(name)
+        frame = _Frame(stats, 0.0)
+        stack = self._stack
+        if self.trace_memory:
+            # tracemalloc has one peak, so each stage resets it and hands the
+            # peak it saw on to the stage around it when it finishes
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1].peak_memory = max(stack[-1].peak_memory, peak)
+            tracemalloc.reset_peak()
+            frame.start_memory = frame.peak_memory = current
+        stack.append(frame)
+        frame.start = time.perf_counter()
+        try:
+            yield stats
+        finally:
+            end = time.perf_counter()
+            stack.pop()
+            elapsed = end - frame.start
+            stats.calls += 1
+            stats.seconds += elapsed
+            stats.self_seconds += elapsed - frame.child_seconds
+            if stack:
+                stack[-1].child_seconds += elapsed
+            if self.trace_memory:
+                peak = max(frame.peak_memory, tracemalloc.get_traced_memory()[1])
+                growth = peak - frame.start_memory
+                if stats.peak_bytes is None or growth > stats.peak_bytes:
+                    stats.peak_bytes = growth
+                if stack:
+                    stack[-1].peak_memory = max(stack[-1].peak_memory, peak)
+                tracemalloc.reset_peak()
+            if len(self.events) < MAX_TRACE_EVENTS:
+                self.events.append((name, frame.start - self._origin, elapsed))
+            else:
+                self.dropped_events += 1
+
+    def timed_iter(self, name, iterable):
+        """Wraps an iterator so the time spent producing each item counts as a stage."""
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    @contextmanager
+    def activate(self):
+        """
+        Makes this the current profile for the calling thread (see
+        current_profile) and times the whole block as the scan total.
+        """
+        previous = getattr(_local, 'profile', NULL_PROFILE)
+        _local.profile = self
+        self._thread_id = threading.get_ident()
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.total_seconds = time.perf_counter() - start
+            _local.profile = previous
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+
+    def as_dict(self):
+        """The profile as plain data (e.g. for JSON)."""
+        return {
+            'total_seconds': self.total_seconds,
+            'stages': {name: stats.as_dict() for name, stats in self.stages.items()},
+        }
+
+    def summary_line(self, max_stages=4):
+        """One line for a status bar: total time and the slowest stages."""
+        total = self.total_seconds
+        if total is None:
+            total = sum(s.self_seconds for s in self.stages.values())
+        slowest = sorted(self.stages.values(), key=lambda s: s.self_seconds, reverse=True)
+        parts = [f"{s.name} {_format_seconds(s.self_seconds)}"
+                 for s in slowest[:max_stages] if s.self_seconds > 0]
+        line = f"Scan took {_format_seconds(total)}"
+        if parts:
+            line += " (" + ", ".join(parts) + ")"
+        return line
+
+    def report(self):
+        """A table of every stage, slowest first."""
+        lines = [f"{'Stage':<24} {'Calls':>8} {'Self (ms)':>11} {'Total (ms)':>11} {'Peak (KiB)':>11}"]
+        for stats in sorted(self.stages.values(), key=lambda s: s.self_seconds, reverse=True):
+            peak = f"{stats.peak_bytes / 1024:11.1f}" if stats.peak_bytes is not None else f"{'-':>11}"
+            lines.append(f"{stats.name:<24} {stats.calls:>8} {stats.self_seconds * 1000:11.1f} "
+                         f"{stats.seconds * 1000:11.1f} {peak}")
+        if self.total_seconds is not None:
+            lines.append(f"{'total':<24} {'':>8} {'':>11} {self.total_seconds * 1000:11.1f}")
+        return "\n".join(lines)
+
+    def to_chrome_trace(self):
+        """The recorded stages in Chrome trace event format."""
+        pid = os.getpid()
+        tid = self._thread_id
+        events = [{'name': name, 'cat': 'scan', 'ph': 'X', 'pid': pid, 'tid': tid,
+                   'ts': round(start * 1e6, 3), 'dur': round(duration * 1e6, 3)}
+                  for name, start, duration in self.events]
+        # The totals go along too, since events past MAX_TRACE_EVENTS are dropped
+        return {'traceEvents': events, 'displayTimeUnit': 'ms',
+                'otherData': {'dropped_events': self.dropped_events, **self.as_dict()}}
+
+    def export_chrome_trace(self, path):
+        """Writes the trace as JSON, loadable in chrome://tracing or Perfetto."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_chrome_trace(), f)
+        return path
+
+
+class _NullProfile:
+    """Stand-in used when no profile is wanted; stages cost next to nothing."""
+
+    enabled = False
+
+    def stage(self, name):
+        return _NULL_CONTEXT
+
+    def timed_iter(self, name, iterable):
+        return iterable
+
+    def activate(self):
+        return _NULL_CONTEXT
+
+
+class _NullContext:
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_CONTEXT = _NullContext()
+NULL_PROFILE = _NullProfile()
+_local = threading.local()
+
+
+def current_profile():
+    """The profile active on this thread, or NULL_PROFILE."""
+    return getattr(_local, 'profile', NULL_PROFILE)
+
+
+def _format_seconds(seconds):
+    if seconds < 1:
+        return f"{seconds * 1000:.0f} ms"
+    return f"{seconds:.2f} s"
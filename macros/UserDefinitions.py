@@ -0,0 +1,113 @@
+# macros/UserDefinitions.py
+# Persistence for the user's own acronym definitions. The tab-separated
+# user_acronyms.txt stays the file users edit, import and export; edits
+# made in the app are appended to a journal next to it and folded back
+# into the file (atomically) once the journal grows.
+import os
+import threading
+
+from .DefinitionStore import (get_user_definition_files, load_definitions_from_file,
+                              load_user_definitions)
+
+# Journal entries kept before they are folded into the main file
+COMPACT_AFTER = 200
+
+_write_lock = threading.Lock()
+
+
+def _clean(text):
+    # Tabs and line breaks would break the one-entry-per-line format
+    return " ".join(text.split())
+
+
+def append_user_definitions(user_definition_path, changes):
+    """
+    Persists {acronym: definition} edits by appending them to the journal.
+    Entries that are empty or already saved are skipped. Returns the number
+    of entries written. The saved definitions and the journal's length are
+    kept in memory, so only the new lines touch the disk (and the whole
+    file only every COMPACT_AFTER entries).
+    """
+    changes = {_clean(acronym): _clean(definition) for acronym, definition in changes.items()}
+    with _write_lock:
+        files = get_user_definition_files(user_definition_path)
+        files.refresh()  # Only rereads if the files were changed outside the app
+        saved = files.definitions
+        new = {acronym: definition for acronym, definition in changes.items()
+               if acronym and definition and saved.get(acronym) != definition}
+        if not new:
+            return 0
+        journal_path = files.journal_path
+        os.makedirs(os.path.dirname(journal_path) or ".", exist_ok=True)
+        _drop_partial_line(journal_path)
+        with open(journal_path, "a", encoding="utf-8") as f:
+            f.write("".join(f"{acronym}\t{definition}\n" for acronym, definition in new.items()))
+            f.flush()
+            os.fsync(f.fileno())
+        files.record_append(new, len(new))
+        if files.journal_lines >= COMPACT_AFTER:
+            _compact(user_definition_path)
+    return len(new)
+
+
+def compact_user_definitions(user_definition_path):
+    """Folds the journal into the user definitions file. Returns True if it did."""
+    with _write_lock:
+        return _compact(user_definition_path)
+
+
+def _compact(user_definition_path):
+    files = get_user_definition_files(user_definition_path)
+    if not os.path.exists(files.journal_path):
+        return False
+    files.refresh()
+    # The journal is only removed once the new file is in place; if that
+    # doesn't happen, replaying it over the new file gives the same result
+    write_definitions_file(user_definition_path, files.definitions)
+    os.remove(files.journal_path)
+    files.record_compact()
+    print(f"User acronym list updated: {user_definition_path}")
+    return True
+
+
+def _drop_partial_line(journal_path):
+    # An append cut short leaves a last line without a newline; it is
+    # ignored when reading, and must not run on into the next entry
+    if not os.path.exists(journal_path):
+        return
+    with open(journal_path, "r+b") as f:
+        size = f.seek(0, os.SEEK_END)
+        if not size:
+            return
+        f.seek(size - 1)
+        if f.read(1) == b"\n":
+            return  # The usual case: only the last byte is read
+        f.seek(0)
+        data = f.read()
+        f.truncate(data.rfind(b"\n") + 1)
+
+
+def write_definitions_file(path, definitions):
+    """Writes a sorted tab-separated definitions file via a temp file and rename."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for acronym, definition in sorted(definitions.items()):
+                f.write(f"{acronym}\t{definition}\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def export_user_definitions(user_definition_path, export_path):
+    """Writes every user definition (journal included) to a tab-separated file."""
+    write_definitions_file(export_path, load_user_definitions(user_definition_path))
+
+
+def import_user_definitions(user_definition_path, import_path):
+    """Adds the definitions of a tab-separated file to the user's. Returns how many changed."""
+    return append_user_definitions(user_definition_path, load_definitions_from_file(import_path))
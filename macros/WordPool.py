@@ -0,0 +1,144 @@
+# macros/WordPool.py
+# A pool of long-lived, hidden Word instances for batch work. Starting
+# Word takes seconds, so each worker thread starts one instance the first
+# time it needs it and keeps it for every file it processes after that.
+# COM objects can't be shared between threads: an instance is only ever
+# used by the thread that started it.
+import queue
+import threading
+from concurrent.futures import Future
+
+DEFAULT_POOL_SIZE = 2
+
+_STOP = object()  # Queued once per worker by close()
+
+
+def start_hidden_word():
+    """A new, hidden Word instance of its own (not the one the user has open)."""
+    import win32com.client as win32
+    word = win32.DispatchEx("Word.Application")
+    word.Visible = False
+    word.DisplayAlerts = False
+    return word
+
+
+class WordPool:
+    """
+    size worker threads, each with its own Word instance. submit() queues
+    a job and returns a concurrent.futures.Future for its result.
+
+    app_factory() starts an instance on the calling worker thread; by
+    default it is start_hidden_word, and each worker enters a COM
+    apartment first. A fake factory (e.g. one returning a
+    FakeWordApplication) needs no COM at all.
+    """
+
+    def __init__(self, size=DEFAULT_POOL_SIZE, app_factory=None, initialize_com=None):
+        if size < 1:
+            raise ValueError("A Word pool needs at least one instance.")
+        self.size = size
+        self.app_factory = app_factory or start_hidden_word
+        self.initialize_com = app_factory is None if initialize_com is None else initialize_com
+        self.instances_started = 0
+        self._jobs = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._threads = []
+        for i in range(size):
+            thread = threading.Thread(target=self._work, name=f"word-pool-{i + 1}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Queues fn(*args, word_app=<a pooled instance>, **kwargs). fn must
+        leave the instance as it found it (close what it opens).
+        """
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("The Word pool has been closed.")
+            self._jobs.put((future, fn, args, kwargs))
+        return future
+
+    def map(self, fn, items, **kwargs):
+        """fn(item, word_app=..., **kwargs) for every item, in parallel; results in order."""
+        futures = [self.submit(fn, item, **kwargs) for item in items]
+        return [future.result() for future in futures]
+
+    def close(self, wait=True):
+        """
+        Stops the workers once the queued jobs are done and quits their Word
+        instances. Safe to call more than once.
+        """
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                for _ in self._threads:
+                    self._jobs.put(_STOP)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _start_instance(self):
+        word = self.app_factory()
+        with self._lock:
+            self.instances_started += 1
+        return word
+
+    def _work(self):
+        if self.initialize_com:
+            import pythoncom
+            pythoncom.CoInitialize()
+        word = None
+        try:
+            while True:
+                job = self._jobs.get()
+                if job is _STOP:
+                    break
+                future, fn, args, kwargs = job
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    if word is None:
+                        word = self._start_instance()
+                    future.set_result(fn(*args, word_app=word, **kwargs))
+                except BaseException as e:
+                    future.set_exception(e)
+                # Jobs usually report failures rather than raise them (e.g.
+                # process_word_document), so check the instance after every
+                # job; a dead one would fail every file after it
+                if word is not None and not _is_alive(word):
+                    print("Warning: A pooled Word instance stopped responding; "
+                          "starting a new one for the next file.")
+                    _quit(word)
+                    word = None
+        finally:
+            if word is not None:
+                _quit(word)
+            word = None  # Release the COM object before leaving the apartment
+            if self.initialize_com:
+                import pythoncom
+                pythoncom.CoUninitialize()
+
+
+def _is_alive(word):
+    # Any property read fails once the instance has crashed or been closed
+    try:
+        word.Documents.Count
+        return True
+    except Exception:
+        return False
+
+
+def _quit(word):
+    try:
+        word.Quit()
+    except Exception:
+        pass
@@ -0,0 +1,185 @@
+# macros/WordWildcards.py
+# Translates Word's wildcard Find syntax (Use Wildcards) into Python regular
+# expressions, and wildcard replacement strings into re templates, so
+# wildcard rows can be matched in-process. Compiled patterns are cached.
+import functools
+import re
+
+# Word Find/Replace ^codes that stand for a single character
+CARET_CODES = {
+    'p': '\r', 't': '\t', 'l': '\x0b', 'm': '\x0c', 'n': '\x0e',
+    's': '\xa0', '~': '\u2011', '-': '\xad', '+': '\u2014', '=': '\u2013',
+    '^': '^',
+}
+
+
+class WildcardError(ValueError):
+    """A wildcard find or replacement string that Word wouldn't accept."""
+
+
+def _caret_code(text, i):
+    # Character of the ^code starting at text[i] ('^'), and where it ends
+    code = text[i + 1:i + 2]
+    if code in CARET_CODES:
+        return CARET_CODES[code], i + 2
+    digits = re.match(r'\d{1,3}', text[i + 1:i + 4])
+    if digits:
+        return chr(int(digits.group())), i + 1 + len(digits.group())
+    raise WildcardError(f"Unsupported Word code '^{code}' in {text!r}")
+
+
+def wildcard_to_regex(pattern):
+    """
+    The regular expression for a Word wildcard pattern:
+      ?  any character          *  any run of characters (shortest first)
+      @  one or more of the previous item
+      [abc] [a-z] [!abc]        a set, a range, or anything but the set
+                                ([0-9] for any digit: '#' is just '#' here)
+      {n} {n,} {n,m}            repeats of the previous item (',' or ';')
+      <  >                      start and end of a word
+      ( )                       a group, for \\1 to \\9 in the replacement
+      ~x or \\x                 the character x itself
+      ^t ^p ^^ ^nnn ...         the character a Word ^code stands for
+    """
+    stack = [[]]  # Items of each open group; an item is (regex, can_repeat)
+    i = 0
+    length = len(pattern)
+    while i < length:
+        ch = pattern[i]
+        items = stack[-1]
+        if ch in '~\\':
+            if i + 1 < length:
+                items.append((re.escape(pattern[i + 1]), True))
+                i += 2
+            else:
+                items.append((re.escape(ch), True))
+                i += 1
+            continue
+        if ch == '^':
+            char, i = _caret_code(pattern, i)
+            items.append((re.escape(char), True))
+            continue
+        i += 1
+        if ch == '?':
+            items.append(('.', True))
+        elif ch == '*':
+            items.append(('.*?', False))
+        elif ch == '<':
+            items.append((r'\b(?=\w)', False))
+        elif ch == '>':
+            items.append((r'\b(?<=\w)', False))
+        elif ch == '[':
+            item, i = _character_set(pattern, i)
+            items.append((item, True))
+        elif ch == '(':
+            stack.append([])
+        elif ch == ')':
+            if len(stack) == 1:
+                raise WildcardError(f"Unmatched ')' in {pattern!r}")
+            group = stack.pop()
+            stack[-1].append(('(' + ''.join(item for item, _ in group) + ')', True))
+        elif ch == '@' or ch == '{':
+            if ch == '@':
+                repeat = '+'
+            else:
+                match = re.compile(r'(\d+)(?:([,;])(\d*))?\}').match(pattern, i)
+                if match is None:
+                    raise WildcardError(f"Bad {{n,m}} repeat in {pattern!r}")
+                low, comma, high = match.groups()
+                if high and int(high) < int(low):
+                    raise WildcardError(f"Bad {{n,m}} repeat in {pattern!r}")
+                repeat = '{' + low + (',' + high if comma else '') + '}'
+                i = match.end()
+            if not items or not items[-1][1]:
+                raise WildcardError(f"Nothing to repeat before '{ch}' in {pattern!r}")
+            item, _ = items[-1]
+            items[-1] = (item + repeat, False)
+        else:
+            items.append((re.escape(ch), True))
+    if len(stack) > 1:
+        raise WildcardError(f"Unmatched '(' in {pattern!r}")
+    return ''.join(item for item, _ in stack[0])
+
+
+def _character_set(pattern, i):
+    # [...] starting after the '['; returns the regex class and where it ends
+    negate = pattern.startswith('!', i)
+    if negate:
+        i += 1
+    members = []
+    while True:
+        if i >= len(pattern):
+            raise WildcardError(f"Unmatched '[' in {pattern!r}")
+        ch = pattern[i]
+        if ch == ']' and members:
+            break
+        if ch in '~\\' and i + 1 < len(pattern):
+            i += 1
+            ch = pattern[i]
+        elif ch == '^':
+            ch, i = _caret_code(pattern, i)
+            i -= 1
+        i += 1
+        if pattern.startswith('-', i) and i + 1 < len(pattern) and pattern[i + 1] != ']':
+            high = pattern[i + 1]
+            if high < ch:
+                raise WildcardError(f"Range {ch}-{high} is not in ascending order in {pattern!r}")
+            members.append(_set_member(ch) + '-' + _set_member(high))
+            i += 2
+        else:
+            members.append(_set_member(ch))
+    return ('[^' if negate else '[') + ''.join(members) + ']', i + 1
+
+
+def _set_member(ch):
+    return '\\' + ch if ch in '\\]^-[' else ch
+
+
+def wildcard_replacement_template(text):
+    """
+    The re template for a wildcard replacement string: \\1 to \\9 are the
+    groups of the find pattern, ^& the whole match and ^codes characters.
+    """
+    parts = []
+    i = 0
+    length = len(text)
+    while i < length:
+        ch = text[i]
+        if ch == '\\' and i + 1 < length:
+            following = text[i + 1]
+            parts.append(f'\\g<{following}>' if following in '123456789' else _template_literal(following))
+            i += 2
+        elif ch == '^' and text.startswith('^&', i):
+            parts.append('\\g<0>')
+            i += 2
+        elif ch == '^':
+            char, i = _caret_code(text, i)
+            parts.append(_template_literal(char))
+        else:
+            parts.append(_template_literal(ch))
+            i += 1
+    return ''.join(parts)
+
+
+def _template_literal(ch):
+    return '\\\\' if ch == '\\' else ch
+
+
+@functools.lru_cache(maxsize=1024)
+def compile_wildcard(pattern, replacement=None):
+    """
+    The compiled regex for a Word wildcard pattern and, if a replacement
+    is given, its template: (regex, template). Cached.
+    """
+    try:
+        regex = re.compile(wildcard_to_regex(pattern), re.DOTALL)
+    except re.error as e:
+        raise WildcardError(f"Invalid wildcard pattern {pattern!r}: {e}") from None
+    if replacement is None:
+        return regex, None
+    template = wildcard_replacement_template(replacement)
+    groups = [int(n) for n in re.findall(r'\\g<([1-9])>', template)]
+    if groups and max(groups) > regex.groups:
+        raise WildcardError(f"{replacement!r} refers to group \\{max(groups)}, "
+                            f"but {pattern!r} has {regex.groups} group(s)")
+    return regex, template
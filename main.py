@@ -1,16 +1,17 @@
 import sys
 import os
-import nltk
+from ui.startupprofile import StartupProfile
+
+# `python main.py --startup-profile` prints import and first-paint timings
+startup_profile = StartupProfile(enabled='--startup-profile' in sys.argv)
+
 from PyQt5.QtWidgets import QApplication
 from PyQt5.QtCore import QTimer
+startup_profile.mark("import PyQt5")
 from ui.mainwindow import MainWindow
-
-# --- NLTK data path for PyInstaller ---
-if getattr(sys, 'frozen', False) and hasattr(sys, '_MEIPASS'):
-    nltk_data_dir = os.path.join(sys._MEIPASS, 'nltk_data')
-    if nltk_data_dir not in nltk.data.path:
-        nltk.data.path.append(nltk_data_dir)
-# --- End NLTK data path for PyInstaller ---
+startup_profile.mark("import ui.mainwindow")
+# nltk is imported by macros.EnglishLexicon (which also sets the PyInstaller
+# nltk_data path) only when WordNet is actually needed.
 
 
 def get_resource_path(relative_path):
@@ -29,6 +30,7 @@ def get_resource_path(relative_path):
 def main():
     # Create a QApplication, which is necessary for any PyQt application
     app = QApplication(sys.argv)
+    startup_profile.mark("QApplication created")
 
     # --- Load and apply the stylesheet ---
     try:
@@ -42,10 +44,12 @@ def main():
     except Exception as e:
         print(f"Error loading stylesheet: {e}")
     # --- End stylesheet ---
-
+    startup_profile.mark("stylesheet applied")
 
     # Create an instance of MainWindow and show it
     main_window = MainWindow()
+    startup_profile.mark("MainWindow constructed")
+    startup_profile.watch_first_paint(main_window, startup_profile.print_report)
     main_window.show()
 
     # Defer loading the acronym list (or any other expensive startup work)
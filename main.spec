@@ -4,30 +4,28 @@ import sys
 import os
 from PyInstaller.utils.hooks import collect_data_files
 
-# --- !!! USER ACTION REQUIRED !!! ---
-# 1.  VERIFY the 'nltk_data_path'. We've set it to the Roaming path,
-#     but YOU MUST CONFIRM that 'corpora/wordnet' exists inside it.
-#     If not, choose the correct path from your output.
-# ------------------------------------
-
 block_cipher = None
 
-# --- NLTK Data Path (VERIFY THIS!) ---
-# We are using the Roaming path based on your output. PLEASE CHECK IT!
-nltk_data_path = 'C:\\Users\\jdufour\\AppData\\Roaming\\nltk_data'
-
 # --- Project Paths ---
 project_root = '.' # Assumes .spec is in the root
 
+# --- English Lexicon ---
+# WordNet is shipped as a precompiled lexicon instead of the nltk_data tree.
+# It is (re)built here from the WordNet corpus installed for nltk on the
+# build machine whenever it is missing or out of date.
+sys.path.insert(0, SPECPATH)
+from macros.EnglishLexicon import LEXICON_FILENAME, build_lexicon, load_lexicon_data
+lexicon_path = os.path.join(SPECPATH, 'lexicon', LEXICON_FILENAME)
+if load_lexicon_data(lexicon_path) is None:
+    build_lexicon(lexicon_path)
+
 # --- Data Files ---
-# Add icons, acronym list, and NLTK data.
+# Add icons and the acronym list.
 # ('source_path', 'destination_folder_in_bundle')
 datas = [
     ('ui/leaf.png', 'ui'),
     ('ui/leaf.ico', 'ui'),
     ('acronyms/acronym list.txt', 'acronyms'),
-    (os.path.join(nltk_data_path, 'corpora/wordnet'), 'nltk_data/corpora/wordnet'),
-    (os.path.join(nltk_data_path, 'corpora/omw-1.4'), 'nltk_data/corpora/omw-1.4'), # Wordnet 1.4, often needed
 ]
 
 # --- PyQt5 Data ---
@@ -58,6 +56,8 @@ a = Analysis(
     datas=[
         ('ui/style.qss', 'ui'),  # Copy style.qss into a 'ui' folder
         ('ui/*.ico', 'ui'),      # Copy all .ico files into the 'ui' folder
+        # Precompiled English lexicon, built above
+        (lexicon_path, 'lexicon'),
         # Add any other data files here, like your acronym list if not fetched online
         # ('acronyms/acronym list.txt', 'acronyms') # Example
     ],
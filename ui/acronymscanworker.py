@@ -0,0 +1,83 @@
+# ui/acronymscanworker.py
+# Runs the base list refresh and the acronym scan off the GUI thread, so the
+# Acronyms window stays responsive and can show results as they are found.
+import threading
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from macros.AcronymList import (ACRONYM_LIST_URL, fetch_acronym_list_online,
+                                get_base_acronym_cache_path)
+
+
+class AcronymScanWorker(QObject):
+    """
+    Lives on a QThread; call run() from thread.started. Exactly one of
+    finished, cancelled, no_document or failed is emitted, then stopped.
+    """
+
+    progress = pyqtSignal(int, int)         # Paragraphs and words scanned so far
+    partial_results = pyqtSignal(object)    # {category: {acronym: context}} found since the last signal
+    finished = pyqtSignal(object, object, str)  # Scan result, ScanProfile, base definition path
+    cancelled = pyqtSignal()
+    no_document = pyqtSignal()
+    failed = pyqtSignal(str)
+    stopped = pyqtSignal()
+
+    def __init__(self, user_definition_path):
+        super().__init__()
+        self.user_definition_path = user_definition_path
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        """Asks the scan to stop; it checks between paragraphs. Thread-safe."""
+        self._cancel.set()
+
+    def is_cancelled(self):
+        return self._cancel.is_set()
+
+    def _report_progress(self, paragraphs, words, new_acronyms):
+        if self._cancel.is_set():
+            return
+        self.progress.emit(paragraphs, words)
+        if any(new_acronyms.values()):
+            self.partial_results.emit(new_acronyms)
+
+    def run(self):
+        # Imported here so the window itself doesn't pull them in at startup
+        from macros.Acronyms import ScanCancelled, scan_acronyms
+        from macros.ScanProfile import ScanProfile
+        import pythoncom
+        import win32com.client
+
+        # COM objects can't be shared between threads; this thread gets its
+        # own apartment and its own connection to the running Word instance
+        pythoncom.CoInitialize()
+        word_app = None
+        try:
+            word_app = win32com.client.Dispatch('Word.Application')
+            if not word_app.Documents.Count:
+                self.no_document.emit()
+                return
+
+            base_definition_path = fetch_acronym_list_online(
+                ACRONYM_LIST_URL, get_base_acronym_cache_path())
+            if self._cancel.is_set():
+                self.cancelled.emit()
+                return
+
+            # Re-scans of the same document reuse the results of unchanged paragraphs
+            profile = ScanProfile()
+            result = scan_acronyms(word_app, base_definition_path, self.user_definition_path,
+                                   incremental=True, profile=profile,
+                                   progress_callback=self._report_progress,
+                                   cancel_check=self._cancel.is_set)
+            self.finished.emit(result, profile, base_definition_path)
+        except ScanCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            print(f"Error running macro: {e}")
+            self.failed.emit(str(e))
+        finally:
+            word_app = None  # Release the COM object before leaving the apartment
+            pythoncom.CoUninitialize()
+            self.stopped.emit()
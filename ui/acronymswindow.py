@@ -1,45 +1,33 @@
 # ui/acronymswindow.py
 from PyQt5.QtWidgets import (QMainWindow, QVBoxLayout, QHBoxLayout, QWidget,
                              QPushButton, QFileDialog, QSizePolicy,
-                             QTableWidget, QTableWidgetItem, QCheckBox,
-                             QTabWidget, QHeaderView, QMessageBox, QAbstractScrollArea)
+                             QTabWidget, QHeaderView, QMessageBox, QLabel)
 import os
 import sys
-import requests
-import win32com.client
 from PyQt5.QtGui import QIcon
-from docx import Document
-from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtCore import Qt, QTimer, QThread
+
+# The fetch helper lives in a lightweight module; re-exported here for
+# existing callers.
+from macros.AcronymList import (ACRONYM_LIST_URL, fetch_acronym_list_online,
+                                get_base_acronym_cache_path)
 
 try:
-    from macros.Acronyms import find_acronyms, get_definition
+    from macros.Acronyms import scan_acronyms, select_first_occurrence
+    from macros.DefinitionStore import get_definition_store
+    from macros.UserDefinitions import append_user_definitions, compact_user_definitions
 except ImportError:
     print("Error: Could not import Acronyms macro. Make sure macros/Acronyms.py exists.")
-    find_acronyms = None
-    get_definition = None
-
-def fetch_acronym_list_online(url, base_cache_path):
-    """
-    Fetch the acronym list from the online URL.
-    On success, write the file to base_cache_path and return the path.
-    On failure, if a cached base file exists, return that;
-    otherwise, raise an exception.
-    """
-    try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        os.makedirs(os.path.dirname(base_cache_path), exist_ok=True)
-        with open(base_cache_path, "w", encoding="utf-8") as f:
-            f.write(response.text)
-        print(f"Fetched base acronym list to: {base_cache_path}")
-        return base_cache_path
-    except Exception as e:
-        print(f"Failed to fetch base acronym list online: {e}")
-        if os.path.exists(base_cache_path):
-            print(f"Using cached base acronym list: {base_cache_path}")
-            return base_cache_path
-        else:
-            raise Exception(f"Failed to fetch base acronym list and no cache available: {e}")
+    scan_acronyms = None
+    select_first_occurrence = None
+    get_definition_store = None
+    append_user_definitions = None
+    compact_user_definitions = None
+
+from .acronymscanworker import AcronymScanWorker
+from .acronymtablemodel import (AcronymRow, AcronymTableModel, AcronymTableView,
+                                ACRONYM_COLUMN, DEFINITION_COLUMN, INCLUDE_COLUMN,
+                                CONTEXT_COLUMN, USES_COLUMN)
 
 class AcronymsWindow(QMainWindow):
     def __init__(self, parent=None):
@@ -47,6 +35,14 @@ class AcronymsWindow(QMainWindow):
         self.base_acronym_file_path = None
         self.user_acronym_file_path = os.path.join(os.path.expanduser("~"), ".doc_companion", "user_acronyms.txt")
         os.makedirs(os.path.dirname(self.user_acronym_file_path), exist_ok=True)
+        self.scan_worker = None     # Worker of the scan in progress, if any
+        self.scan_threads = set()   # Threads kept alive until they have finished
+
+        # Edited definitions are saved shortly after the user stops typing
+        self.save_definitions_timer = QTimer(self)
+        self.save_definitions_timer.setSingleShot(True)
+        self.save_definitions_timer.setInterval(1000)
+        self.save_definitions_timer.timeout.connect(self.save_user_definitions)
 
         self.setWindowTitle("Acronym Finder")
         self.setMinimumSize(800, 600)
@@ -63,9 +59,16 @@ class AcronymsWindow(QMainWindow):
         self.layout.setContentsMargins(10, 10, 10, 10)
         self.layout.setSpacing(10)
 
+        run_layout = QHBoxLayout()
         self.run_macro_button = QPushButton("Find Acronyms", self)
         self.run_macro_button.clicked.connect(self.run_macro)
-        self.layout.addWidget(self.run_macro_button)
+        run_layout.addWidget(self.run_macro_button)
+
+        self.cancel_scan_button = QPushButton("Cancel", self)
+        self.cancel_scan_button.clicked.connect(self.cancel_scan)
+        self.cancel_scan_button.setVisible(False)
+        run_layout.addWidget(self.cancel_scan_button)
+        self.layout.addLayout(run_layout)
 
         self.tab_widget = QTabWidget(self)
         self.layout.addWidget(self.tab_widget)
@@ -79,6 +82,10 @@ class AcronymsWindow(QMainWindow):
         self.tab_widget.addTab(self.create_tab_widget(self.possible_table), "Possible")
         self.tab_widget.addTab(self.create_tab_widget(self.unlikely_table), "Unlikely")
 
+        # One-line timing summary of the last scan
+        self.scan_summary_label = QLabel("", self)
+        self.layout.addWidget(self.scan_summary_label)
+
         # --- Bottom Controls Layout ---
         bottom_layout = QHBoxLayout()
         bottom_layout.setSpacing(15)
@@ -142,9 +149,11 @@ class AcronymsWindow(QMainWindow):
         return widget
 
     def create_table(self):
-        """Creates and configures a QTableWidget."""
-        table = QTableWidget(0, 4)
-        table.setHorizontalHeaderLabels(["Acronym", "Definition", "Include", "Context"])
+        """Creates and configures an AcronymTableView with its own model."""
+        table = AcronymTableView()
+        model = AcronymTableModel(table)
+        model.definitions_edited.connect(self.save_definitions_timer.start)
+        table.setModel(model)
         table.verticalHeader().setVisible(False)
         table.setAlternatingRowColors(True)
         table.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
@@ -153,111 +162,183 @@ class AcronymsWindow(QMainWindow):
         table.verticalHeader().setMinimumSectionSize(25)
         table.verticalHeader().setDefaultSectionSize(35)
 
-        table.setColumnWidth(0, 110)
-        table.setColumnWidth(1, 350)
-        table.setColumnWidth(2, 60)
-        table.horizontalHeader().setSectionResizeMode(3, QHeaderView.Stretch)
-        table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Interactive)
-        table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Interactive)
-        table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Fixed)
-
-        table.setSizeAdjustPolicy(QAbstractScrollArea.AdjustToContentsOnFirstShow)
+        table.setColumnWidth(ACRONYM_COLUMN, 110)
+        table.setColumnWidth(DEFINITION_COLUMN, 350)
+        table.setColumnWidth(INCLUDE_COLUMN, 60)
+        table.setColumnWidth(USES_COLUMN, 50)
+        table.horizontalHeader().setSectionResizeMode(CONTEXT_COLUMN, QHeaderView.Stretch)
+        table.horizontalHeader().setSectionResizeMode(DEFINITION_COLUMN, QHeaderView.Interactive)
+        table.horizontalHeader().setSectionResizeMode(ACRONYM_COLUMN, QHeaderView.Interactive)
+        table.horizontalHeader().setSectionResizeMode(INCLUDE_COLUMN, QHeaderView.Fixed)
+        table.horizontalHeader().setSectionResizeMode(USES_COLUMN, QHeaderView.Fixed)
+        # Double-clicking the usage count jumps to the first occurrence in Word
+        table.doubleClicked.connect(
+            lambda index, t=table: self.jump_to_first_occurrence(t, index.row(), index.column()))
 
         return table
 
     def run_macro(self):
-        if not find_acronyms or not get_definition:
+        if not scan_acronyms or not get_definition_store:
             QMessageBox.critical(self, "Error", "Acronym functions are not loaded.")
             return
-        try:
-            word_app = win32com.client.Dispatch('Word.Application')
-            if not word_app.Documents.Count:
-                QMessageBox.warning(self, "Warning", "No active Word document found.")
-                return
+        if self.scan_worker is not None:
+            return
+
+        self.save_user_definitions()  # Before the tables are cleared
+        # The list refresh and the scan run on a worker thread; results
+        # arrive through signals while the window stays responsive
+        for table in (self.likely_table, self.possible_table, self.unlikely_table):
+            table.model().clear()
+        worker = AcronymScanWorker(self.user_acronym_file_path)
+        thread = QThread()
+        worker.moveToThread(thread)
+        worker.progress.connect(self.on_scan_progress)
+        worker.partial_results.connect(self.on_scan_partial_results)
+        worker.finished.connect(self.on_scan_finished)
+        worker.cancelled.connect(self.on_scan_cancelled)
+        worker.no_document.connect(self.on_scan_no_document)
+        worker.failed.connect(self.on_scan_failed)
+        thread.started.connect(worker.run)
+        worker.stopped.connect(thread.quit)
+        thread.finished.connect(lambda t=thread, w=worker: self.scan_threads.discard((t, w)))
+
+        self.scan_worker = worker
+        self.scan_threads.add((thread, worker))
+        self.set_scanning(True)
+        self.scan_summary_label.setText("Fetching acronym list...")
+        thread.start()
+
+    def set_scanning(self, scanning):
+        self.run_macro_button.setEnabled(not scanning)
+        self.cancel_scan_button.setVisible(scanning)
+
+    def cancel_scan(self):
+        """Stops waiting for the current scan; the worker stops at the next paragraph."""
+        if self.scan_worker is None:
+            return
+        self.scan_worker.cancel()
+        self.scan_worker = None
+        self.set_scanning(False)
+        self.scan_summary_label.setText("Scan cancelled.")
+
+    def _is_current_scan(self):
+        # Signals from a cancelled scan can still be queued; ignore them
+        return self.scan_worker is not None and self.sender() is self.scan_worker
 
-            url = (
-                "https://raw.githubusercontent.com/IIDelta/Doc_Companion/"
-                "main/acronyms/acronym%20list.txt"
-            )
-            doc_companion_dir = os.path.join(os.path.expanduser("~"), ".doc_companion")
-            base_list_filename = "base_acronym_list.txt"
-            self.base_acronym_file_path = os.path.join(doc_companion_dir, base_list_filename)
-            self.base_acronym_file_path = fetch_acronym_list_online(url, self.base_acronym_file_path)
+    def on_scan_progress(self, paragraphs, words):
+        if self._is_current_scan():
+            self.scan_summary_label.setText(f"Scanning... {paragraphs:,} paragraphs, {words:,} words")
 
-            acronyms = find_acronyms(word_app, self.base_acronym_file_path, self.user_acronym_file_path)
+    def on_scan_partial_results(self, new_acronyms):
+        if not self._is_current_scan():
+            return
+        self.append_partial_rows(self.likely_table, new_acronyms.get('likely', {}), True)
+        self.append_partial_rows(self.possible_table, new_acronyms.get('possible', {}), True)
+        self.append_partial_rows(self.unlikely_table, new_acronyms.get('unlikely', {}), False)
 
+    def on_scan_finished(self, acronyms, profile, base_acronym_file_path):
+        if not self._is_current_scan():
+            return
+        self.scan_worker = None
+        self.set_scanning(False)
+        self.base_acronym_file_path = base_acronym_file_path
+        # Refilling the tables drops their edited-rows lists, so journal any
+        # edits still waiting for the save timer first
+        self.save_user_definitions()
+        try:
             self.populate_table(self.likely_table, acronyms.get('likely', {}), True)
             self.populate_table(self.possible_table, acronyms.get('possible', {}), True)
             self.populate_table(self.unlikely_table, acronyms.get('unlikely', {}), False)
-
+            self.scan_summary_label.setText(profile.summary_line())
         except Exception as e:
             QMessageBox.critical(self, "Error", f"An error occurred: {str(e)}")
             print(f"Error running macro: {e}")
 
+    def on_scan_cancelled(self):
+        if self._is_current_scan():
+            self.scan_worker = None
+            self.set_scanning(False)
+            self.scan_summary_label.setText("Scan cancelled.")
+
+    def on_scan_no_document(self):
+        if self._is_current_scan():
+            self.scan_worker = None
+            self.set_scanning(False)
+            self.scan_summary_label.setText("")
+            QMessageBox.warning(self, "Warning", "No active Word document found.")
+
+    def on_scan_failed(self, message):
+        if self._is_current_scan():
+            self.scan_worker = None
+            self.set_scanning(False)
+            self.scan_summary_label.setText("")
+            QMessageBox.critical(self, "Error", f"An error occurred: {message}")
+
+    def append_partial_rows(self, table, data, is_checked_default):
+        """
+        Adds rows for acronyms found so far in a running scan. The table is
+        filled in again from the final result when the scan finishes.
+        """
+        table.model().append_rows(
+            AcronymRow(acronym, checked=is_checked_default, context=context)
+            for acronym, context in data.items())
+
+    def closeEvent(self, event):
+        self.cancel_scan()
+        self.save_user_definitions()
+        if compact_user_definitions:
+            try:
+                compact_user_definitions(self.user_acronym_file_path)
+            except Exception as e:
+                print(f"Warning: Could not compact user definitions: {e}")
+        super().closeEvent(event)
+
     def populate_table(self, table, data, is_checked_default):
-        """Populates a table with acronym data and resizes rows."""
-        table.setUpdatesEnabled(False) # Disable updates for speed
-        table.setRowCount(0)
-        for acronym, context in data.items():
-            row_position = table.rowCount()
-            table.insertRow(row_position)
-            table.setItem(row_position, 0, QTableWidgetItem(acronym))
-            definition_text = get_definition(acronym, self.base_acronym_file_path, self.user_acronym_file_path)
-            table.setItem(row_position, 1, QTableWidgetItem(definition_text))
-
-            checkbox = QCheckBox()
-            checkbox.setChecked(is_checked_default)
-            cell_widget = QWidget()
-            cell_layout = QHBoxLayout(cell_widget)
-            cell_layout.addWidget(checkbox)
-            cell_layout.setAlignment(Qt.AlignCenter)
-            cell_layout.setContentsMargins(0, 0, 0, 0)
-            table.setCellWidget(row_position, 2, cell_widget)
-
-            table.setItem(row_position, 3, QTableWidgetItem(context))
-
-        table.setUpdatesEnabled(True) # Re-enable updates
-        table.resizeRowsToContents() # Resize rows AFTER populating
+        """Replaces the rows of a table with acronym data."""
+        # One batch lookup against the in-memory definition store
+        definitions = get_definition_store(
+            self.base_acronym_file_path, self.user_acronym_file_path).get_many(data)
+        # entry.context is built here, once per row, not per occurrence
+        table.model().set_rows(
+            AcronymRow(acronym, definitions[acronym], is_checked_default, entry.context,
+                       entry.count, entry.first_word, entry.occurrences.match_case)
+            for acronym, entry in data.items())
+
+    def jump_to_first_occurrence(self, table, row, column):
+        """Selects the first use of the row's acronym in the active document."""
+        if column != USES_COLUMN or select_first_occurrence is None:
+            return
+        acronym_row = table.model().rows[row]
+        first_word = acronym_row.first_word
+        if not first_word:
+            return
+        try:
+            import win32com.client
+            word_app = win32com.client.Dispatch('Word.Application')
+            match_case = acronym_row.match_case
+            if not select_first_occurrence(word_app, first_word, match_case):
+                QMessageBox.information(self, "Not Found", f"'{first_word}' was not found in the main text.")
+        except Exception as e:
+            QMessageBox.warning(self, "Warning", f"Could not jump to '{first_word}': {e}")
 
     def generate_table(self):
         self.save_user_definitions()
         self.create_word_table()
 
     def save_user_definitions(self):
-        user_definitions = {}
+        """Journals the acronyms and definitions edited since the last save."""
+        self.save_definitions_timer.stop()
+        changes = {}
+        for table in [self.likely_table, self.possible_table, self.unlikely_table]:
+            for acronym_row in table.model().take_edited_rows():
+                changes[acronym_row.acronym] = acronym_row.definition
+        if not changes or not append_user_definitions:
+            return
         try:
-            with open(self.user_acronym_file_path, 'r', encoding='utf-8') as f:
-                for line in f:
-                    line = line.strip()
-                    if '\t' in line:
-                        acr, deph = line.split('\t', 1)
-                        user_definitions[acr] = deph
-        except FileNotFoundError:
-            pass
+            if append_user_definitions(self.user_acronym_file_path, changes):
+                print(f"User acronym definitions saved: {self.user_acronym_file_path}")
         except Exception as e:
-            QMessageBox.warning(self, "Warning", f"Could not read user definitions: {e}")
-            return
-
-        made_changes = False
-        for table_widget in [self.likely_table, self.possible_table, self.unlikely_table]:
-            for r in range(table_widget.rowCount()):
-                acr_item = table_widget.item(r, 0)
-                defn_item = table_widget.item(r, 1)
-                if acr_item and defn_item:
-                    acr = acr_item.text().strip()
-                    defn = defn_item.text().strip()
-                    if acr and defn and (acr not in user_definitions or user_definitions[acr] != defn):
-                        user_definitions[acr] = defn
-                        made_changes = True
-
-        if made_changes:
-            try:
-                with open(self.user_acronym_file_path, 'w', encoding='utf-8') as f:
-                    for acr, deph in sorted(user_definitions.items()):
-                        f.write(f"{acr}\t{deph}\n")
-                print(f"User acronym list updated: {self.user_acronym_file_path}")
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Failed to save user definitions: {e}")
+            QMessageBox.critical(self, "Error", f"Failed to save user definitions: {e}")
 
     def create_word_table(self):
         file_path, _ = QFileDialog.getSaveFileName(
@@ -266,6 +347,7 @@ class AcronymsWindow(QMainWindow):
             return
 
         try:
+            from docx import Document  # Only needed when generating a table
             doc = Document()
             doc.add_heading('List of Acronyms and Abbreviations', level=1)
             table = doc.add_table(rows=1, cols=2)
@@ -275,14 +357,9 @@ class AcronymsWindow(QMainWindow):
             hdr_cells[1].text = 'Definition'
 
             rows_to_add = []
-            for table_widget in [self.likely_table, self.possible_table, self.unlikely_table]:
-                for i in range(table_widget.rowCount()):
-                    cell_widget = table_widget.cellWidget(i, 2)
-                    checkbox = cell_widget.findChild(QCheckBox) if cell_widget else None
-                    if checkbox and checkbox.isChecked():
-                        acr = table_widget.item(i, 0).text()
-                        defn = table_widget.item(i, 1).text() or "---"
-                        rows_to_add.append((acr, defn))
+            for table_view in [self.likely_table, self.possible_table, self.unlikely_table]:
+                for acronym_row in table_view.model().checked_rows():
+                    rows_to_add.append((acronym_row.acronym, acronym_row.definition or "---"))
 
             rows_to_add.sort(key=lambda x: x[0].upper())
 
@@ -309,39 +386,21 @@ class AcronymsWindow(QMainWindow):
             self.show()
 
     def check_uncheck_all(self, table):
-        new_state = None
-        for i in range(table.rowCount()):
-            cell_widget = table.cellWidget(i, 2)
-            checkbox = cell_widget.findChild(QCheckBox) if cell_widget else None
-            if checkbox:
-                if new_state is None:
-                    new_state = not checkbox.isChecked()
-                checkbox.setChecked(new_state)
+        table.model().toggle_all_checked()
 
     def add_new_row(self, table):
         """Adds a new, empty row to the specified table."""
-        row_position = table.rowCount()
-        table.insertRow(row_position)
-        table.setItem(row_position, 0, QTableWidgetItem(""))
-        table.setItem(row_position, 1, QTableWidgetItem(""))
-
-        checkbox = QCheckBox()
-        checkbox.setChecked(True)
-        cell_widget = QWidget()
-        cell_layout = QHBoxLayout(cell_widget)
-        cell_layout.addWidget(checkbox)
-        cell_layout.setAlignment(Qt.AlignCenter)
-        cell_layout.setContentsMargins(0, 0, 0, 0)
-        table.setCellWidget(row_position, 2, cell_widget)
-
-        table.setItem(row_position, 3, QTableWidgetItem(""))
-        table.resizeRowToContents(row_position) # Resize this specific new row
-        table.editItem(table.item(row_position, 0)) # Start editing
+        model = table.model()
+        model.append_rows([AcronymRow()])
+        index = model.index(model.rowCount() - 1, ACRONYM_COLUMN)
+        table.scrollTo(index)
+        table.setCurrentIndex(index)
+        table.edit(index) # Start editing
 
     def add_row_to_current_tab(self):
         """Adds a new row to the table in the currently selected tab."""
         current_widget = self.tab_widget.currentWidget()
         if current_widget:
-            table = current_widget.findChild(QTableWidget)
+            table = current_widget.findChild(AcronymTableView)
             if table:
-                self.add_new_row(table)
\ No newline at end of file
+                self.add_new_row(table)
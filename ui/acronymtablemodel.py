@@ -0,0 +1,211 @@
+# ui/acronymtablemodel.py
+# Model and view for the Likely/Possible/Unlikely acronym tables. Rows are
+# plain Python objects; the view only creates and measures what is on
+# screen, so tables with tens of thousands of rows fill and scroll quickly.
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QTimer, pyqtSignal
+from PyQt5.QtWidgets import QTableView
+
+ACRONYM_COLUMN = 0
+DEFINITION_COLUMN = 1
+INCLUDE_COLUMN = 2
+CONTEXT_COLUMN = 3
+USES_COLUMN = 4
+HEADERS = ["Acronym", "Definition", "Include", "Context", "Uses"]
+
+# Rows measured per pass when fitting row heights to their text
+ROW_HEIGHT_BATCH = 200
+
+
+class AcronymRow:
+    __slots__ = ('acronym', 'definition', 'checked', 'context', 'count',
+                 'first_word', 'match_case')
+
+    def __init__(self, acronym="", definition="", checked=True, context="",
+                 count=None, first_word=None, match_case=False):
+        self.acronym = acronym
+        self.definition = definition
+        self.checked = checked
+        self.context = context
+        self.count = count            # None for rows not (yet) counted
+        self.first_word = first_word  # Word to select for "jump to first use"
+        self.match_case = match_case
+
+
+class AcronymTableModel(QAbstractTableModel):
+    """The rows of one acronym tab. Include is a check-state column."""
+
+    # Emitted when the user edits an acronym or definition
+    definitions_edited = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = []
+        self._edited_rows = {}  # id(row) -> row, for rows with unsaved edits
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return HEADERS[section]
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        column = index.column()
+        if column == INCLUDE_COLUMN:
+            return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsUserCheckable
+        if column == USES_COLUMN:
+            return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsEditable
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self.rows[index.row()]
+        column = index.column()
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            if column == ACRONYM_COLUMN:
+                return row.acronym
+            if column == DEFINITION_COLUMN:
+                return row.definition
+            if column == CONTEXT_COLUMN:
+                return row.context
+            if column == USES_COLUMN:
+                return "" if row.count is None else str(row.count)
+        elif role == Qt.CheckStateRole and column == INCLUDE_COLUMN:
+            return Qt.Checked if row.checked else Qt.Unchecked
+        elif role == Qt.TextAlignmentRole and column == USES_COLUMN:
+            return Qt.AlignCenter
+        elif role == Qt.ToolTipRole and column == USES_COLUMN and row.first_word:
+            return "Double-click to jump to the first use in Word"
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid():
+            return False
+        row = self.rows[index.row()]
+        column = index.column()
+        edited_definition = False
+        if role == Qt.CheckStateRole and column == INCLUDE_COLUMN:
+            row.checked = value == Qt.Checked
+        elif role == Qt.EditRole and column == ACRONYM_COLUMN:
+            row.acronym = value
+            edited_definition = True
+        elif role == Qt.EditRole and column == DEFINITION_COLUMN:
+            row.definition = value
+            edited_definition = True
+        elif role == Qt.EditRole and column == CONTEXT_COLUMN:
+            row.context = value
+        else:
+            return False
+        self.dataChanged.emit(index, index, [role])
+        if edited_definition:
+            self._edited_rows[id(row)] = row
+            self.definitions_edited.emit()
+        return True
+
+    def set_rows(self, rows):
+        """Replaces all rows (dropping any unsaved edits; see take_edited_rows)."""
+        self.beginResetModel()
+        self.rows = list(rows)
+        self._edited_rows = {}
+        self.endResetModel()
+
+    def clear(self):
+        self.set_rows([])
+
+    def append_rows(self, rows):
+        rows = list(rows)
+        if not rows:
+            return
+        first = len(self.rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self.rows.extend(rows)
+        self.endInsertRows()
+
+    def set_all_checked(self, checked):
+        """Checks or unchecks every row, with one change notification."""
+        if not self.rows:
+            return
+        for row in self.rows:
+            row.checked = checked
+        self.dataChanged.emit(self.index(0, INCLUDE_COLUMN),
+                              self.index(len(self.rows) - 1, INCLUDE_COLUMN),
+                              [Qt.CheckStateRole])
+
+    def toggle_all_checked(self):
+        """Unchecks everything if the first row is checked, else checks everything."""
+        if self.rows:
+            self.set_all_checked(not self.rows[0].checked)
+
+    def checked_rows(self):
+        return [row for row in self.rows if row.checked]
+
+    def take_edited_rows(self):
+        """Rows whose acronym or definition was edited since the last call."""
+        rows = list(self._edited_rows.values())
+        self._edited_rows = {}
+        return rows
+
+
+class AcronymTableView(QTableView):
+    """
+    Table view that fits row heights to their (wrapped) text only for the
+    rows scrolled into view, instead of measuring every row up front.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._measured_rows = set()
+        self._fit_timer = QTimer(self)
+        self._fit_timer.setSingleShot(True)
+        self._fit_timer.setInterval(0)
+        self._fit_timer.timeout.connect(self.fit_visible_rows)
+        self.verticalScrollBar().valueChanged.connect(self._schedule_fit)
+        self.horizontalHeader().sectionResized.connect(self._forget_row_heights)
+
+    def setModel(self, model):
+        super().setModel(model)
+        model.modelReset.connect(self._forget_row_heights)
+        model.rowsInserted.connect(self._schedule_fit)
+        model.dataChanged.connect(self._on_data_changed)
+
+    def _schedule_fit(self, *args):
+        self._fit_timer.start()
+
+    def _forget_row_heights(self, *args):
+        self._measured_rows.clear()
+        self._schedule_fit()
+
+    def _on_data_changed(self, top_left, bottom_right, roles=()):
+        # Check-state changes don't affect the height of a row
+        if roles and all(role == Qt.CheckStateRole for role in roles):
+            return
+        for row in range(top_left.row(), bottom_right.row() + 1):
+            self._measured_rows.discard(row)
+        self._schedule_fit()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._schedule_fit()
+
+    def fit_visible_rows(self):
+        """Sizes the rows currently in view (and a screenful below) to their contents."""
+        model = self.model()
+        if model is None or not model.rowCount():
+            return
+        first = max(self.rowAt(0), 0)
+        last = self.rowAt(self.viewport().height())
+        if last < 0:
+            last = model.rowCount() - 1
+        # A screenful ahead, so scrolling down doesn't show rows jumping in size
+        last = min(last + (last - first) + 1, model.rowCount() - 1, first + ROW_HEIGHT_BATCH)
+        for row in range(first, last + 1):
+            if row not in self._measured_rows:
+                self._measured_rows.add(row)
+                self.resizeRowToContents(row)
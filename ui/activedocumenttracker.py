@@ -0,0 +1,166 @@
+# ui/activedocumenttracker.py
+# Keeps track of the document that is active in Word, for the main window.
+# Word's application events (DocumentChange, WindowActivate,
+# DocumentBeforeClose, Quit) say when to look again, so while they work
+# Word is only asked about its active document when that may have changed.
+# Without events (or while Word isn't running) it falls back to polling,
+# backing off while nothing changes.
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+MIN_POLL_INTERVAL = 1000    # ms
+MAX_POLL_INTERVAL = 16000   # ms; also how often a connection with events is checked
+# A closing document can still be the active one for a moment (or the close
+# can be cancelled), so look again a little after DocumentBeforeClose
+CLOSE_REFRESH_DELAY = 300   # ms
+
+
+def get_running_word():
+    """The running Word application, or an exception if there is none."""
+    import win32com.client
+    return win32com.client.GetActiveObject('Word.Application')
+
+
+class _WordEventSink:
+    """
+    Handler class for win32com.client.WithEvents; win32com calls the On...
+    methods. tracker is set on the instance after it is created.
+    """
+    tracker = None
+
+    def OnDocumentChange(self):
+        self.tracker.on_document_change()
+
+    def OnWindowActivate(self, doc, window):
+        self.tracker.on_document_change()
+
+    def OnDocumentBeforeClose(self, doc, cancel):
+        self.tracker.on_document_before_close()
+
+    def OnQuit(self):
+        self.tracker.on_quit()
+
+
+def attach_word_events(word_app, tracker):
+    """Connects Word's application events to tracker; returns the connection."""
+    import win32com.client
+    sink = win32com.client.WithEvents(word_app, _WordEventSink)
+    sink.tracker = tracker
+    return sink
+
+
+def _read_active_document(word_app):
+    # (name, folder) of the active document, or None if no document is open
+    if not word_app.Documents.Count:
+        return None
+    document = word_app.ActiveDocument
+    return document.Name, document.Path
+
+
+class ActiveDocumentTracker(QObject):
+    """
+    Emits changed((name, folder)) or changed(None) whenever the active Word
+    document changes, and holds the latest value in .document.
+
+    get_word() returns the running Word application or raises;
+    attach_events(word_app, tracker) connects its events to the tracker's
+    on_* methods and returns the connection, or raises if events aren't
+    available. Both can be replaced (e.g. with macros.FakeWord stand-ins).
+    """
+
+    changed = pyqtSignal(object)
+
+    def __init__(self, get_word=get_running_word, attach_events=attach_word_events, parent=None):
+        super().__init__(parent)
+        self.get_word = get_word
+        self.attach_events = attach_events
+        self.document = None
+        self.word_app = None       # Cached dispatch of the running Word
+        self.events = None         # Event connection, while events are working
+        self.poll_interval = MIN_POLL_INTERVAL
+
+        self._poll_timer = QTimer(self)
+        self._poll_timer.setSingleShot(True)
+        self._poll_timer.timeout.connect(self.poll)
+        # Events only schedule a refresh, so they return to Word at once and
+        # a burst of them (open + activate) costs one look at the document
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.timeout.connect(self.refresh)
+
+    @property
+    def uses_events(self):
+        return self.events is not None
+
+    def start(self):
+        self.poll()
+
+    def stop(self):
+        self._poll_timer.stop()
+        self._refresh_timer.stop()
+        self._disconnect()
+
+    def poll(self):
+        """Connects to Word if needed and reads the active document."""
+        if self.word_app is None:
+            self._connect()
+        changed = self.refresh()
+        if self.uses_events:
+            self.poll_interval = MAX_POLL_INTERVAL
+        elif changed:
+            self.poll_interval = MIN_POLL_INTERVAL
+        else:
+            self.poll_interval = min(self.poll_interval * 2, MAX_POLL_INTERVAL)
+        self._poll_timer.start(self.poll_interval)
+
+    def refresh(self):
+        """Reads the active document through the cached dispatch. Returns True if it changed."""
+        document = None
+        if self.word_app is not None:
+            try:
+                document = _read_active_document(self.word_app)
+            except Exception:
+                # Word has gone (or is in a state where it can't answer): start over
+                self._disconnect()
+                self._poll_timer.start(MIN_POLL_INTERVAL)
+        return self._set_document(document)
+
+    def on_document_change(self):
+        self._refresh_timer.start(0)
+
+    def on_document_before_close(self):
+        self._refresh_timer.start(CLOSE_REFRESH_DELAY)
+
+    def on_quit(self):
+        self._disconnect()
+        self._set_document(None)
+        # Watch for Word being started again
+        self.poll_interval = MIN_POLL_INTERVAL
+        self._poll_timer.start(self.poll_interval)
+
+    def _connect(self):
+        try:
+            self.word_app = self.get_word()
+        except Exception:
+            self.word_app = None
+            return
+        try:
+            self.events = self.attach_events(self.word_app, self)
+        except Exception as e:
+            print(f"Warning: Word events are not available ({e}); polling instead.")
+            self.events = None
+
+    def _disconnect(self):
+        if self.events is not None and hasattr(self.events, 'close'):
+            try:
+                self.events.close()  # Stops the events
+            except Exception:
+                pass
+        self.events = None
+        self.word_app = None
+
+    def _set_document(self, document):
+        if document == self.document:
+            return False
+        self.document = document
+        self.changed.emit(document)
+        return True
@@ -0,0 +1,178 @@
+# ui/cleanjobqueue.py
+# Runs Clean & Protect on many files off the GUI thread. .docx files are
+# cleaned on a small thread pool without Word; files that need Word (a .doc,
+# or when fields are to be updated) go to a WordPool of long-lived hidden
+# Word instances. Progress arrives through signals, one log line at a time.
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from macros.CleanDocument import clean_document, needs_word
+
+QUEUED = "Queued"
+RUNNING = "Running"
+DONE = "Done"
+FAILED = "Failed"
+CANCELLED = "Cancelled"
+FINISHED_STATUSES = (DONE, FAILED, CANCELLED)
+
+DEFAULT_WORKERS = 2
+
+
+class CleanJob:
+    """One file in the queue. Only the queue changes its fields."""
+
+    def __init__(self, number, path, update_fields=False):
+        self.number = number
+        self.path = path
+        self.update_fields = update_fields
+        self.uses_word = needs_word(path, update_fields)
+        self.status = QUEUED
+        self.started_at = None
+        self.finished_at = None
+        self.messages = []
+        self.future = None
+        self._cancel = threading.Event()
+
+    @property
+    def name(self):
+        return os.path.basename(self.path)
+
+    def elapsed(self):
+        """Seconds spent running so far (or in total, once finished)."""
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    def is_finished(self):
+        return self.status in FINISHED_STATUSES
+
+
+class CleanJobQueue(QObject):
+    """
+    Lives on the GUI thread; its signals are emitted from the worker
+    threads and delivered on the GUI thread.
+    """
+
+    job_added = pyqtSignal(object)       # CleanJob
+    job_changed = pyqtSignal(object)     # CleanJob whose status changed
+    log_line = pyqtSignal(object, str)   # CleanJob, one message of its log
+    stopped = pyqtSignal()               # After shutdown(): every worker has finished
+
+    def __init__(self, workers=DEFAULT_WORKERS, word_pool_factory=None, parent=None):
+        super().__init__(parent)
+        self.jobs = []
+        self.update_fields = True    # For the jobs added from now on (as Word always did)
+        self._count = 0
+        self._workers = workers
+        self._executor = None
+        self._word_pool = None
+        self._stopping = None        # Thread waiting for the workers after shutdown()
+        # Makes the WordPool for Word jobs, when the first one is queued
+        self._word_pool_factory = word_pool_factory or self._default_word_pool
+
+    def _default_word_pool(self):
+        from macros.WordPool import WordPool
+        return WordPool(self._workers)
+
+    def add_files(self, paths):
+        """Queues each file; returns the new jobs."""
+        added = []
+        for path in paths:
+            path = os.path.abspath(path)
+            self._count += 1
+            job = CleanJob(self._count, path, self.update_fields)
+            self.jobs.append(job)
+            self.job_added.emit(job)
+            if job.uses_word:
+                if self._word_pool is None:
+                    self._word_pool = self._word_pool_factory()
+                job.future = self._word_pool.submit(self._run, job)
+            else:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(self._workers,
+                                                        thread_name_prefix="clean-job")
+                job.future = self._executor.submit(self._run, job)
+            added.append(job)
+        return added
+
+    def cancel(self, job):
+        """Cancels a queued job, or asks a running one to stop at its next step."""
+        if job.is_finished():
+            return
+        job._cancel.set()
+        if job.future is not None and job.future.cancel():
+            self._finish(job, CANCELLED)
+
+    def cancel_all(self):
+        for job in self.jobs:
+            self.cancel(job)
+
+    def active_jobs(self):
+        return [job for job in self.jobs if not job.is_finished()]
+
+    def clear_finished(self):
+        self.jobs = [job for job in self.jobs if not job.is_finished()]
+
+    def shutdown(self):
+        """
+        Cancels everything and returns at once; running jobs stop at their
+        next step. stopped is emitted once they have and the pooled Word
+        instances have quit. Until then the app must not exit: the pool's
+        daemon threads would die with it and leave hidden Word processes.
+        """
+        self.cancel_all()
+        executor, word_pool = self._executor, self._word_pool
+        self._executor = None
+        self._word_pool = None
+        if executor is None and word_pool is None:
+            return  # Nothing was ever started
+
+        def wait():
+            if executor is not None:
+                executor.shutdown(wait=True)
+            if word_pool is not None:
+                word_pool.close(wait=True)
+            self.stopped.emit()
+
+        # Waiting here would freeze the GUI for as long as a Word step takes
+        self._stopping = threading.Thread(target=wait, name="clean-job-shutdown", daemon=True)
+        self._stopping.start()
+
+    def is_stopping(self):
+        """True between shutdown() and the workers having finished."""
+        return self._stopping is not None and self._stopping.is_alive()
+
+    def _finish(self, job, status):
+        job.status = status
+        if job.started_at is not None:
+            job.finished_at = time.monotonic()
+        self.job_changed.emit(job)
+
+    def _run(self, job, word_app=None):
+        # On a worker thread
+        if job._cancel.is_set():
+            self._finish(job, CANCELLED)
+            return False
+        job.started_at = time.monotonic()
+        job.status = RUNNING
+        self.job_changed.emit(job)
+
+        def log(line):
+            job.messages.append(line)
+            self.log_line.emit(job, line)
+
+        try:
+            success, _ = clean_document(job.path, job.update_fields, word_app=word_app,
+                                        log=log, cancel_check=job._cancel.is_set)
+        except Exception as e:
+            log(f"Error: {e}")
+            success = False
+        if job._cancel.is_set() and not success:
+            self._finish(job, CANCELLED)
+        else:
+            self._finish(job, DONE if success else FAILED)
+        return success
@@ -0,0 +1,216 @@
+# ui/cleanjobswindow.py
+# Clean & Protect for many files at once: files are added with the file
+# dialog or dropped on the window, run on a CleanJobQueue, and their log
+# lines stream into a dockable log pane while they run.
+from PyQt5.QtWidgets import (QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, QPushButton,
+                             QCheckBox, QLabel, QFileDialog, QTableWidget, QTableWidgetItem,
+                             QHeaderView, QAbstractItemView, QDockWidget, QPlainTextEdit,
+                             QMessageBox)
+import os
+from PyQt5.QtGui import QIcon
+from PyQt5.QtCore import Qt, QTimer
+
+from macros.DocumentSource import find_docx_files
+from .cleanjobqueue import CleanJobQueue, RUNNING
+
+WORD_FILE_EXTENSIONS = ('.docx', '.doc')
+NUMBER_COLUMN, FILE_COLUMN, STATUS_COLUMN, ELAPSED_COLUMN = range(4)
+# Lines kept in the log pane; older ones scroll away
+MAX_LOG_LINES = 20000
+
+
+class CleanJobsWindow(QMainWindow):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.queue = CleanJobQueue(parent=self)
+        self.queue.job_added.connect(self.on_job_added)
+        self.queue.job_changed.connect(self.on_job_changed)
+        self.queue.log_line.connect(self.on_log_line)
+        self.rows = {}  # CleanJob -> table row
+
+        self.setWindowTitle("Clean & Protect")
+        self.setMinimumSize(600, 450)
+        dir_path = os.path.dirname(os.path.realpath(__file__))
+        self.setWindowIcon(QIcon(os.path.join(dir_path, "clean.ico")))
+        self.setAcceptDrops(True)
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(10, 10, 10, 10)
+        layout.setSpacing(10)
+
+        button_layout = QHBoxLayout()
+        self.add_button = QPushButton("Add Files...", self)
+        self.add_button.clicked.connect(self.choose_files)
+        button_layout.addWidget(self.add_button)
+        self.cancel_button = QPushButton("Cancel Selected", self)
+        self.cancel_button.clicked.connect(self.cancel_selected)
+        button_layout.addWidget(self.cancel_button)
+        self.cancel_all_button = QPushButton("Cancel All", self)
+        self.cancel_all_button.clicked.connect(self.queue.cancel_all)
+        button_layout.addWidget(self.cancel_all_button)
+        self.clear_button = QPushButton("Clear Finished", self)
+        self.clear_button.clicked.connect(self.clear_finished)
+        button_layout.addWidget(self.clear_button)
+        button_layout.addStretch()
+        layout.addLayout(button_layout)
+
+        # On by default, as Clean & Protect has always updated fields
+        self.update_fields_checkbox = QCheckBox("Update fields (uses Word)", self)
+        self.update_fields_checkbox.setChecked(True)
+        self.update_fields_checkbox.setToolTip(
+            "Untick to clean .docx files without opening Word, which is much faster "
+            "but leaves fields (tables of contents, cross-references) as they are.")
+        layout.addWidget(self.update_fields_checkbox)
+
+        self.table = QTableWidget(0, 4, self)
+        self.table.setHorizontalHeaderLabels(["#", "File", "Status", "Elapsed"])
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(NUMBER_COLUMN, QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(FILE_COLUMN, QHeaderView.Stretch)
+        header.setSectionResizeMode(STATUS_COLUMN, QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(ELAPSED_COLUMN, QHeaderView.ResizeToContents)
+        layout.addWidget(self.table)
+
+        self.summary_label = QLabel("Add files or drop them here.", self)
+        layout.addWidget(self.summary_label)
+
+        widget = QWidget()
+        widget.setLayout(layout)
+        self.setCentralWidget(widget)
+
+        # The log can be moved to another side or floated as its own window
+        self.log_view = QPlainTextEdit(self)
+        self.log_view.setReadOnly(True)
+        self.log_view.setMaximumBlockCount(MAX_LOG_LINES)
+        self.log_dock = QDockWidget("Log", self)
+        self.log_dock.setObjectName("clean_log_dock")
+        self.log_dock.setWidget(self.log_view)
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.log_dock)
+
+        # Elapsed times of running jobs tick over while they run
+        self.elapsed_timer = QTimer(self)
+        self.elapsed_timer.setInterval(500)
+        self.elapsed_timer.timeout.connect(self.update_elapsed)
+
+        self.update_stay_on_top()
+
+    def choose_files(self):
+        options = QFileDialog.Options()
+        file_paths, _ = QFileDialog.getOpenFileNames(
+            self, "Choose Word Documents to Clean", "",
+            "Word Documents (*.docx *.doc)", options=options)
+        if file_paths:
+            self.add_files(file_paths)
+
+    def add_files(self, paths):
+        self.queue.update_fields = self.update_fields_checkbox.isChecked()
+        self.queue.add_files(paths)
+        self.update_summary()
+
+    def dragEnterEvent(self, event):
+        if self._dropped_paths(event):
+            event.acceptProposedAction()
+        else:
+            event.ignore()
+
+    def dropEvent(self, event):
+        paths = self._dropped_paths(event)
+        if paths:
+            event.acceptProposedAction()
+            self.add_files(paths)
+
+    def _dropped_paths(self, event):
+        # Word files dropped directly, and the .docx files in dropped folders
+        if not event.mimeData().hasUrls():
+            return []
+        paths = []
+        for url in event.mimeData().urls():
+            path = url.toLocalFile()
+            if os.path.isdir(path):
+                paths.extend(find_docx_files([path]))
+            elif path.lower().endswith(WORD_FILE_EXTENSIONS):
+                paths.append(path)
+        return paths
+
+    def on_job_added(self, job):
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+        self.rows[job] = row
+        self.table.setItem(row, NUMBER_COLUMN, QTableWidgetItem(str(job.number)))
+        file_item = QTableWidgetItem(job.name)
+        file_item.setToolTip(job.path)
+        self.table.setItem(row, FILE_COLUMN, file_item)
+        self.table.setItem(row, STATUS_COLUMN, QTableWidgetItem(job.status))
+        self.table.setItem(row, ELAPSED_COLUMN, QTableWidgetItem(""))
+
+    def on_job_changed(self, job):
+        row = self.rows.get(job)
+        if row is None:
+            return
+        status = job.status + (" (Word)" if job.uses_word and job.status == RUNNING else "")
+        self.table.item(row, STATUS_COLUMN).setText(status)
+        self.table.item(row, ELAPSED_COLUMN).setText(self._format_elapsed(job))
+        if job.status == RUNNING and not self.elapsed_timer.isActive():
+            self.elapsed_timer.start()
+        self.update_summary()
+
+    def on_log_line(self, job, line):
+        self.log_view.appendPlainText(f"[#{job.number}] {line}")
+
+    def update_elapsed(self):
+        running = [job for job in self.rows if job.status == RUNNING]
+        for job in running:
+            self.table.item(self.rows[job], ELAPSED_COLUMN).setText(self._format_elapsed(job))
+        if not running:
+            self.elapsed_timer.stop()
+
+    @staticmethod
+    def _format_elapsed(job):
+        return f"{job.elapsed():.1f} s" if job.started_at is not None else ""
+
+    def update_summary(self):
+        counts = {}
+        for job in self.queue.jobs:
+            counts[job.status] = counts.get(job.status, 0) + 1
+        self.summary_label.setText(", ".join(f"{status}: {count}"
+                                             for status, count in counts.items()))
+
+    def cancel_selected(self):
+        selected = {index.row() for index in self.table.selectionModel().selectedRows()}
+        for job, row in self.rows.items():
+            if row in selected:
+                self.queue.cancel(job)
+
+    def clear_finished(self):
+        self.queue.clear_finished()
+        for job in sorted(self.rows, key=self.rows.get, reverse=True):
+            if job.is_finished():
+                self.table.removeRow(self.rows.pop(job))
+        for row, job in enumerate(sorted(self.rows, key=self.rows.get)):
+            self.rows[job] = row
+        self.update_summary()
+
+    def update_stay_on_top(self):
+        parent = self.parent()
+        if parent and hasattr(parent, 'stay_on_top_checkbox'):
+            flags = self.windowFlags()
+            if parent.stay_on_top_checkbox.isChecked():
+                self.setWindowFlags(flags | Qt.WindowStaysOnTopHint)
+            else:
+                self.setWindowFlags(flags & ~Qt.WindowStaysOnTopHint)
+            self.show()
+
+    def closeEvent(self, event):
+        if self.queue.active_jobs():
+            answer = QMessageBox.question(
+                self, "Clean & Protect",
+                "Some files are still being cleaned. Cancel them and close?",
+                QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+            if answer != QMessageBox.Yes:
+                event.ignore()
+                return
+        self.queue.shutdown()
+        super().closeEvent(event)
@@ -4,17 +4,15 @@ from PyQt5.QtWidgets import (
     QMessageBox, QFileDialog
 )
 from PyQt5.QtGui import QIcon
-from PyQt5.QtCore import Qt, QTimer, QCoreApplication
+from PyQt5.QtCore import Qt, QTimer
 import os
 import sys
-import win32com.client
-from .acronymswindow import fetch_acronym_list_online  # Use relative import
+from macros.AcronymList import (ACRONYM_LIST_URL, get_base_acronym_cache_path,
+                                refresh_acronym_list_in_background)
+from .activedocumenttracker import ActiveDocumentTracker
 
-try:
-    from macros.CleanDocument import process_word_document
-except ImportError:
-    print("Warning: Could not import CleanDocument macro.")
-    process_word_document = None
+# Feature modules (acronyms, replace values, clean document) and their heavy
+# dependencies are imported on first use so the main window paints quickly.
 
 
 class MainWindow(QMainWindow):
@@ -93,24 +91,23 @@ class MainWindow(QMainWindow):
         self.widget.setLayout(self.layout)
         self.setCentralWidget(self.widget)
 
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_active_document)
-        self.timer.start(1000)
+        # Follows Word's events, falling back to (backed-off) polling
+        self.document_tracker = ActiveDocumentTracker(parent=self)
+        self.document_tracker.changed.connect(self.update_active_document)
         self.acronyms_window = None
         self.replace_values_window = None
-        self.update_active_document()
+        self.clean_jobs_window = None
+        self.update_active_document(None)
+        self.document_tracker.start()
 
-    def update_active_document(self):
-        try:
-            word_app = win32com.client.GetActiveObject('Word.Application')
-            active_doc = word_app.ActiveDocument
-            self.active_doc_label.setText(
-                "Active Document: " + active_doc.Name)
-            self.active_doc_path = os.path.join(
-                active_doc.Path, active_doc.Name)
-        except Exception:
+    def update_active_document(self, document):
+        if document is None:
             self.active_doc_label.setText("Active Document: None")
             self.active_doc_path = None
+        else:
+            name, folder = document
+            self.active_doc_label.setText("Active Document: " + name)
+            self.active_doc_path = os.path.join(folder, name)
 
     def open_replace_values_selection_window(self):
         from .replacevalues_selectionwindow import ReplaceValuesSelectionWindow
@@ -131,47 +128,34 @@ class MainWindow(QMainWindow):
             self.acronyms_window.show()
 
     def run_clean_document(self):
-        if process_word_document is None:
+        try:
+            from .cleanjobswindow import CleanJobsWindow
+        except ImportError:
+            print("Warning: Could not import CleanDocument macro.")
             QMessageBox.critical(self,
                                  "Error",
                                  "Clean Document module failed to load.")
             return
 
         options = QFileDialog.Options()
-        file_path, _ = QFileDialog.getOpenFileName(
-            self, "Choose a Word Document to Clean", "",
+        file_paths, _ = QFileDialog.getOpenFileNames(
+            self, "Choose Word Documents to Clean", "",
             "Word Documents (*.docx *.doc)", options=options)
 
-        if not file_path:
+        if not file_paths:
             self.label.setText("File selection cancelled.")
             QTimer.singleShot(3000, self.label.clear)
             return
 
-        try:
-            self.label.setText(
-                f"Processing {os.path.basename(file_path)}... Please wait.")
-            QCoreApplication.processEvents()
-
-            success, messages = process_word_document(file_path)
-
-            log_message = "\n".join(messages)
-            if success:
-                QMessageBox.information(self,
-                                        "Success",
-                                        f"Processing finished.\n\nLog:\n{
-                                            log_message}")
-            else:
-                QMessageBox.critical(self,
-                                     "Error",
-                                     f"Processing failed.\n\nLog:\n{
-                                        log_message}")
-
-        except Exception as e:
-            QMessageBox.critical(self,
-                                 "Error",
-                                 f"An unexpected error occurred: {str(e)}")
-        finally:
-            self.label.clear()
+        # The files are cleaned in the background; the jobs window shows
+        # their progress and log (and takes more files by drag and drop)
+        if (self.clean_jobs_window is not None and
+                self.clean_jobs_window.isVisible()):
+            self.clean_jobs_window.activateWindow()
+        else:
+            self.clean_jobs_window = CleanJobsWindow(self)
+            self.clean_jobs_window.show()
+        self.clean_jobs_window.add_files(file_paths)
 
     def toggle_stay_on_top(self, checked):
         flags = self.windowFlags()
@@ -189,16 +173,30 @@ class MainWindow(QMainWindow):
                 self.acronyms_window.isVisible()):
             self.acronyms_window.update_stay_on_top()
 
+        if (self.clean_jobs_window is not None and
+                self.clean_jobs_window.isVisible()):
+            self.clean_jobs_window.update_stay_on_top()
+
+    def closeEvent(self, event):
+        # The jobs window doesn't keep the app open by itself, so close it
+        # here: that cancels its jobs and quits its Word instances
+        if self.clean_jobs_window is not None:
+            from .cleanjobswindow import CleanJobsWindow
+            if self.clean_jobs_window.isVisible() and not self.clean_jobs_window.close():
+                event.ignore()
+                return
+            # Any jobs window closed earlier may still be stopping as well
+            stopping = [window.queue for window in self.findChildren(CleanJobsWindow)
+                        if window.queue.is_stopping()]
+            if stopping:
+                # Close again once Word has quit, staying responsive meanwhile
+                self.label.setText("Waiting for Word to close...")
+                for queue in stopping:
+                    queue.stopped.connect(self.close)
+                event.ignore()
+                return
+        super().closeEvent(event)
+
     def prefetch_acronyms(self):
-        try:
-            url = (
-                "https://raw.githubusercontent.com/IIDelta/Doc_Companion/"
-                "main/acronyms/acronym%20list.txt"
-            )
-            cache_dir = os.path.join(os.path.expanduser("~"), ".doc_companion")
-            cache = os.path.join(cache_dir, "base_acronym_list.txt")
-            os.makedirs(cache_dir, exist_ok=True)
-            fetch_acronym_list_online(url, cache)
-            print("Acronym list prefetched.")
-        except Exception as e:
-            print(f"Prefetch failed: {e}")
+        # Off the GUI thread; does nothing if the cached list is fresh
+        refresh_acronym_list_in_background(ACRONYM_LIST_URL, get_base_acronym_cache_path())
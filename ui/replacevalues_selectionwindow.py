@@ -8,16 +8,18 @@ from PyQt5.QtCore import Qt, QTimer
 
 try:
     from macros.ReplaceValues_Selection import Macro_ReplaceValues_Selection
+    from macros.ReplacementTable import FILE_DIALOG_FILTER, describe_problems
 except ImportError:
     print("Error: Could not import ReplaceValues_Selection macro.")
     Macro_ReplaceValues_Selection = None
+    FILE_DIALOG_FILTER = "Excel Files (*.xlsx)"
 
 
 class WildcardsInfoWindow(QMainWindow):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Wildcards Information")
-        self.setMinimumSize(350, 250) # Increased height
+        self.setMinimumSize(350, 380) # Increased height
 
         self.text_edit = QTextEdit()
         self.text_edit.setReadOnly(True)
@@ -31,13 +33,18 @@ class WildcardsInfoWindow(QMainWindow):
                 </tr>
                 <tr><td style="padding: 5px; border: 1px solid #C0C0C0;">*</td><td style="padding: 5px; border: 1px solid #C0C0C0;">Any sequence of characters</td></tr>
                 <tr><td style="padding: 5px; border: 1px solid #C0C0C0;">?</td><td style="padding: 5px; border: 1px solid #C0C0C0;">Any single character</td></tr>
-                <tr><td style="padding: 5px; border: 1px solid #C0C0C0;">#</td><td style="padding: 5px; border: 1px solid #C0C0C0;">Any single digit</td></tr>
+                <tr><td style="padding: 5px; border: 1px solid #C0C0C0;">[0-9]</td><td style="padding: 5px; border: 1px solid #C0C0C0;">Any single digit (# is not a wildcard when Use Wildcards is on)</td></tr>
                 <tr><td style="padding: 5px; border: 1px solid #C0C0C0;">[abc]</td><td style="padding: 5px; border: 1px solid #C0C0C0;">a, b, or c</td></tr>
                 <tr><td style="padding: 5px; border: 1px solid #C0C0C0;">[a-z]</td><td style="padding: 5px; border: 1px solid #C0C0C0;">Any character from a to z</td></tr>
                 <tr><td style="padding: 5px; border: 1px solid #C0C0C0;">[!abc]</td><td style="padding: 5px; border: 1px solid #C0C0C0;">Any character except a, b, or c</td></tr>
+                <tr><td style="padding: 5px; border: 1px solid #C0C0C0;">@</td><td style="padding: 5px; border: 1px solid #C0C0C0;">One or more of the previous character or group</td></tr>
+                <tr><td style="padding: 5px; border: 1px solid #C0C0C0;">{n} {n,} {n,m}</td><td style="padding: 5px; border: 1px solid #C0C0C0;">n, at least n, or n to m of the previous character or group</td></tr>
+                <tr><td style="padding: 5px; border: 1px solid #C0C0C0;">&lt;  &gt;</td><td style="padding: 5px; border: 1px solid #C0C0C0;">Start and end of a word</td></tr>
+                <tr><td style="padding: 5px; border: 1px solid #C0C0C0;">( )</td><td style="padding: 5px; border: 1px solid #C0C0C0;">Groups part of the pattern; \\1 to \\9 in the replacement insert what a group matched, ^&amp; the whole match</td></tr>
                 <tr><td style="padding: 5px; border: 1px solid #C0C0C0;">~*</td><td style="padding: 5px; border: 1px solid #C0C0C0;">Finds a literal *</td></tr>
                 <tr><td style="padding: 5px; border: 1px solid #C0C0C0;">~?</td><td style="padding: 5px; border: 1px solid #C0C0C0;">Finds a literal ?</td></tr>
                 <tr><td style="padding: 5px; border: 1px solid #C0C0C0;">~~</td><td style="padding: 5px; border: 1px solid #C0C0C0;">Finds a literal ~</td></tr>
+                <tr><td style="padding: 5px; border: 1px solid #C0C0C0;">\\x</td><td style="padding: 5px; border: 1px solid #C0C0C0;">Finds a literal x (any special character)</td></tr>
             </table>
             <p><i>Note: Wildcards are only used if the 'Use Wildcards' box is checked.</i></p>
             """
@@ -114,8 +121,8 @@ class ReplaceValuesSelectionWindow(QMainWindow):
     def choose_excel_file(self):
         options = QFileDialog.Options()
         file_path, _ = QFileDialog.getOpenFileName(
-            self, "Choose an Excel File", "",
-            "Excel Files (*.xlsx *.xls)", options=options)
+            self, "Choose an Excel or CSV File", "",
+            FILE_DIALOG_FILTER, options=options)
         if file_path:
             self.excel_file = file_path
             self.excel_file_label.setText("File: " + os.path.basename(self.excel_file))
@@ -136,6 +143,16 @@ class ReplaceValuesSelectionWindow(QMainWindow):
             macro = Macro_ReplaceValues_Selection()
             macro.load_excel_file(self.excel_file)
             use_wildcards = self.use_wildcards_checkbox.isChecked()
+
+            problems = macro.check_replacements(use_wildcards)
+            if problems:
+                answer = QMessageBox.question(
+                    self, "Check Replacements",
+                    f"{describe_problems(problems)}\n\nRun the replacements anyway?",
+                    QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+                if answer != QMessageBox.Yes:
+                    return
+
             result = macro.replace_values(use_wildcards)
 
             if result is not None:
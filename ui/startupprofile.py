@@ -0,0 +1,76 @@
+# ui/startupprofile.py
+# Startup timing report for `python main.py --startup-profile`.
+# Only uses the standard library so it can be imported before anything else.
+import os
+import sys
+import time
+
+# Heavy modules that should NOT be loaded before the main window paints.
+# If one of these shows up in the report, a lazy import has regressed.
+HEAVY_MODULES = [
+    'nltk', 'requests', 'docx', 'openpyxl',
+    'macros.Acronyms', 'macros.CleanDocument', 'macros.ReplaceValues_Selection',
+    'ui.acronymswindow', 'ui.replacevalues_selectionwindow',
+]
+
+
+class StartupProfile:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.start = time.perf_counter()
+        self.marks = []  # [(label, seconds since start, seconds since last mark)]
+        self._last = self.start
+        self.first_paint_done = False
+
+    def mark(self, label):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.marks.append((label, now - self.start, now - self._last))
+        self._last = now
+
+    def watch_first_paint(self, widget, callback=None):
+        """Installs an event filter that marks the first Paint of widget."""
+        if not self.enabled:
+            return
+        from PyQt5.QtCore import QObject, QEvent
+
+        profile = self
+
+        class _FirstPaintFilter(QObject):
+            def eventFilter(self, obj, event):
+                if event.type() == QEvent.Paint and not profile.first_paint_done:
+                    profile.first_paint_done = True
+                    profile.mark("first paint")
+                    obj.removeEventFilter(self)
+                    if callback:
+                        callback()
+                return False
+
+        self._paint_filter = _FirstPaintFilter(widget)
+        widget.installEventFilter(self._paint_filter)
+
+    def report(self):
+        lines = ["Startup profile (ms):"]
+        for label, total, delta in self.marks:
+            lines.append(f"  {label:<32} +{delta * 1000:8.1f}  = {total * 1000:8.1f}")
+        loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+        if loaded:
+            lines.append("Heavy modules loaded before first paint: " + ", ".join(loaded))
+        else:
+            lines.append("Heavy modules loaded before first paint: none")
+        return "\n".join(lines)
+
+    def print_report(self):
+        text = self.report()
+        # Windowed (PyInstaller) builds have no console; write to a file instead
+        if sys.stdout is None:
+            report_path = os.path.join(os.path.expanduser("~"), ".doc_companion", "startup_profile.txt")
+            try:
+                os.makedirs(os.path.dirname(report_path), exist_ok=True)
+                with open(report_path, "w", encoding="utf-8") as f:
+                    f.write(text + "\n")
+            except Exception:
+                pass
+        else:
+            print(text)